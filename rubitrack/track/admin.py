@@ -4,6 +4,7 @@ from django.contrib import admin
 
 # Register your models here.
 from .models import Artist, Track, Genre, Playlist, TransitionType, Transition, CurrentlyPlaying, Collection, Config, CuePoint
+from .models import IcecastLogState
 
 
 from django import forms
@@ -17,6 +18,12 @@ admin.site.register(CurrentlyPlaying)
 admin.site.register(Collection)
 
 
+@admin.register(IcecastLogState)
+class IcecastLogStateAdmin(admin.ModelAdmin):
+    list_display = ['path', 'offset', 'updated_at', 'heartbeat_at']
+    readonly_fields = ['updated_at', 'heartbeat_at']
+
+
 # class TrackInline(admin.StackedInline):
 class TrackInline(admin.TabularInline):
     model = Track
@@ -172,7 +179,8 @@ class ConfigAdmin(admin.ModelAdmin):
             'description': 'Configuration des intervalles de rafraîchissement des pages'
         }),
         ('Icecast & Playlists', {
-            'fields': ('rubi_icecast_playlist_file', 'max_playlist_history_size', 'max_suggestions_auto_size'),
+            'fields': ('rubi_icecast_playlist_file', 'icecast_ingest_daemon', 'max_playlist_history_size',
+                       'max_suggestions_auto_size'),
             'description': 'Configuration Icecast et gestion des playlists'
         }),
         ('Interface utilisateur', {
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TrackConfig(AppConfig):
     name = 'track'
     default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        # Signaux Track/Artist qui tiennent à jour l'index de résolution du log Icecast
+        from .currently_playing import track_resolver  # noqa: F401
@@ -0,0 +1,141 @@
+"""
+Benchmark de l'import collection.nml (manage.py benchmark_import): collections
+synthétiques de plusieurs tailles, temps, requêtes SQL et pic mémoire par étape.
+
+Chaque taille est importée dans une transaction annulée à la fin: les tailles
+sont mesurées sur une base identique et rien n'est conservé.
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from .import_collection import get_default_collection_for_user, handle_uploaded_file, import_playlist_from_xml_doc
+from .synthetic_collection import write_synthetic_collection
+
+BENCHMARK_SIZES = (1000, 10000, 50000)
+# Etapes mesurées pour chaque taille
+STAGE_IMPORT = 'import'  # premier import, base vide
+STAGE_REIMPORT = 'reimport'  # même fichier, incrémental (ENTRY inchangées ignorées)
+STAGE_REIMPORT_FULL = 'reimport_full'  # même fichier, incremental=False
+STAGE_PLAYLISTS = 'playlists'  # import_playlist_from_xml_doc seul, playlists existantes
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Transaction annulée en sortie de bloc (mesures sur une base identique)."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+@contextmanager
+def _measure(results: dict, stage: str):
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+    results[stage] = {'seconds': round(seconds, 3), 'queries': len(ctx.captured_queries)}
+
+
+def benchmark_collection_file(path: str, measure_memory: bool = True, parse_workers: Optional[int] = None) -> dict:
+    """Mesure les étapes STAGE_* sur un fichier.
+
+    Returns: {étape: {'seconds', 'queries'}}; le premier import a en plus
+    'peak_memory_mb' (tracemalloc, passe séparée: le traçage ralentit l'import).
+    La passe mémoire lit toujours le fichier dans le processus courant
+    (parse_workers=1): tracemalloc ne voit pas les processus de lecture, le pic
+    omettrait la lecture et ne serait pas comparable d'un run à l'autre.
+    """
+    results: Dict[str, dict] = {}
+    with rolled_back():
+        user = User.objects.create_user(username='benchmark_import')
+        with _measure(results, STAGE_IMPORT):
+            handle_uploaded_file(path, user, parse_workers=parse_workers)
+        with _measure(results, STAGE_REIMPORT):
+            handle_uploaded_file(path, user, parse_workers=parse_workers)
+        with _measure(results, STAGE_REIMPORT_FULL):
+            handle_uploaded_file(path, user, incremental=False, parse_workers=parse_workers)
+        xmldoc = ET.parse(path).getroot()
+        collection = get_default_collection_for_user(user)
+        with _measure(results, STAGE_PLAYLISTS):
+            import_playlist_from_xml_doc(xmldoc, collection)
+        del xmldoc
+
+    if measure_memory:
+        with rolled_back():
+            user = User.objects.create_user(username='benchmark_import')
+            tracemalloc.start()
+            try:
+                handle_uploaded_file(path, user, parse_workers=1)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        results[STAGE_IMPORT]['peak_memory_mb'] = round(peak / (1024 * 1024), 1)
+    return results
+
+
+def run_import_benchmark(
+    sizes=BENCHMARK_SIZES,
+    measure_memory: bool = True,
+    parse_workers: Optional[int] = None,
+    **generator_options,
+) -> Dict[str, dict]:
+    """Génère une collection par taille et la mesure (benchmark_collection_file).
+
+    `generator_options` est transmis à write_synthetic_collection.
+    Returns: {taille (str, pour le JSON): {étape: mesures}}
+    """
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = os.path.join(tmp_dir, f'collection_{size}.nml')
+            with open(path, 'w', encoding='utf-8') as out:
+                write_synthetic_collection(out, size, **generator_options)
+            report[str(size)] = benchmark_collection_file(path, measure_memory, parse_workers)
+            os.unlink(path)
+    return report
+
+
+# Comptes de résultats (correspondances trouvées), pas des coûts: ils doivent être
+# identiques à la référence, sans marge
+EXACT_METRICS = ('matched',)
+
+
+def find_regressions(report: dict, baseline: dict, tolerance: float = 0.25) -> List[str]:
+    """Mesures de `report` qui dépassent celles de `baseline` de plus de `tolerance`
+    (requêtes, temps, mémoire), pour les tailles et étapes présentes des deux côtés.
+    Les EXACT_METRICS doivent être égales à la référence (un écart, dans un sens ou
+    dans l'autre, change le résultat et non le coût). Les détails non numériques
+    (temps par phase) ne sont pas comparés."""
+    regressions = []
+    for size, stages in report.items():
+        for stage, measures in stages.items():
+            reference = baseline.get(size, {}).get(stage, {})
+            for metric, value in measures.items():
+                limit = reference.get(metric)
+                if not isinstance(value, (int, float)) or not isinstance(limit, (int, float)):
+                    continue
+                if metric in EXACT_METRICS:
+                    if value != limit:
+                        regressions.append(
+                            f"{size} entrées / {stage}: {metric} {value} != {limit} (résultat différent)"
+                        )
+                elif value > limit * (1 + tolerance):
+                    regressions.append(f"{size} entrées / {stage}: {metric} {value} > {limit} (+{tolerance:.0%})")
+    return regressions
@@ -1,23 +1,31 @@
 import datetime
-from collections import defaultdict
-from xml.dom.minidom import Element
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
+import xml.etree.ElementTree as ET
 import pytz
 from decimal import Decimal, InvalidOperation
-from typing import Dict, Optional, Set, Tuple
+from typing import Callable, Collection as CollectionType, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from django import forms
-from django.db import transaction
-from django.shortcuts import render
+from django.db import connection, transaction
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.utils import timezone
 
 from track.playlist.playlist_transitions import get_order_rank
-from ..models import Playlist, Track, Artist, Genre, Collection, CuePoint
+from ..models import Playlist, PlaylistTrack, Track, Artist, Genre, Collection, CuePoint, ImportJob
 from ..musical_key.musical_key_utils import extract_musical_key_from_filename, normalize_musical_key_notation
 from ..duplicate.detection import normalize_title_base
 from ..duplicate.display_duplicate import keys_are_equivalent
 
 from django.contrib.auth.decorators import login_required
 
-import xml.dom.minidom
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,9 +35,111 @@ MAX_COMMENT_LENGTH = 500
 MAX_MUSICAL_KEY_LENGTH = 3
 MAX_GENRE_LENGTH = 3
 
+# Taille des lots bulk_create / bulk_update pendant l'import
+IMPORT_BATCH_SIZE = 500
+
+# Champs de Track renseignés par l'import (comparés à la base pour n'écrire que le nécessaire)
+TRACK_IMPORT_FIELDS = (
+    'title', 'artist', 'genre', 'comment', 'comment2', 'ranking', 'playcount', 'date_last_played',
+    'musical_key', 'bitrate', 'playtime', 'bpm', 'audio_id', 'file_name', 'location_dir', 'file_path',
+    'import_fingerprint',
+)
+
+# Sous-éléments d'ENTRY pris en compte dans l'empreinte (avec les attributs d'ENTRY, dont MODIFIED_DATE)
+FINGERPRINT_TAGS = ('LOCATION', 'INFO', 'TEMPO', 'CUE_V2')
+# A incrémenter quand l'extraction change: toutes les ENTRY seront alors réimportées
+IMPORT_FINGERPRINT_VERSION = 1
+
+# Phases signalées au callback `progress(phase, processed)` de handle_uploaded_file
+IMPORT_PHASE_TRACKS = 'tracks'
+IMPORT_PHASE_CUES = 'cues'
+IMPORT_PHASE_PLAYLISTS = 'playlists'
+
+ProgressCallback = Callable[[str, Optional[int]], None]
+
+# Etapes mesurées par ImportStageTimer (plus fines que les phases de progression)
+IMPORT_STAGE_PARSE = 'parse'  # lecture du XML et extraction des ENTRY
+IMPORT_STAGE_TRACKS = 'tracks'  # rapprochement et écriture des tracks
+IMPORT_STAGE_CUES = 'cues'  # synchronisation des cue points
+IMPORT_STAGE_COLLECTION = 'collection'  # rattachement à la collection de l'utilisateur
+IMPORT_STAGE_PLAYLISTS = 'playlists'
+IMPORT_STAGES = (
+    IMPORT_STAGE_PARSE, IMPORT_STAGE_TRACKS, IMPORT_STAGE_CUES, IMPORT_STAGE_COLLECTION, IMPORT_STAGE_PLAYLISTS,
+)
+
+# Processus de lecture des ENTRY (étape de lecture en parallèle, écriture en base dans
+# le processus courant). 1 = lecture dans le processus courant.
+IMPORT_PARSE_WORKERS = os.cpu_count() or 1
+# ENTRY envoyées en une fois à un processus de lecture. Une collection plus petite
+# qu'un lot est lue sans pool (démarrer les processus coûterait plus que la lecture).
+IMPORT_PARSE_CHUNK_SIZE = 1000
+# Taille des blocs lus par le découpage brut de COLLECTION
+NML_READ_BLOCK_SIZE = 1 << 20
+
+# Champs de CuePoint produits par extract_cue_points
+CUE_POINT_IMPORT_FIELDS = ('time', 'type', 'comment', 'traktor_type', 'end_time', 'duration', 'time_ms', 'len_ms')
+
 
 class UploadCollectionForm(forms.Form):
     file = forms.FileField()
+    full_import = forms.BooleanField(
+        required=False, help_text="Réimporter aussi les entrées inchangées depuis le dernier import"
+    )
+    run_in_background = forms.BooleanField(
+        required=False, initial=True,
+        help_text="Import en tâche de fond (manage.py run_import_jobs), avec suivi de l'avancement"
+    )
+
+
+class ImportStageTimer:
+    """
+    Temps et requêtes SQL par étape de l'import (IMPORT_STAGE_*). Le temps est
+    exclusif: une étape imbriquée (cue points pendant l'écriture des tracks) est
+    décomptée de l'étape englobante. Les requêtes ne sont comptées qu'à
+    l'intérieur de count_queries() (celles hors étape vont dans 'other').
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.queries: Dict[str, int] = defaultdict(int)
+        self._stack: List[str] = []
+        self._last = time.perf_counter()
+
+    def _charge_elapsed(self) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            self.seconds[self._stack[-1]] += now - self._last
+        self._last = now
+
+    @contextmanager
+    def stage(self, name: str):
+        self._charge_elapsed()
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._charge_elapsed()
+            self._stack.pop()
+
+    def timed(self, name: str, iterable: Iterable) -> Iterator:
+        """Itère sur `iterable` en imputant à `name` le temps de production de chaque élément."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    @contextmanager
+    def count_queries(self):
+        def count(execute, sql, params, many, context):
+            self.queries[self._stack[-1] if self._stack else 'other'] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            yield
 
 
 class TrackImportIndex:
@@ -47,6 +157,9 @@ class TrackImportIndex:
         for t in all_tracks:
             self.by_artist[t.artist_id].append(t)
         self.by_audio_id: Dict[str, Track] = {t.audio_id: t for t in all_tracks if t.audio_id}
+        # Etat en base des champs importés, pour ne réécrire que ce qui a changé
+        self.import_fields = [Track._meta.get_field(name) for name in TRACK_IMPORT_FIELDS]
+        self.saved_state: Dict[int, tuple] = {t.pk: self.get_import_state(t) for t in all_tracks}
 
     def find(self, artist: Artist, title: str, audio_id: Optional[str]) -> Optional[Track]:
         """Retrouve une track existante, dans l'ordre de priorité historique:
@@ -96,64 +209,321 @@ class TrackImportIndex:
         if track.audio_id:
             self.by_audio_id[track.audio_id] = track
 
+    def get_import_state(self, track: Track) -> tuple:
+        """Valeurs des champs importés, normalisées comme en base (BPM '128.000000' -> 128.0)."""
+        return tuple(field.to_python(getattr(track, field.attname)) for field in self.import_fields)
+
+    def get_changed_fields(self, track: Track) -> Tuple[str, ...]:
+        """Champs importés dont la valeur diffère de l'état en base (tous pour une nouvelle track)."""
+        saved = self.saved_state.get(track.pk)
+        if saved is None:
+            return TRACK_IMPORT_FIELDS
+        current = self.get_import_state(track)
+        return tuple(
+            name for name, old, new in zip(TRACK_IMPORT_FIELDS, saved, current) if old != new
+        )
+
+    def mark_saved(self, track: Track) -> None:
+        self.saved_state[track.pk] = self.get_import_state(track)
+
+
+class TrackBulkWriter:
+    """
+    Ecritures groupées de l'import, par lots de IMPORT_BATCH_SIZE:
+    - nouvelles tracks: bulk_create (les ids sont renseignés sur les objets)
+    - tracks existantes: bulk_update limité aux champs réellement modifiés
+    - cue points: synchronisés par diff une fois les tracks du lot en base
+
+    Les tracks en attente sont déjà dans le TrackImportIndex: une ENTRY suivante
+    qui correspond à une track pas encore écrite retrouve le même objet.
+    """
+
+    def __init__(
+        self,
+        track_index: TrackImportIndex,
+        batch_size: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None,
+        timer: Optional[ImportStageTimer] = None,
+    ):
+        self.track_index = track_index
+        self.progress = progress
+        self.timer = timer or ImportStageTimer()
+        self.batch_size = batch_size or IMPORT_BATCH_SIZE
+        self.pending_new: Dict[int, Track] = {}  # id(objet) -> track sans pk
+        self.pending_updates: Dict[int, Track] = {}  # pk -> track
+        self.pending_cues: Dict[int, Tuple[Track, dict]] = {}  # id(objet) -> (track, cues)
+        self.rows_written = 0
+        self.cue_points_written = {'created': 0, 'updated': 0, 'deleted': 0}
+        self.write_seconds = 0.0
+
+    def add(self, track: Track, cue_data: Optional[dict]) -> None:
+        """Met en attente l'écriture d'une track (et de ses cue points si l'ENTRY en a)."""
+        if track.pk is None:
+            self.pending_new[id(track)] = track
+        else:
+            self.pending_updates[track.pk] = track
+        if cue_data is not None:
+            self.pending_cues[id(track)] = (track, cue_data)
+        if len(self.pending_new) + len(self.pending_updates) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        start = time.perf_counter()
+
+        new_tracks = list(self.pending_new.values())
+        if new_tracks:
+            Track.objects.bulk_create(new_tracks, batch_size=self.batch_size)
+            self.rows_written += len(new_tracks)
+            for track in new_tracks:
+                self.track_index.mark_saved(track)
+
+        # Un bulk_update par combinaison de champs modifiés (souvent playcount/date_last_played)
+        updates_by_fields: Dict[Tuple[str, ...], list] = defaultdict(list)
+        for track in self.pending_updates.values():
+            changed_fields = self.track_index.get_changed_fields(track)
+            if changed_fields:
+                updates_by_fields[changed_fields].append(track)
+        updated_at = timezone.now()
+        for fields, tracks in updates_by_fields.items():
+            # bulk_update ne renseigne pas les champs auto_now
+            for track in tracks:
+                track.updated_at = updated_at
+            Track.objects.bulk_update(tracks, fields + ('updated_at',), batch_size=self.batch_size)
+            self.rows_written += len(tracks)
+            for track in tracks:
+                self.track_index.mark_saved(track)
+
+        if self.pending_cues:
+            if self.progress:
+                self.progress(IMPORT_PHASE_CUES, None)
+            with self.timer.stage(IMPORT_STAGE_CUES):
+                for key, count in sync_cue_points(self.pending_cues.values()).items():
+                    self.cue_points_written[key] += count
+
+        self.pending_new.clear()
+        self.pending_updates.clear()
+        self.pending_cues.clear()
+        self.write_seconds += time.perf_counter() - start
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_written / self.write_seconds if self.write_seconds else 0.0
+
 
 @transaction.atomic
-def handle_uploaded_file(file, user):
+def handle_uploaded_file(
+    file,
+    user,
+    streaming: bool = True,
+    stats: Optional[dict] = None,
+    incremental: bool = True,
+    progress: Optional[ProgressCallback] = None,
+    parse_workers: Optional[int] = None,
+    timer: Optional[ImportStageTimer] = None,
+):
+    """Importe un collection.nml Traktor: tracks, cue points puis playlists.
+
+    - streaming=True (défaut): lecture incrémentale (iterparse), chaque ENTRY est
+      importée puis retirée de l'arbre; les playlists sont lues dans une seconde
+      passe. La mémoire reste constante quelle que soit la taille de la collection.
+    - streaming=False: le fichier entier est chargé en mémoire (ancien comportement).
+    - incremental=True (défaut): les ENTRY dont l'empreinte n'a pas changé depuis
+      le dernier import sont ignorées avant tout travail sur les modèles.
+    - parse_workers (streaming seulement): processus de lecture des ENTRY,
+      IMPORT_PARSE_WORKERS par défaut (voir iter_collection_records).
+
+    `file` est un chemin ou un fichier uploadé (relu depuis le début à chaque passe).
+    Si `stats` est fourni, il est complété avec le détail de l'import
+    (nouvelles/modifiées/inchangées, débit d'écriture, cue points).
+    `progress(phase, processed)` est appelé au fil de l'import (IMPORT_PHASE_*);
+    `processed` vaut None quand seul le changement de phase est signalé.
+    `timer` (ImportStageTimer) reçoit le temps passé par étape, repris dans
+    stats['stage_seconds'].
+    """
+    timer = timer or ImportStageTimer()
+    with timer.stage(IMPORT_STAGE_COLLECTION):
+        userCollection = get_default_collection_for_user(user)
+
+    if streaming:
+        with timer.stage(IMPORT_STAGE_TRACKS):
+            known_fingerprints = get_known_fingerprints() if incremental else {}
+            with _open_nml(file) as stream:
+                records = timer.timed(
+                    IMPORT_STAGE_PARSE, iter_collection_records(stream, known_fingerprints.keys(), parse_workers)
+                )
+                cptNewTracks, cptExistingTracks = import_collection_records(
+                    records, userCollection, known_fingerprints, stats, progress, timer
+                )
+        with timer.stage(IMPORT_STAGE_PLAYLISTS), _open_nml(file) as stream:
+            import_playlist_nodes(iter_playlist_nodes(stream), userCollection, progress)
+    else:
+        with timer.stage(IMPORT_STAGE_PARSE):
+            xmldoc = ET.parse(file).getroot()
+        entry_list = xmldoc.find('COLLECTION').findall('ENTRY')
+        with timer.stage(IMPORT_STAGE_TRACKS):
+            cptNewTracks, cptExistingTracks = import_collection_entries(
+                entry_list, userCollection, stats, incremental, progress, timer
+            )
+        with timer.stage(IMPORT_STAGE_PLAYLISTS):
+            import_playlist_from_xml_doc(xmldoc, userCollection, progress)
+
+    if stats is not None:
+        stats['stage_seconds'] = {stage: timer.seconds[stage] for stage in IMPORT_STAGES}
+    return cptNewTracks, cptExistingTracks
+
+
+@contextmanager
+def _open_nml(file):
+    """Ouvre un chemin, ou rembobine un fichier déjà ouvert (upload Django)."""
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as stream:
+            yield stream
+    else:
+        file.seek(0)
+        yield file
+
+
+def read_collection_entry_count(stream) -> Optional[int]:
+    """Nombre d'ENTRY annoncé par l'attribut ENTRIES de COLLECTION (lecture arrêtée aussitôt)."""
+    for _, elem in ET.iterparse(stream, events=('start',)):
+        if elem.tag == 'COLLECTION':
+            try:
+                return int(elem.get('ENTRIES', ''))
+            except ValueError:
+                return None
+    return None
+
+
+def iter_collection_entries(stream) -> Iterator[ET.Element]:
+    """ENTRY de la section COLLECTION, lues une à une (la lecture s'arrête à la
+    fin de COLLECTION: les playlists ont leur propre passe)."""
+    return _iter_streamed_elements(
+        stream,
+        lambda elem, parent: elem.tag == 'ENTRY' and parent.tag == 'COLLECTION',
+        stop_tag='COLLECTION',
+    )
+
 
-    xmldoc = xml.dom.minidom.parse(file)
-    collection = xmldoc.getElementsByTagName('COLLECTION')
-    entry_list = collection[0].getElementsByTagName('ENTRY')
-    userCollection = get_default_collection_for_user(user)
+def iter_playlist_nodes(stream) -> Iterator[ET.Element]:
+    """NODE TYPE=PLAYLIST de la section PLAYLISTS, lus un à un."""
+    return _iter_streamed_elements(
+        stream,
+        lambda elem, parent: elem.tag == 'NODE' and elem.get('TYPE') == 'PLAYLIST',
+        stop_tag='PLAYLISTS',
+    )
 
-    # Caches en mémoire: une requête par table au lieu de plusieurs par ENTRY
-    artists_by_name = {a.name: a for a in Artist.objects.all()}
-    genres_by_name = {g.name: g for g in Genre.objects.all()}
-    track_index = TrackImportIndex()
+
+def _iter_streamed_elements(
+    stream, is_wanted: Callable[[ET.Element, ET.Element], bool], stop_tag: str
+) -> Iterator[ET.Element]:
+    """Parcourt le fichier avec iterparse et produit les éléments voulus, complets.
+
+    Tout élément terminé est retiré de son parent (après avoir été produit s'il
+    est voulu): seul le sous-arbre en cours de lecture reste en mémoire.
+    """
+    stack = []
+    wanted_depth = None  # profondeur de l'élément voulu en cours de construction
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if wanted_depth is None and stack and is_wanted(elem, stack[-1]):
+                wanted_depth = len(stack)
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if wanted_depth is not None and len(stack) > wanted_depth:
+            continue  # descendant de l'élément voulu: gardé jusqu'à la fin de celui-ci
+        if wanted_depth == len(stack):
+            wanted_depth = None
+            yield elem
+        if elem.tag == stop_tag:
+            return
+        if stack:
+            stack[-1].remove(elem)
+
+
+def import_collection_entries(
+    entry_list: Iterable[ET.Element],
+    userCollection: Collection,
+    stats: Optional[dict] = None,
+    incremental: bool = True,
+    progress: Optional[ProgressCallback] = None,
+    timer: Optional[ImportStageTimer] = None,
+) -> Tuple[int, int]:
+    """Importe des ENTRY déjà parsées (lecture dans le processus courant).
+
+    Returns: (nouvelles tracks, tracks existantes modifiées ou non)
+    """
+    timer = timer or ImportStageTimer()
+    known_fingerprints = get_known_fingerprints() if incremental else {}
+    records = timer.timed(
+        IMPORT_STAGE_PARSE,
+        (parse_collection_entry(current_entry, known_fingerprints.keys()) for current_entry in entry_list),
+    )
+    return import_collection_records(records, userCollection, known_fingerprints, stats, progress, timer)
+
+
+def get_known_fingerprints() -> Dict[str, int]:
+    """Empreintes du dernier import -> id de la track."""
+    return dict(Track.objects.exclude(import_fingerprint__isnull=True).values_list('import_fingerprint', 'id'))
+
+
+def import_collection_records(
+    records: Iterable[Optional[dict]],
+    userCollection: Collection,
+    known_fingerprints: Dict[str, int],
+    stats: Optional[dict] = None,
+    progress: Optional[ProgressCallback] = None,
+    timer: Optional[ImportStageTimer] = None,
+) -> Tuple[int, int]:
+    """Etape d'écriture: applique à la base, dans l'ordre du fichier, les enregistrements
+    produits par parse_collection_entry (tracks et cue points), puis les rattache à la
+    collection. Les écritures sont groupées par lots (TrackBulkWriter). Une ENTRY dont
+    l'empreinte figure dans `known_fingerprints` est comptée comme inchangée et ignorée.
+
+    Returns: (nouvelles tracks, tracks existantes modifiées ou non)
+    """
+    timer = timer or ImportStageTimer()
+    # Caches en mémoire (une requête par table au lieu de plusieurs par ENTRY), chargés
+    # à la première ENTRY modifiée: un ré-import sans changement ne lit pas les tracks
+    artists_by_name = genres_by_name = track_index = writer = None
     imported_tracks = []
+    unchanged_track_ids = []
 
     cptNewTracks = 0
     cptExistingTracks = 0
+    cptUnchangedTracks = 0
     # Evite les doublons d'ENTRY pour le même morceau (first-wins)
     processed_keys: Set[str] = set()
-    for current_entry in entry_list:
+    for entry_number, record in enumerate(records, start=1):
+        if progress:
+            progress(IMPORT_PHASE_TRACKS, entry_number)
 
         # sample auto imported must be ignored
-        info = current_entry.getElementsByTagName('INFO')
-        if not info:
+        if record is None:
             continue
 
-        title = get_title_from_entry(current_entry)
-        audio_id = get_audio_id_from_entry(current_entry)
-        location = current_entry.getElementsByTagName('LOCATION')
-        file_name = location[0].attributes['FILE'].value
-        location_dir = location[0].attributes['VOLUME'].value + location[0].attributes['DIR'].value
-        file_path = location_dir + file_name
-
-        # Clé de dédoublonnage: priorité à AudioId, sinon chemin, sinon couple artist+title
-        artist_name_key = get_artist_name_from_entry(current_entry)
-        if audio_id:
-            dedup_key = f"audio:{audio_id}"
-        elif file_path:
-            dedup_key = f"path:{file_path.lower()}"
-        else:
-            dedup_key = f"tt:{artist_name_key.lower()}|{title.lower()}"
-        if dedup_key in processed_keys:
+        if record['dedup_key'] in processed_keys:
             # Duplicate ENTRY for same track → skip to preserve first values
             continue
-        processed_keys.add(dedup_key)
-
-        artist = get_artist_db_from_artist_name(artist_name_key, artists_by_name)
-        genreName = get_genre_from_info(info)
-        comment = get_comment_from_info(info)
-        comment2 = get_rating_from_info(info)
-        playcount = get_playcount_from_info(info)
-        lastPlayedDate = get_last_played_date_from_info(info)
-        musicalKey = get_musical_key_from_info(info)
-        bitrate = get_bit_rate_from_info(info)
-        playtime = get_playtime_from_info(info)
-        bpm = get_bpm_from_info(current_entry)
-        ranking = get_ranking_from_xml_info(info)
-        genre = get_genre_db_from_genre_name(genreName, genres_by_name)
+        processed_keys.add(record['dedup_key'])
+
+        unchanged_track_id = known_fingerprints.get(record['fingerprint'])
+        if unchanged_track_id is not None:
+            cptUnchangedTracks = cptUnchangedTracks + 1
+            unchanged_track_ids.append(unchanged_track_id)
+            continue
+
+        if track_index is None:
+            artists_by_name = {a.name: a for a in Artist.objects.all()}
+            genres_by_name = {g.name: g for g in Genre.objects.all()}
+            track_index = TrackImportIndex()
+            writer = TrackBulkWriter(track_index, progress=progress, timer=timer)
+
+        title = record['title']
+        audio_id = record['track']['audio_id']
+        artist = get_artist_db_from_artist_name(record['artist_name'], artists_by_name)
+        genre = get_genre_db_from_genre_name(record['genre_name'], genres_by_name)
 
         # Check if TRACK exists or insert it
         track = track_index.find(artist, title, audio_id)
@@ -168,73 +538,283 @@ def handle_uploaded_file(file, user):
         # update track infos
         track.artist = artist
         track.genre = genre
-        track.comment = comment
-        track.comment2 = comment2
-        track.ranking = ranking
-        track.playcount = playcount
-        track.date_last_played = lastPlayedDate
-
-        # Utilisation de la méthode normalize pour déterminer la clé musicale
-        # Priorité : champ KEY -> nom de fichier
-        determined_key = normalize_musical_key_notation(musicalKey) if musicalKey else extract_musical_key_from_filename(file_name)
-        track.musical_key = determined_key
-
-        track.bitrate = bitrate
-        track.playtime = playtime
-        track.bpm = bpm
-        track.audio_id = audio_id
-        track.file_name = file_name
-        track.location_dir = location_dir
-        track.file_path = file_path
-
-        track.save()
+        for field_name, value in record['track'].items():
+            setattr(track, field_name, value)
+
         track_index.register(track)
         imported_tracks.append(track)
+        writer.add(track, record['cue_points'])
+
+    if writer is None:
+        writer = TrackBulkWriter(track_index)  # aucune ENTRY modifiée: rien à écrire
+    writer.flush()
+    logger.info(
+        "Import: %d nouvelles, %d modifiées, %d inchangées — %d tracks écrites en %.2fs (%.0f lignes/s)",
+        cptNewTracks, cptExistingTracks, cptUnchangedTracks,
+        writer.rows_written, writer.write_seconds, writer.rows_per_second,
+    )
+    if stats is not None:
+        stats['nb_new'] = cptNewTracks
+        stats['nb_changed'] = cptExistingTracks
+        stats['nb_unchanged'] = cptUnchangedTracks
+        stats['tracks_written'] = writer.rows_written
+        stats['write_seconds'] = writer.write_seconds
+        stats['rows_per_second'] = writer.rows_per_second
+        stats['cue_points_created'] = writer.cue_points_written['created']
+        stats['cue_points_updated'] = writer.cue_points_written['updated']
+        stats['cue_points_deleted'] = writer.cue_points_written['deleted']
+
+    with timer.stage(IMPORT_STAGE_COLLECTION):
+        attach_tracks_to_collection(userCollection, [t.pk for t in imported_tracks] + unchanged_track_ids)
+
+    return cptNewTracks, cptExistingTracks + cptUnchangedTracks
+
+
+def parse_collection_entry(
+    current_entry: ET.Element, known_fingerprints: CollectionType[str] = ()
+) -> Optional[dict]:
+    """Etape de lecture: ENTRY -> enregistrement simple (str, nombres, dates, Decimal),
+    sans accès à la base, exécutable dans un autre processus.
+
+    None pour un sample auto-importé (ENTRY sans INFO). Si l'empreinte figure dans
+    `known_fingerprints`, seules `dedup_key` et `fingerprint` sont extraites: l'ENTRY
+    sera comptée inchangée. Sinon `track` contient les champs de Track à appliquer
+    (hors titre, artiste et genre, résolus à l'écriture).
+    """
+    info = current_entry.findall('INFO')
+    if not info:
+        return None
+
+    title = get_title_from_entry(current_entry)
+    audio_id = get_audio_id_from_entry(current_entry)
+    location = current_entry.findall('LOCATION')
+    file_name = location[0].attrib['FILE']
+    location_dir = location[0].attrib['VOLUME'] + location[0].attrib['DIR']
+    file_path = location_dir + file_name
+
+    # Clé de dédoublonnage: priorité à AudioId, sinon chemin, sinon couple artist+title
+    artist_name = get_artist_name_from_entry(current_entry)
+    if audio_id:
+        dedup_key = f"audio:{audio_id}"
+    elif file_path:
+        dedup_key = f"path:{file_path.lower()}"
+    else:
+        dedup_key = f"tt:{artist_name.lower()}|{title.lower()}"
+
+    fingerprint = get_entry_fingerprint(current_entry)
+    record = {'dedup_key': dedup_key, 'fingerprint': fingerprint}
+    if fingerprint in known_fingerprints:
+        return record
+
+    # Utilisation de la méthode normalize pour déterminer la clé musicale
+    # Priorité : champ KEY -> nom de fichier
+    musicalKey = get_musical_key_from_info(info)
+    determined_key = normalize_musical_key_notation(musicalKey) if musicalKey else extract_musical_key_from_filename(file_name)
+
+    record.update({
+        'title': title,
+        'artist_name': artist_name,
+        'genre_name': get_genre_from_info(info),
+        'track': {
+            'comment': get_comment_from_info(info),
+            'comment2': get_rating_from_info(info),
+            'ranking': get_ranking_from_xml_info(info),
+            'playcount': get_playcount_from_info(info),
+            'date_last_played': get_last_played_date_from_info(info),
+            'musical_key': determined_key,
+            'bitrate': get_bit_rate_from_info(info),
+            'playtime': get_playtime_from_info(info),
+            'bpm': get_bpm_from_info(current_entry),
+            'audio_id': audio_id,
+            'file_name': file_name,
+            'location_dir': location_dir,
+            'file_path': file_path,
+            'import_fingerprint': fingerprint,
+        },
+        'cue_points': extract_cue_points(current_entry),
+    })
+    return record
+
+
+def iter_collection_records(
+    stream,
+    known_fingerprints: CollectionType[str] = (),
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[Optional[dict]]:
+    """Etape de lecture: enregistrements (parse_collection_entry) des ENTRY du fichier,
+    dans l'ordre.
+
+    Avec un seul worker, les ENTRY sont lues une à une (iter_collection_entries).
+    Sinon la section COLLECTION est découpée sans être parsée en lots de `chunk_size`
+    ENTRY (iter_collection_entry_chunks), que les processus du pool parsent et
+    extraient: le processus courant ne fait que découper et écrire en base.
+    Les processus sont créés par fork (Django et les empreintes connues sont hérités
+    sans copie) et seulement s'il y a plus d'un lot; le nombre de lots en cours est
+    borné, la mémoire reste proportionnelle à workers x chunk_size.
+    """
+    workers = IMPORT_PARSE_WORKERS if workers is None else workers
+    if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        for current_entry in iter_collection_entries(stream):
+            yield parse_collection_entry(current_entry, known_fingerprints)
+        return
+
+    chunks = iter_collection_entry_chunks(stream, chunk_size or IMPORT_PARSE_CHUNK_SIZE)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return
+    second_chunk = next(chunks, None)
+    if second_chunk is None:
+        yield from parse_collection_chunk(first_chunk, known_fingerprints)
+        return
 
-        # Extract and save cue points
-        extract_and_save_cue_points(current_entry, track)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=_init_parse_worker,
+        initargs=(known_fingerprints,),
+    )
+    try:
+        in_flight = deque()
+        for chunk in chain((first_chunk, second_chunk), chunks):
+            in_flight.append(pool.submit(_parse_chunk_in_worker, chunk))
+            if len(in_flight) >= 2 * workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def iter_collection_entry_chunks(stream, chunk_size: int) -> Iterator[bytes]:
+    """Découpe la section COLLECTION en documents XML autonomes de `chunk_size` ENTRY
+    au plus (déclaration XML d'origine + <COLLECTION>...</COLLECTION>).
+
+    Le découpage se fait sur les octets (début de balise `<ENTRY`), sans parser: les
+    ENTRY de COLLECTION ne sont jamais imbriquées et `<` est échappé dans les attributs.
+    """
+    buf = bytearray()
+    while True:  # en-tête: jusqu'à la fin de la balise ouvrante COLLECTION
+        block = stream.read(NML_READ_BLOCK_SIZE)
+        buf += block
+        start = buf.find(b'<COLLECTION')
+        end = buf.find(b'>', start) if start >= 0 else -1
+        if end >= 0:
+            break
+        if not block:
+            return
+    if buf[end - 1:end] == b'/':
+        return  # <COLLECTION ENTRIES="0"/>
+    declaration = b''
+    if buf.startswith(b'<?xml'):
+        declaration = bytes(buf[:buf.find(b'?>') + 2])
+    del buf[:end + 1]
+
+    def as_document(raw):
+        return declaration + b'<COLLECTION>' + raw + b'</COLLECTION>'
+
+    entries_in_chunk = 0
+    scan = 0
+    while True:
+        next_entry = buf.find(b'<ENTRY', scan)
+        collection_end = buf.find(b'</COLLECTION>', scan, len(buf) if next_entry < 0 else next_entry)
+        if collection_end >= 0:
+            if entries_in_chunk:
+                yield as_document(bytes(buf[:collection_end]))
+            return
+        if next_entry < 0:
+            block = stream.read(NML_READ_BLOCK_SIZE)
+            if not block:
+                raise ET.ParseError('collection.nml tronqué: </COLLECTION> absent')
+            scan = max(len(buf) - len(b'</COLLECTION>'), scan)  # balise coupée entre deux blocs
+            buf += block
+            continue
+        if entries_in_chunk == chunk_size:
+            yield as_document(bytes(buf[:next_entry]))
+            del buf[:next_entry]
+            next_entry = 0
+            entries_in_chunk = 0
+        entries_in_chunk += 1
+        scan = next_entry + len(b'<ENTRY')
 
-    # Rattachement à la collection utilisateur en une seule passe (add est idempotent)
-    if imported_tracks:
-        userCollection.tracks.add(*imported_tracks)
 
-    import_playlist_from_xml_doc(xmldoc, userCollection)
+def parse_collection_chunk(document: bytes, known_fingerprints: CollectionType[str] = ()) -> List[Optional[dict]]:
+    """Enregistrements des ENTRY d'un lot produit par iter_collection_entry_chunks."""
+    return [
+        parse_collection_entry(current_entry, known_fingerprints)
+        for current_entry in ET.fromstring(document) if current_entry.tag == 'ENTRY'
+    ]
 
-    return cptNewTracks, cptExistingTracks
+
+# Empreintes connues, posées une fois par processus de lecture (initializer du pool)
+_worker_known_fingerprints: CollectionType[str] = ()
+
+
+def _init_parse_worker(known_fingerprints: CollectionType[str]) -> None:
+    global _worker_known_fingerprints
+    _worker_known_fingerprints = known_fingerprints
+
+
+def _parse_chunk_in_worker(document: bytes) -> List[Optional[dict]]:
+    return parse_collection_chunk(document, _worker_known_fingerprints)
+
+
+def attach_tracks_to_collection(collection: Collection, track_ids: Iterable[int]) -> int:
+    """Rattache les tracks à la collection: seuls les liens manquants sont insérés, par lots.
+
+    Returns: nombre de tracks ajoutées à la collection
+    """
+    already_attached = set(collection.tracks.values_list('id', flat=True))
+    missing = [track_id for track_id in dict.fromkeys(track_ids) if track_id not in already_attached]
+    for i in range(0, len(missing), IMPORT_BATCH_SIZE):
+        collection.tracks.add(*missing[i:i + IMPORT_BATCH_SIZE])
+    return len(missing)
+
+
+def get_entry_fingerprint(current_entry) -> str:
+    """Empreinte du contenu importé d'une ENTRY: ses attributs (dont MODIFIED_DATE)
+    et ceux de LOCATION, INFO, TEMPO et CUE_V2, dans l'ordre du fichier."""
+    digest = hashlib.sha1(f"v{IMPORT_FINGERPRINT_VERSION}".encode())
+    for elem in [current_entry, *(child for child in current_entry if child.tag in FINGERPRINT_TAGS)]:
+        digest.update(elem.tag.encode())
+        for name, value in sorted(elem.attrib.items()):
+            digest.update(f"\x1f{name}={value}".encode())
+        digest.update(b"\x1e")
+    return digest.hexdigest()
 
 
 def get_title_from_entry(current_entry):
-    return current_entry.attributes['TITLE'].value
+    return current_entry.attrib['TITLE']
 
 
 def get_audio_id_from_entry(current_entry):
-    if 'AUDIO_ID' in current_entry.attributes:
-        return current_entry.attributes['AUDIO_ID'].value
+    if 'AUDIO_ID' in current_entry.attrib:
+        return current_entry.attrib['AUDIO_ID']
     else:
         logger.warning('WARNING no audio_id tag for entry :  %s', get_title_from_entry(current_entry))
         return None
 
 
 def get_artist_name_from_entry(current_entry):
-    if 'ARTIST' in current_entry.attributes:
-        artistName = current_entry.attributes['ARTIST'].value
+    if 'ARTIST' in current_entry.attrib:
+        artistName = current_entry.attrib['ARTIST']
     else:
         artistName = UNKNOWN_ARTIST_NAME
     return artistName
 
 
 def get_bpm_from_info(current_entry):
-    tempo = current_entry.getElementsByTagName('TEMPO')
-    if len(tempo) > 0 and ('BPM' in tempo[0].attributes):
-        bpm = tempo[0].attributes['BPM'].value
+    tempo = current_entry.findall('TEMPO')
+    if len(tempo) > 0 and ('BPM' in tempo[0].attrib):
+        bpm = tempo[0].attrib['BPM']
     else:
         bpm = None
     return bpm
 
 
 def get_bit_rate_from_info(info):
-    if 'BITRATE' in info[0].attributes:
-        bitrate = info[0].attributes['BITRATE'].value
+    if 'BITRATE' in info[0].attrib:
+        bitrate = info[0].attrib['BITRATE']
     else:
         bitrate = 0
     return bitrate
@@ -243,17 +823,17 @@ def get_bit_rate_from_info(info):
 def get_playtime_from_info(info):
     """Durée en secondes: PLAYTIME_FLOAT prioritaire, sinon PLAYTIME (entier)."""
     for attr in ('PLAYTIME_FLOAT', 'PLAYTIME'):
-        if attr in info[0].attributes:
+        if attr in info[0].attrib:
             try:
-                return float(info[0].attributes[attr].value)
+                return float(info[0].attrib[attr])
             except (ValueError, TypeError):
                 continue
     return None
 
 
 def get_musical_key_from_info(info):
-    if 'KEY' in info[0].attributes:
-        musicalKey = info[0].attributes['KEY'].value
+    if 'KEY' in info[0].attrib:
+        musicalKey = info[0].attrib['KEY']
         if len(musicalKey) > MAX_MUSICAL_KEY_LENGTH:
             musicalKey = musicalKey[0:MAX_MUSICAL_KEY_LENGTH]
     else:
@@ -262,8 +842,8 @@ def get_musical_key_from_info(info):
 
 
 def get_last_played_date_from_info(info):
-    if 'LAST_PLAYED' in info[0].attributes:
-        lastPlayedDateStr = info[0].attributes['LAST_PLAYED'].value
+    if 'LAST_PLAYED' in info[0].attrib:
+        lastPlayedDateStr = info[0].attrib['LAST_PLAYED']
         lastPlayedDate = datetime.datetime.strptime(lastPlayedDateStr, '%Y/%m/%d')
         lastPlayedDate = lastPlayedDate.replace(tzinfo=pytz.UTC)
     else:
@@ -272,24 +852,24 @@ def get_last_played_date_from_info(info):
 
 
 def get_playcount_from_info(info):
-    if 'PLAYCOUNT' in info[0].attributes:
-        playcount = info[0].attributes['PLAYCOUNT'].value
+    if 'PLAYCOUNT' in info[0].attrib:
+        playcount = info[0].attrib['PLAYCOUNT']
     else:
         playcount = 0
     return playcount
 
 
 def get_rating_from_info(info):
-    if 'RATING' in info[0].attributes:
-        comment2 = info[0].attributes['RATING'].value
+    if 'RATING' in info[0].attrib:
+        comment2 = info[0].attrib['RATING']
     else:
         comment2 = ''
     return comment2
 
 
 def get_comment_from_info(info):
-    if 'COMMENT' in info[0].attributes:
-        comment = info[0].attributes['COMMENT'].value
+    if 'COMMENT' in info[0].attrib:
+        comment = info[0].attrib['COMMENT']
         if len(comment) > MAX_COMMENT_LENGTH:
             comment = comment[0:MAX_COMMENT_LENGTH]
     else:
@@ -298,8 +878,8 @@ def get_comment_from_info(info):
 
 
 def get_genre_from_info(info):
-    if 'GENRE' in info[0].attributes:
-        genreName = info[0].attributes['GENRE'].value
+    if 'GENRE' in info[0].attrib:
+        genreName = info[0].attrib['GENRE']
         if len(genreName) > MAX_GENRE_LENGTH:
             genreName = genreName[0:MAX_GENRE_LENGTH]
     else:
@@ -338,7 +918,20 @@ def upload_file(request):
         form = UploadCollectionForm(request.POST, request.FILES)
         if form.is_valid():
             current_user = request.user
-            cptNewTracks, cptExistingTracks = handle_uploaded_file(request.FILES['file'], current_user)
+            if form.cleaned_data['run_in_background']:
+                # Exécuté par `manage.py run_import_jobs`, la page suit l'avancement
+                job = ImportJob.objects.create(
+                    user=current_user,
+                    file=request.FILES['file'],
+                    full_import=form.cleaned_data['full_import'],
+                )
+                return redirect(f"{reverse('import_collection_view')}?job={job.pk}")
+            import_stats = {}
+            # Lecture dans le processus uWSGI (pas de fork d'un worker web)
+            cptNewTracks, cptExistingTracks = handle_uploaded_file(
+                request.FILES['file'], current_user, stats=import_stats,
+                incremental=not form.cleaned_data['full_import'], parse_workers=1,
+            )
             return render(
                 request,
                 'track/collection/import_collection.html',
@@ -346,12 +939,16 @@ def upload_file(request):
                     'form': form,
                     'nb_new_tracks': cptNewTracks,
                     'nb_existing_tracks': cptExistingTracks,
+                    'import_stats': import_stats,
                     'submitted': True,
                 },
             )
     else:
         form = UploadCollectionForm()
-    return render(request, 'track/collection/import_collection.html', {'form': form})
+    job = None
+    if request.GET.get('job', '').isdigit():
+        job = ImportJob.objects.filter(pk=request.GET['job'], user=request.user).first()
+    return render(request, 'track/collection/import_collection.html', {'form': form, 'job': job})
 
 
 def get_default_collection_for_user(currentUser):
@@ -368,9 +965,9 @@ def get_default_collection_for_user(currentUser):
 
 def get_ranking_from_xml_info(info) -> int:
     """convert ranking from traktor (0-255) to regular 1-5 star system"""
-    if 'RANKING' not in info[0].attributes:
+    if 'RANKING' not in info[0].attrib:
         return 0  # Retourner 0 au lieu de None
-    rankingTraktor = info[0].attributes['RANKING'].value
+    rankingTraktor = info[0].attrib['RANKING']
 
     # Convertir en entier pour comparaison
     try:
@@ -393,26 +990,26 @@ def get_ranking_from_xml_info(info) -> int:
     return ranking
 
 
-def extract_and_save_cue_points(current_entry, track):
+def extract_cue_points(current_entry) -> Optional[Dict[int, dict]]:
     """
-    Extract cue points from XML entry and save them as CuePoint(track, slot).
+    Extract cue points from XML entry as {slot: CuePoint fields}.
+    None si l'ENTRY n'a aucun CUE_V2 (les cue points existants sont alors conservés).
     - Map Traktor HOTCUE 0..7 → slot 1..8 (RCue1 = HOTCUE=0)
     - START et LEN sont TOUJOURS en millisecondes (Decimal), sans détection d’unité
     - Inclure TYPE=4 (grid) pour remplir RCue1 quand HOTCUE=0 est un grid
     - En cas de doublons sur le même HOTCUE, on garde le premier rencontré (first-wins)
-    - Les CuePoint existants sont mis à jour en place (ids stables entre imports)
     """
-    cue_points_list = current_entry.getElementsByTagName('CUE_V2')
+    cue_points_list = current_entry.findall('CUE_V2')
     if not cue_points_list:
-        return
+        return None
 
     seen_slots: Set[int] = set()
     new_cue_data: dict = {}
 
     for cue_xml in cue_points_list:
-        if not cue_xml.hasAttribute('HOTCUE'):
+        if 'HOTCUE' not in cue_xml.attrib:
             continue
-        hotcue_val = cue_xml.getAttribute('HOTCUE')
+        hotcue_val = cue_xml.attrib['HOTCUE']
         if not hotcue_val.isdigit():
             continue
         hotcue_index = int(hotcue_val)
@@ -424,12 +1021,12 @@ def extract_and_save_cue_points(current_entry, track):
             continue
         seen_slots.add(slot)
 
-        traktor_type = cue_xml.getAttribute('TYPE') if cue_xml.hasAttribute('TYPE') else ''
+        traktor_type = cue_xml.get('TYPE', '')
 
         # START (toujours millisecondes)
-        if not cue_xml.hasAttribute('START'):
+        if 'START' not in cue_xml.attrib:
             continue
-        start_raw = cue_xml.getAttribute('START')
+        start_raw = cue_xml.attrib['START']
         try:
             start_ms_dec = Decimal(start_raw)
             seconds_float = float(start_ms_dec / Decimal('1000'))
@@ -440,15 +1037,15 @@ def extract_and_save_cue_points(current_entry, track):
             continue
 
         # NAME
-        name = cue_xml.getAttribute('NAME') if cue_xml.hasAttribute('NAME') else ''
+        name = cue_xml.get('NAME', '')
 
         # LEN (toujours millisecondes)
         duration_seconds = None
         end_time_formatted = None
         len_ms_dec: Optional[Decimal] = None
-        if cue_xml.hasAttribute('LEN'):
+        if 'LEN' in cue_xml.attrib:
             try:
-                len_raw = cue_xml.getAttribute('LEN')
+                len_raw = cue_xml.attrib['LEN']
                 len_ms_dec = Decimal(len_raw)
                 len_seconds = float(len_ms_dec / Decimal('1000'))
                 if len_seconds > 0:
@@ -474,30 +1071,122 @@ def extract_and_save_cue_points(current_entry, track):
             'time_ms': start_ms_dec,
             'len_ms': len_ms_dec,
         }
+    return new_cue_data
+
+
+def sync_cue_points(cues_by_track: Iterable[Tuple[Track, Dict[int, dict]]]) -> Dict[str, int]:
+    """Applique les cue points extraits d'un lot de tracks sur leurs 8 slots.
 
-    # Appliquer sur les 8 slots: update en place, création ou suppression
-    existing_by_slot = {cp.slot: cp for cp in track.cue_points.all()}
-    for slot in range(1, 9):
-        existing = existing_by_slot.get(slot)
-        data = new_cue_data.get(slot)
-        if data:
-            if existing:
-                for field, value in data.items():
-                    setattr(existing, field, value)
-                existing.save()
-            else:
-                CuePoint.objects.create(track=track, slot=slot, **data)
-        elif existing:
-            existing.delete()
-
-
-def import_playlist_from_xml_doc(xmldoc: Element, user_collection: Collection) -> None:
-
-    playlists = xmldoc.getElementsByTagName('PLAYLISTS')
-    playlist_list = playlists[0].getElementsByTagName('NODE')
-
-    existing_playlist_count = 0
-    new_playlist_count = 0
+    Les CuePoint existants du lot sont lus en une requête; seuls les slots qui
+    diffèrent sont écrits (bulk_create / bulk_update / delete). Les CuePoint
+    existants sont mis à jour en place (ids stables entre imports): un import
+    sans changement n'écrit aucun cue point.
+
+    Returns: {'created': n, 'updated': n, 'deleted': n}
+    """
+    cues_by_track = list(cues_by_track)
+    existing_by_track: Dict[int, Dict[int, CuePoint]] = defaultdict(dict)
+    for cp in CuePoint.objects.filter(track_id__in=[track.pk for track, _ in cues_by_track]):
+        existing_by_track[cp.track_id][cp.slot] = cp
+
+    to_create = []
+    to_update = []
+    to_delete = []
+    now = timezone.now()
+    for track, new_cue_data in cues_by_track:
+        existing_by_slot = existing_by_track.get(track.pk, {})
+        for slot in range(1, 9):
+            existing = existing_by_slot.get(slot)
+            data = new_cue_data.get(slot)
+            if data:
+                if existing is None:
+                    to_create.append(CuePoint(track=track, slot=slot, **data))
+                elif any(getattr(existing, field) != value for field, value in data.items()):
+                    for field, value in data.items():
+                        setattr(existing, field, value)
+                    existing.updated_at = now
+                    to_update.append(existing)
+            elif existing:
+                to_delete.append(existing.pk)
+
+    if to_create:
+        CuePoint.objects.bulk_create(to_create, batch_size=IMPORT_BATCH_SIZE)
+    if to_update:
+        CuePoint.objects.bulk_update(
+            to_update, CUE_POINT_IMPORT_FIELDS + ('updated_at',), batch_size=IMPORT_BATCH_SIZE
+        )
+    for i in range(0, len(to_delete), IMPORT_BATCH_SIZE):
+        CuePoint.objects.filter(pk__in=to_delete[i:i + IMPORT_BATCH_SIZE]).delete()
+    return {'created': len(to_create), 'updated': len(to_update), 'deleted': len(to_delete)}
+
+
+class PlaylistImportIndex:
+    """
+    Playlists existantes par nom et leur contenu ordonné, chargés en deux requêtes
+    (l'import faisait une recherche par nom, un save() et une lecture du contenu
+    pour chaque NODE). Les créations et compléments sont écrits en bloc par save().
+    """
+
+    def __init__(self, user_collection: Collection):
+        self.user_collection = user_collection
+        self.by_name: Dict[str, Playlist] = {}
+        for playlist in Playlist.objects.order_by('pk'):
+            self.by_name.setdefault(playlist.name, playlist)
+        self.ordered_track_ids: Dict[int, list] = defaultdict(list)
+        for playlist_id, track_id in PlaylistTrack.objects.order_by('playlist_id', 'position').values_list(
+            'playlist_id', 'track_id'
+        ):
+            self.ordered_track_ids[playlist_id].append(track_id)
+        self.pending_new: list = []
+        self.pending_backfill: Dict[int, Playlist] = {}  # pk -> playlist
+        self.created_pks: Set[int] = set()
+
+    def get_or_create(self, name: str) -> Playlist:
+        playlist = self.by_name.get(name)
+        if playlist is None:
+            playlist = Playlist(name=name, rank=get_order_rank(name), collection=self.user_collection)
+            self.by_name[name] = playlist
+            self.pending_new.append(playlist)
+            return playlist
+        if playlist.pk is not None:
+            # Backfill collection / rank if missing
+            if getattr(playlist, 'collection_id', None) is None:
+                playlist.collection = self.user_collection
+                self.pending_backfill[playlist.pk] = playlist
+            if playlist.rank is None:
+                playlist.rank = get_order_rank(name)
+                self.pending_backfill[playlist.pk] = playlist
+        return playlist
+
+    def save(self) -> None:
+        Playlist.objects.bulk_create(self.pending_new, batch_size=IMPORT_BATCH_SIZE)
+        self.created_pks.update(playlist.pk for playlist in self.pending_new)
+        Playlist.objects.bulk_update(
+            list(self.pending_backfill.values()), ['collection', 'rank'], batch_size=IMPORT_BATCH_SIZE
+        )
+        self.pending_new = []
+        self.pending_backfill = {}
+
+
+def import_playlist_from_xml_doc(
+    xmldoc: ET.Element, user_collection: Collection, progress: Optional[ProgressCallback] = None
+) -> None:
+
+    playlist_list = xmldoc.find('PLAYLISTS').iter('NODE')
+    import_playlist_nodes(playlist_list, user_collection, progress)
+
+
+def import_playlist_nodes(
+    playlist_list: Iterable[ET.Element],
+    user_collection: Collection,
+    progress: Optional[ProgressCallback] = None,
+) -> None:
+    """Crée/met à jour les playlists à partir des NODE (les dossiers sont ignorés).
+
+    Les playlists existantes et leur contenu sont chargés une fois (PlaylistImportIndex);
+    créations et compléments (rank, collection) sont écrits en bloc à la fin, et seules
+    les playlists dont le contenu ou l'ordre a changé sont réécrites (par diff).
+    """
     track_found_count = 0
     track_not_found_count = 0
 
@@ -506,24 +1195,34 @@ def import_playlist_from_xml_doc(xmldoc: Element, user_collection: Collection) -
     for t in Track.objects.exclude(file_path__isnull=True).exclude(file_path=''):
         tracks_by_file_path.setdefault(t.file_path, t)
 
+    playlist_index = PlaylistImportIndex(user_collection)
+    # Contenu lu dans le fichier, par playlist (la dernière NODE d'un même nom l'emporte)
+    tracks_by_playlist: Dict[int, Tuple[Playlist, list]] = {}
+
+    if progress:
+        progress(IMPORT_PHASE_PLAYLISTS, 0)
+    playlist_number = 0
     for current_playlist in playlist_list:
 
         # NODE TYPE
-        node_type = current_playlist.attributes['TYPE'].value
+        node_type = current_playlist.attrib['TYPE']
         if node_type != 'PLAYLIST':
             continue
+        playlist_number = playlist_number + 1
+        if progress:
+            progress(IMPORT_PHASE_PLAYLISTS, playlist_number)
 
         # PLAYLIST NAME
-        name = current_playlist.attributes['NAME'].value
-        playlist = get_or_create_single_playlist_from_name(existing_playlist_count, new_playlist_count, name, user_collection)
+        name = current_playlist.attrib['NAME']
+        playlist = playlist_index.get_or_create(name)
 
         # PLAYLIST TRACKS
-        playlist_entry_list = current_playlist.getElementsByTagName('ENTRY')
+        playlist_entry_list = current_playlist.iter('ENTRY')
 
         found_tracks = []
         for current_entry in playlist_entry_list:
-            for key in current_entry.getElementsByTagName('PRIMARYKEY'):
-                file_path = key.attributes['KEY'].value
+            for key in current_entry.iter('PRIMARYKEY'):
+                file_path = key.attrib['KEY']
 
                 track = tracks_by_file_path.get(file_path)
                 if track is None:
@@ -533,30 +1232,26 @@ def import_playlist_from_xml_doc(xmldoc: Element, user_collection: Collection) -
 
                 track_found_count = track_found_count + 1
                 found_tracks.append(track)
-
+        tracks_by_playlist[id(playlist)] = (playlist, found_tracks)
+
+    playlist_index.save()
+
+    new_entries = []
+    changed_count = 0
+    for playlist, found_tracks in tracks_by_playlist.values():
+        new_ids = list(dict.fromkeys(t.id for t in found_tracks))
+        if playlist.pk in playlist_index.created_pks:
+            new_entries.extend(
+                PlaylistTrack(playlist=playlist, track_id=track_id, position=(i + 1) * PlaylistTrack.POSITION_GAP)
+                for i, track_id in enumerate(new_ids)
+            )
         # Ne réécrire que si le contenu ou l'ordre a changé
-        new_ids = [t.id for t in found_tracks]
-        if new_ids != playlist.get_ordered_track_ids():
+        elif new_ids != playlist_index.ordered_track_ids.get(playlist.pk, []):
             playlist.set_tracks(found_tracks)
-        playlist.save()
-
-
-def get_or_create_single_playlist_from_name(
-    existing_playlist_count: int, new_playlist_count: int, name: str, user_collection: Collection
-) -> Playlist:
-    existing_playlists = Playlist.objects.filter(name=name)
-    if len(existing_playlists) > 0:
-        playlist = existing_playlists[0]
-        # Backfill collection if missing
-        if getattr(playlist, 'collection_id', None) is None:
-            playlist.collection = user_collection
-        playlist.save()
-        existing_playlist_count = existing_playlist_count + 1
-    else:
-        playlist = Playlist()
-        playlist.name = name
-        playlist.rank = get_order_rank(name)
-        playlist.collection = user_collection
-        new_playlist_count = new_playlist_count + 1
-        playlist.save()
-    return playlist
+            changed_count = changed_count + 1
+    PlaylistTrack.objects.bulk_create(new_entries, batch_size=IMPORT_BATCH_SIZE)
+
+    logger.info(
+        "Playlists: %d lues, %d créées, %d modifiées — %d tracks trouvées, %d introuvables",
+        playlist_number, len(playlist_index.created_pks), changed_count, track_found_count, track_not_found_count,
+    )
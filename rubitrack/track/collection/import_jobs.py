@@ -0,0 +1,158 @@
+"""
+Imports de collection en tâche de fond: l'upload est stocké dans un ImportJob,
+`manage.py run_import_jobs` l'exécute, la page d'import interroge
+`import_job_progress` (entrées traitées, phase, ETA) jusqu'à la fin.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+
+from ..models import ImportJob
+from .import_collection import (
+    IMPORT_PHASE_PLAYLISTS,
+    handle_uploaded_file,
+    read_collection_entry_count,
+)
+
+logger = logging.getLogger(__name__)
+
+# Intervalle minimal entre deux écritures du fichier d'avancement
+PROGRESS_WRITE_INTERVAL_SECONDS = 1.0
+
+
+class ImportProgress:
+    """
+    Callback `progress(phase, processed)` de handle_uploaded_file: écrit
+    l'avancement dans le fichier progress_path du job (au plus une fois par
+    seconde, et à chaque changement de phase).
+    """
+
+    def __init__(self, job: ImportJob, entries_total: Optional[int]):
+        self.path = job.progress_path
+        self.entries_total = entries_total
+        self.entries_processed = 0
+        self.playlists_processed = 0
+        self.phase = None
+        self.started = time.monotonic()
+        self.last_write = 0.0
+
+    def __call__(self, phase: str, processed: Optional[int] = None) -> None:
+        phase_changed = phase != self.phase
+        self.phase = phase
+        if processed is not None:
+            if phase == IMPORT_PHASE_PLAYLISTS:
+                self.playlists_processed = processed
+            else:
+                self.entries_processed = processed
+        now = time.monotonic()
+        if phase_changed or now - self.last_write >= PROGRESS_WRITE_INTERVAL_SECONDS:
+            self.last_write = now
+            self.write()
+
+    def eta_seconds(self) -> Optional[float]:
+        """Temps restant estimé sur le débit d'ENTRY (inconnu pendant les playlists)."""
+        if self.phase == IMPORT_PHASE_PLAYLISTS or not self.entries_total or not self.entries_processed:
+            return None
+        elapsed = time.monotonic() - self.started
+        remaining = max(self.entries_total - self.entries_processed, 0)
+        return remaining * elapsed / self.entries_processed
+
+    def snapshot(self) -> dict:
+        return {
+            'phase': self.phase,
+            'entries_processed': self.entries_processed,
+            'entries_total': self.entries_total,
+            'playlists_processed': self.playlists_processed,
+            'eta_seconds': self.eta_seconds(),
+        }
+
+    def write(self) -> None:
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, self.path)  # le lecteur ne voit jamais un fichier à moitié écrit
+
+
+def read_job_progress(job: ImportJob) -> dict:
+    try:
+        with open(job.progress_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def claim_next_import_job() -> Optional[ImportJob]:
+    """Passe le plus ancien job en attente à 'running' et le retourne (None si aucun)."""
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ImportJob.STATUS_PENDING)
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ImportJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def run_import_job(job: ImportJob) -> ImportJob:
+    """Exécute l'import d'un job réclamé; le statut final et les stats sont enregistrés."""
+    stats = {}
+    try:
+        # Dans le try: un upload qui n'est pas du XML doit aussi terminer le job en échec
+        with open(job.file.path, 'rb') as stream:
+            entries_total = read_collection_entry_count(stream)
+        progress = ImportProgress(job, entries_total)
+        cptNewTracks, cptExistingTracks = handle_uploaded_file(
+            job.file.path, job.user, stats=stats, incremental=not job.full_import, progress=progress
+        )
+    except Exception as e:
+        logger.exception('Import job #%s en échec', job.pk)
+        job.status = ImportJob.STATUS_FAILED
+        job.error = str(e)
+    else:
+        stats['nb_new_tracks'] = cptNewTracks
+        stats['nb_existing_tracks'] = cptExistingTracks
+        job.status = ImportJob.STATUS_DONE
+        job.stats = stats
+    job.finished_at = timezone.now()
+    job.save()
+
+    if os.path.exists(job.progress_path):
+        os.unlink(job.progress_path)
+    if job.status == ImportJob.STATUS_DONE:
+        job.file.delete()  # l'upload en échec est gardé pour analyse
+    return job
+
+
+@login_required
+def import_job_progress(request, job_id):
+    """Etat d'un import en tâche de fond (JSON), interrogé par la page d'import."""
+    job = ImportJob.objects.filter(pk=job_id, user=request.user).first()
+    if job is None:
+        raise Http404('Import job not found')
+
+    data = {
+        'status': job.status,
+        'phase': None,
+        'entries_processed': 0,
+        'entries_total': None,
+        'playlists_processed': 0,
+        'eta_seconds': None,
+        'stats': job.stats,
+        'error': job.error,
+    }
+    if job.status == ImportJob.STATUS_RUNNING:
+        data.update(read_job_progress(job))
+    return JsonResponse(data)
@@ -0,0 +1,127 @@
+"""
+Benchmark de la synchronisation Rekordbox (manage.py benchmark_rekordbox_sync):
+une base Rubitrack est peuplée par l'import d'une collection.nml synthétique, puis
+un export Rekordbox synthétique reprenant ses tracks est synchronisé dans chaque
+mode. Temps total, requêtes SQL, pic de RSS et temps par étape (SYNC_STAGE_*).
+
+Chaque taille tourne dans une transaction annulée à la fin, et les correspondances
+persistées sont effacées avant chaque mode: chaque mesure est une première sync.
+"""
+
+import os
+import re
+import resource
+import tempfile
+import time
+from typing import Dict, Optional
+
+from django.contrib.auth.models import User
+
+from ...models import RekordboxTrackMatch, Track
+from ..import_benchmark import rolled_back
+from ..import_collection import ImportStageTimer, handle_uploaded_file
+from ..synthetic_collection import write_synthetic_collection
+from .synchronize_rekordbox_collection import SYNC_STAGES, RekordboxCollectionSynchronizer
+from .synthetic_rekordbox import write_synthetic_rekordbox
+
+BENCHMARK_SIZES = (5000, 20000, 50000)
+# Modes mesurés pour chaque taille
+STAGE_OVERWRITE = 'overwrite'  # overwrite, sans export des playlists
+STAGE_ADD_ONLY = 'add_only'  # add_only, sans export des playlists
+STAGE_PLAYLISTS = 'playlists'  # overwrite avec export des playlists
+BENCHMARK_RUNS = (
+    (STAGE_OVERWRITE, 'overwrite', False),
+    (STAGE_ADD_ONLY, 'add_only', False),
+    (STAGE_PLAYLISTS, 'overwrite', True),
+)
+
+
+def _reset_peak_rss() -> None:
+    """Remet à zéro le pic de RSS du processus (Linux: VmHWM, /proc/self/clear_refs).
+    Sans /proc, le pic mesuré est celui de toute la vie du processus."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open('/proc/self/status') as f:
+            match = re.search(r'^VmHWM:\s+(\d+) kB', f.read(), re.MULTILINE)
+        if match:
+            return round(int(match.group(1)) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def benchmark_sync_file(path: str, output_path: str, streaming: bool = True) -> dict:
+    """Synchronise `path` vers `output_path` dans chaque mode de BENCHMARK_RUNS.
+
+    Returns: {mode: {'seconds', 'queries', 'peak_rss_mb', 'matched', 'phases': {étape: secondes}}}
+    """
+    results: Dict[str, dict] = {}
+    for stage, mode, export_playlists in BENCHMARK_RUNS:
+        RekordboxTrackMatch.objects.all().delete()
+        timer = ImportStageTimer()
+        _reset_peak_rss()
+        start = time.perf_counter()
+        with timer.count_queries():
+            stats = RekordboxCollectionSynchronizer().synchronize_rekordbox_collection(
+                path, output_path, mode=mode, export_playlists=export_playlists, streaming=streaming, timer=timer,
+            )
+        seconds = time.perf_counter() - start
+        results[stage] = {
+            'seconds': round(seconds, 3),
+            'queries': sum(timer.queries.values()),
+            'peak_rss_mb': _peak_rss_mb(),
+            'matched': stats.get('tracks_found_and_matched', 0),
+            'phases': {name: round(timer.seconds[name], 3) for name in SYNC_STAGES},
+        }
+    return results
+
+
+def run_sync_benchmark(
+    sizes=BENCHMARK_SIZES,
+    streaming: bool = True,
+    cues_per_track: int = 4,
+    rubitrack_playlists: int = 200,
+    tracks_per_playlist: int = 40,
+    seed: int = 0,
+    parse_workers: Optional[int] = None,
+    **rekordbox_options,
+) -> Dict[str, dict]:
+    """Pour chaque taille: peuple Rubitrack (collection.nml synthétique de `size`
+    ENTRY), génère l'export Rekordbox correspondant et le mesure (benchmark_sync_file).
+
+    `rekordbox_options` est transmis à write_synthetic_rekordbox.
+    Returns: {taille (str, pour le JSON): {mode: mesures}}
+    """
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            nml_path = os.path.join(tmp_dir, f'collection_{size}.nml')
+            xml_path = os.path.join(tmp_dir, f'rekordbox_{size}.xml')
+            with rolled_back():
+                with open(nml_path, 'w', encoding='utf-8') as out:
+                    write_synthetic_collection(
+                        out, size, cues_per_track=cues_per_track, playlists=rubitrack_playlists,
+                        tracks_per_playlist=tracks_per_playlist, seed=seed,
+                    )
+                user = User.objects.create_user(username='benchmark_rekordbox_sync')
+                handle_uploaded_file(nml_path, user, parse_workers=parse_workers)
+                os.unlink(nml_path)
+
+                tracks = list(Track.objects.select_related('artist').order_by('id'))
+                with open(xml_path, 'w', encoding='utf-8') as out:
+                    write_synthetic_rekordbox(out, tracks, seed=seed, **rekordbox_options)
+                del tracks
+
+                report[str(size)] = benchmark_sync_file(
+                    xml_path, os.path.join(tmp_dir, 'output.xml'), streaming=streaming
+                )
+            os.unlink(xml_path)
+    return report
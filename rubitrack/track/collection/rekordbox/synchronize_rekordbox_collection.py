@@ -3,18 +3,27 @@ Module simple pour synchroniser les cue points entre Rubitrack et Rekordbox
 Se concentre uniquement sur le remplacement des cue points, sans toucher aux autres données
 """
 
+import bisect
+import hashlib
 import logging
+import multiprocessing
+import os
 import re
+import tempfile
 import unicodedata
 import xml.etree.ElementTree as ET
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
-from typing import Dict, Iterable, Optional, Union
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 from urllib.parse import unquote, urlparse
 from xml.dom import minidom
+from xml.sax.saxutils import quoteattr
 
 from rapidfuzz import fuzz, process as fuzz_process
 
-from ...models import Playlist, Track
+from ...models import Config, Playlist, PlaylistTrack, RekordboxPlaylistExport, RekordboxTrackMatch, Track
+from ..import_collection import ImportStageTimer
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +37,148 @@ DURATION_MISMATCH_TOLERANCE_SECONDS = 5
 # Les suggestions ne sont JAMAIS appliquées au XML: elles sont à confirmer à la main.
 FUZZY_MATCH_MIN_SCORE = 85
 FUZZY_MATCH_CANDIDATES = 3
+# Requêtes scorées par appel process.cdist (matrice lot x choix en float32)
+FUZZY_MATCH_BATCH_SIZE = 128
+
+# Etapes mesurées par ImportStageTimer (temps exclusif; en streaming, lecture,
+# traitement et écriture alternent TRACK par TRACK)
+SYNC_STAGE_LOAD = 'load'  # lecture du XML Rekordbox
+SYNC_STAGE_LOOKUP = 'lookup'  # tracks Rubitrack et index de matching
+SYNC_STAGE_PROCESS = 'process'  # matching, mise à jour des TRACK, suggestions approximatives
+SYNC_STAGE_PLAYLISTS = 'playlists'
+SYNC_STAGE_SAVE = 'save'  # écriture du XML et des correspondances persistées
+SYNC_STAGES = (SYNC_STAGE_LOAD, SYNC_STAGE_LOOKUP, SYNC_STAGE_PROCESS, SYNC_STAGE_PLAYLISTS, SYNC_STAGE_SAVE)
+
+# Playlists exportées dans le dossier 'Rubitrack'
+PLAYLIST_EXPORT_ALL = 'all'
+PLAYLIST_EXPORT_FAVOURITES = 'favourites'  # Config.default_playlist_favourites
+PLAYLIST_EXPORT_CHANGED = 'changed'  # modifiées depuis la dernière sync réussie (RekordboxPlaylistExport)
+PLAYLIST_EXPORT_FILTERS = (PLAYLIST_EXPORT_ALL, PLAYLIST_EXPORT_FAVOURITES, PLAYLIST_EXPORT_CHANGED)
+
+# Processus de traitement d'une synchronisation multi-cible (un fichier par
+# processus, au plus un par fichier). 1 = fichiers traités l'un après l'autre.
+SYNC_TARGET_WORKERS = os.cpu_count() or 1
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XML_INDENT = '  '
+
+
+class CuePositionIndex:
+    """
+    Index des POSITION_MARK d'un TRACK pour les contrôles du mode add_only,
+    construit en un seul parcours des marqueurs:
+    - pads de hot cue occupés (Type 0 ou 4 avec Num >= 0), en bitset
+    - positions Start des marqueurs non-RCue, triées: la recherche d'un
+      marqueur proche est une recherche dichotomique
+    Tenu à jour avec add() à chaque cue ajouté.
+    """
+
+    def __init__(self, track_element: ET.Element) -> None:
+        self.hot_cues = 0
+        self.starts: List[Decimal] = []
+        for position_mark in track_element.findall('POSITION_MARK'):
+            self.add(position_mark, keep_sorted=False)
+        self.starts.sort()
+
+    def add(self, position_mark: ET.Element, keep_sorted: bool = True) -> None:
+        if position_mark.get('Type') in ('0', '4'):
+            try:
+                num = int(position_mark.get('Num', ''))
+            except ValueError:
+                num = -1
+            if num >= 0:
+                self.hot_cues |= 1 << num
+        # Nos propres marqueurs RCue ne bloquent pas l'ajout en add_only
+        if (position_mark.get('Name', '') or '').startswith('RCue'):
+            return
+        try:
+            start = Decimal(position_mark.get('Start') or '')
+        except InvalidOperation:
+            return
+        if keep_sorted:
+            bisect.insort(self.starts, start)
+        else:
+            self.starts.append(start)
+
+    def hot_cue_exists(self, num: int) -> bool:
+        """True si le pad `num` est déjà occupé (hot cue, ou loop à laquelle un Num a été attribué)."""
+        return num >= 0 and bool(self.hot_cues >> num & 1)
+
+    def has_cue_near(self, start_seconds: float, diff_ms: int) -> bool:
+        """True si un marqueur non-RCue existe à +/- diff_ms autour de start_seconds."""
+        try:
+            delta = Decimal(str(diff_ms)) / Decimal('1000')
+            target = Decimal(str(start_seconds))
+        except (InvalidOperation, ValueError):
+            return False
+        i = bisect.bisect_left(self.starts, target - delta)
+        return i < len(self.starts) and self.starts[i] <= target + delta
+
+
+class RekordboxSyncData:
+    """
+    Données Rubitrack d'une synchronisation, lues une seule fois en base: tracks
+    synchronisables (artiste, genre et cue points chargés), index de matching,
+    correspondances persistées et, pour l'export des playlists, leur contenu.
+
+    Une synchronisation multi-cible les partage entre tous ses fichiers: les
+    processus de traitement en héritent par fork et n'accèdent pas à la base.
+    """
+
+    def __init__(self, synchronizer: 'RekordboxCollectionSynchronizer', targets: Sequence[str]) -> None:
+        self.tracks: List[Track] = list(synchronizer._get_rubitrack_tracks())
+        self.lookup = synchronizer._build_rubitrack_lookup(self.tracks)
+        # Correspondances des syncs précédentes de chaque cible, vers les tracks synchronisables
+        tracks_by_id = {track.id: track for track in self.tracks}
+        self.match_lookups: Dict[str, dict] = {target: {} for target in targets}
+        for target, rekordbox_track_id, signature, sync_fingerprint, track_id in RekordboxTrackMatch.objects.filter(
+            target__in=targets
+        ).values_list('target', 'rekordbox_track_id', 'signature', 'sync_fingerprint', 'track_id').iterator():
+            if track_id in tracks_by_id:
+                self.match_lookups[target][f"rekordbox|{rekordbox_track_id}"] = {
+                    'track': tracks_by_id[track_id],
+                    'signature': signature,
+                    'sync_fingerprint': sync_fingerprint,
+                }
+        # Chargés par load_playlists()
+        self.playlists: Optional[List[Tuple[int, str]]] = None
+        self.playlist_entries: List[Tuple[int, int]] = []
+        self.previous_playlist_fingerprints: Dict[str, Dict[int, str]] = {}
+
+    def lookup_for(self, target: str) -> dict:
+        """Index de matching d'une cible: tracks Rubitrack et correspondances persistées de la cible."""
+        lookup = dict(self.lookup)
+        lookup.update(self.match_lookups.get(target, {}))
+        return lookup
+
+    def load_playlists(self, playlist_filter: str, targets: Sequence[str]) -> None:
+        """Playlists à exporter (ordre rank, -id) et leur contenu, lu en une requête
+        ordonnée; pour PLAYLIST_EXPORT_CHANGED, empreintes du dernier export de chaque cible."""
+        playlists = Playlist.objects.order_by('rank', '-id')
+        entries = PlaylistTrack.objects.order_by('playlist_id', 'position')
+        if playlist_filter == PLAYLIST_EXPORT_FAVOURITES:
+            favourite_ids = self._favourite_playlist_ids()
+            playlists = playlists.filter(pk__in=favourite_ids)
+            entries = entries.filter(playlist_id__in=favourite_ids)
+        self.playlists = list(playlists.values_list('id', 'name'))
+        self.playlist_entries = list(entries.values_list('playlist_id', 'track_id'))
+        if playlist_filter == PLAYLIST_EXPORT_CHANGED:
+            self.previous_playlist_fingerprints = {target: {} for target in targets}
+            for target, playlist_id, fingerprint in RekordboxPlaylistExport.objects.filter(
+                target__in=targets
+            ).values_list('target', 'playlist_id', 'fingerprint'):
+                self.previous_playlist_fingerprints[target][playlist_id] = fingerprint
+
+    @staticmethod
+    def _favourite_playlist_ids() -> List[int]:
+        """IDs de Config.default_playlist_favourites ('634;611;...'), valeurs invalides ignorées."""
+        ids = []
+        for part in Config.get_config().default_playlist_favourites.split(';'):
+            try:
+                ids.append(int(part))
+            except ValueError:
+                continue
+        return ids
 
 
 class RekordboxCollectionSynchronizer:
@@ -38,6 +189,21 @@ class RekordboxCollectionSynchronizer:
     def __init__(self) -> None:
         self.tree: Optional[ET.ElementTree] = None
         self.root: Optional[ET.Element] = None
+        self._start(delta=False, playlist_filter=PLAYLIST_EXPORT_ALL, target='', timer=None)
+
+    def _start(self, delta: bool, playlist_filter: str, target: str, timer: Optional[ImportStageTimer],
+               data: Optional[RekordboxSyncData] = None) -> None:
+        """Etat d'une synchronisation (voir synchronize_rekordbox_collection)."""
+        # Sync delta: les TRACK dont les données Rubitrack n'ont pas changé ne sont pas réécrits
+        self.delta = delta
+        self.playlist_filter = playlist_filter
+        self.target = target
+        self.timer = timer or ImportStageTimer()
+        # Données partagées d'une sync multi-cible; sinon chargées après validation du fichier
+        self.data = data
+        # Correspondances et playlists exportées, persistées si la sync réussit (_save_sync_state)
+        self.match_rows: List[RekordboxTrackMatch] = []
+        self.playlist_export_rows: List[RekordboxPlaylistExport] = []
 
     def load_rekordbox_file(self, file_path: str) -> bool:
         """
@@ -166,9 +332,9 @@ class RekordboxCollectionSynchronizer:
         num_value: int,
         end_seconds: Optional[float] = None,
         force_loop: bool = False,
-    ) -> None:
+    ) -> ET.Element:
         """
-        Ajoute un cue point à une track Rekordbox.
+        Ajoute un cue point à une track Rekordbox et retourne le POSITION_MARK créé.
         - Si end_seconds est fourni et > start OU force_loop=True: export en loop (Type 4) avec couleurs orange.
           Si un num_value (0..2) est fourni, on positionne aussi Num pour créer une "loop hot cue" (supporté par Rekordbox).
         - Sinon: export en hot cue (Type 0) avec Num et couleurs vertes.
@@ -199,6 +365,7 @@ class RekordboxCollectionSynchronizer:
             position_mark.set('Green', '235')
             position_mark.set('Blue', '80')
             logger.debug("Add HOT POSITION_MARK: start=%s num=%s", start_value, str(num_value))
+        return position_mark
 
     def remove_system_generated_cue_points(self, track_element: ET.Element) -> None:
         """
@@ -220,55 +387,17 @@ class RekordboxCollectionSynchronizer:
                 track_element.remove(pm)
                 logger.debug(f"Supprimé cue point système legacy: {name}")
 
-    def _hot_cue_exists(self, track_element: ET.Element, num: int) -> bool:
-        """
-        Vérifie si un slot de hot cue (Type 0 ou Type 4 avec Num) est déjà occupé.
-        Prend en compte les boucles (Type 4) auxquelles un Num a été attribué.
-
-        Args:
-            track_element: Élément TRACK
-            num: Numéro du slot (0, 1, 2 pour les hot cues)
-
-        Returns:
-            bool: True si le slot est occupé, False sinon
-        """
-        for pm in track_element.findall('POSITION_MARK'):
-            t = pm.get('Type')
-            if t in ('0', '4') and pm.get('Num') == str(num):
-                return True
-        return False
-
-    def _has_existing_cue_near_start(self, track_element: ET.Element, start_seconds: float, diff_ms: int) -> bool:
-        """Retourne True si un POSITION_MARK non-RCue existe à +/- diff_ms autour de start_seconds.
-        Les marqueurs nommés 'RCue*' ne bloquent pas l'ajout en add_only.
-        """
-        try:
-            delta = Decimal(str(diff_ms)) / Decimal('1000')
-            target = Decimal(str(start_seconds))
-        except (InvalidOperation, ValueError):
-            return False
-        for pm in track_element.findall('POSITION_MARK'):
-            # Ignorer nos propres marqueurs RCue
-            name_attr = pm.get('Name', '') or ''
-            if name_attr.startswith('RCue'):
-                continue
-            s = pm.get('Start')
-            if not s:
-                continue
-            try:
-                s_dec = Decimal(str(s))
-            except (InvalidOperation, ValueError):
-                continue
-            if (target - s_dec).copy_abs() <= delta:
-                return True
-        return False
-
     def synchronize_rekordbox_collection(
         self,
         input_file: str,
         output_file: Optional[str] = None,
         mode: str = 'overwrite',
         export_playlists: bool = True,
+        streaming: bool = True,
+        delta: bool = False,
+        timer: Optional[ImportStageTimer] = None,
+        playlist_filter: str = PLAYLIST_EXPORT_ALL,
+        target: str = '',
     ) -> dict:
         """
         Synchronise Rubitrack vers Rekordbox: cue points, beatgrid (ancre TEMPO),
@@ -284,15 +413,34 @@ class RekordboxCollectionSynchronizer:
             output_file (str, optional): Fichier de sortie (si None, remplace l'original)
             mode (str, optional): Mode de synchronisation ('overwrite' ou 'add_only')
             export_playlists (bool, optional): Exporte les playlists Rubitrack dans le XML
+            streaming (bool, optional): Lecture/écriture au fil de l'eau (voir
+                _synchronize_streaming); False charge tout le fichier en mémoire
+            delta (bool, optional): Ne réécrit que les TRACK dont les données Rubitrack
+                (cues, bpm, clé, note, commentaire...) ont changé depuis la dernière sync;
+                les autres sont recopiés tels quels et comptés dans tracks_unchanged_skipped
+            timer (ImportStageTimer, optional): Temps (et requêtes) par étape SYNC_STAGE_*
+            playlist_filter (str, optional): Playlists exportées (PLAYLIST_EXPORT_*): toutes,
+                les favorites de la config, ou celles modifiées depuis la dernière sync
+            target (str, optional): Export Rekordbox synchronisé (une machine): les
+                correspondances et playlists exportées persistées sont propres à chaque cible
 
         Returns:
             dict: Statistiques de l'opération
         """
         if output_file is None:
             output_file = input_file
+        self._start(delta, playlist_filter, target, timer)
+        if streaming:
+            stats = self._synchronize_streaming(input_file, output_file, mode, export_playlists)
+            if stats['success']:
+                with self.timer.stage(SYNC_STAGE_SAVE):
+                    self._save_sync_state(self.match_rows, self.playlist_export_rows)
+            return stats
 
         # Chargement du fichier Rekordbox
-        if not self.load_rekordbox_file(input_file):
+        with self.timer.stage(SYNC_STAGE_LOAD):
+            loaded = self.load_rekordbox_file(input_file)
+        if not loaded:
             return {
                 'success': False,
                 'error': 'Impossible de charger le fichier Rekordbox'
@@ -310,17 +458,23 @@ class RekordboxCollectionSynchronizer:
         if collection is not None:
             stats['total_tracks_in_rekordbox_file'] = len(collection.findall('TRACK'))
 
-        rubitrack_tracks = self._get_rubitrack_tracks()
-        stats['rubitrack_tracks_processed'] = rubitrack_tracks.count()
-        logger.info(f"Traitement de {stats['rubitrack_tracks_processed']} tracks Rubitrack avec cue points")
+        with self.timer.stage(SYNC_STAGE_LOOKUP):
+            rubitrack_tracks, rubitrack_lookup = self._load_sync_data(stats)
 
-        rubitrack_lookup = self._build_rubitrack_lookup(rubitrack_tracks)
-        matched_track_keys = self._process_tracks(rubitrack_tracks, collection, stats, mode, rubitrack_lookup)
+        with self.timer.stage(SYNC_STAGE_PROCESS):
+            matched_track_keys = self._process_tracks(
+                rubitrack_tracks, collection, stats, mode, rubitrack_lookup, self.match_rows
+            )
 
         if export_playlists:
-            self._export_playlists(matched_track_keys, stats)
-
-        if self.save_rekordbox_file(output_file):
+            with self.timer.stage(SYNC_STAGE_PLAYLISTS):
+                self._export_playlists(matched_track_keys, stats)
+
+        with self.timer.stage(SYNC_STAGE_SAVE):
+            saved = self.save_rekordbox_file(output_file)
+            if saved:
+                self._save_sync_state(self.match_rows, self.playlist_export_rows)
+        if saved:
             logger.info(
                 f"Synchronisation terminée: {stats['tracks_updated_with_cue_points']} tracks mises à jour, "
                 f"{stats['total_cue_points_added']} cue points ajoutés"
@@ -331,11 +485,202 @@ class RekordboxCollectionSynchronizer:
 
         return stats
 
+    def synchronize_targets(
+        self,
+        targets: Sequence[Tuple[str, str, str]],
+        mode: str = 'overwrite',
+        export_playlists: bool = True,
+        delta: bool = False,
+        playlist_filter: str = PLAYLIST_EXPORT_ALL,
+        workers: Optional[int] = None,
+        timer: Optional[ImportStageTimer] = None,
+    ) -> Dict[str, dict]:
+        """
+        Synchronise en une passe plusieurs exports Rekordbox (une machine chacun).
+
+        Les données Rubitrack (tracks, cue points, index de matching, correspondances
+        persistées de chaque cible, contenu des playlists) sont lues une seule fois
+        (RekordboxSyncData). Chaque fichier est ensuite traité en streaming par un
+        processus (SYNC_TARGET_WORKERS par défaut, au plus un par fichier) créé par
+        fork: les processus héritent des données sans copie et n'écrivent pas en base.
+        Les correspondances et playlists exportées des cibles réussies sont persistées
+        à la fin, dans le processus courant.
+
+        Args:
+            targets: [(cible, fichier d'entrée, fichier de sortie)], noms de cible uniques
+            mode, export_playlists, delta, playlist_filter: comme synchronize_rekordbox_collection
+            workers (int, optional): Processus de traitement (1: fichiers traités l'un après l'autre)
+            timer (ImportStageTimer, optional): Temps (et requêtes) par étape SYNC_STAGE_*
+
+        Returns:
+            {cible: statistiques de synchronize_rekordbox_collection}
+        """
+        names = [name for name, _, _ in targets]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Noms de cible en double: {names}")
+        self._start(delta, playlist_filter, '', timer)
+        with self.timer.stage(SYNC_STAGE_LOOKUP):
+            data = RekordboxSyncData(self, names)
+        if export_playlists:
+            with self.timer.stage(SYNC_STAGE_PLAYLISTS):
+                data.load_playlists(playlist_filter, names)
+
+        jobs = [
+            (name, input_file, output_file, mode, export_playlists, delta, playlist_filter)
+            for name, input_file, output_file in targets
+        ]
+        workers = min(SYNC_TARGET_WORKERS if workers is None else workers, len(jobs))
+        with self.timer.stage(SYNC_STAGE_PROCESS):
+            if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+                results = [_synchronize_target(data, job) for job in jobs]
+            else:
+                pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('fork'),
+                    initializer=_init_target_worker,
+                    initargs=(data,),
+                )
+                try:
+                    results = list(pool.map(_synchronize_target_in_worker, jobs))
+                finally:
+                    pool.shutdown(cancel_futures=True)
+
+        report: Dict[str, dict] = {}
+        with self.timer.stage(SYNC_STAGE_SAVE):
+            for name, (stats, match_rows, playlist_export_rows) in zip(names, results):
+                if stats['success']:
+                    self._save_sync_state(match_rows, playlist_export_rows)
+                report[name] = stats
+        return report
+
+    def _synchronize_streaming(self, input_file: str, output_file: str, mode: str, export_playlists: bool) -> dict:
+        """Synchronisation sans charger le fichier entier: les TRACK de COLLECTION
+        sont lus un par un (iterparse), mis à jour puis écrits aussitôt dans la
+        sortie et libérés. Seul le sous-arbre PLAYLISTS est gardé en mémoire,
+        pour y ajouter le dossier 'Rubitrack' en fin de fichier.
+
+        La sortie est écrite dans un fichier temporaire du même dossier puis
+        renommée: output_file peut être input_file, et un fichier illisible ou
+        tronqué ne laisse pas de sortie partielle.
+
+        N'écrit pas en base: les correspondances et playlists exportées restent dans
+        self.match_rows / self.playlist_export_rows (voir _save_sync_state)."""
+        try:
+            source = open(input_file, 'rb')
+        except OSError as e:
+            logger.error(f"Erreur chargement fichier: {e}")
+            return {'success': False, 'error': 'Impossible de charger le fichier Rekordbox'}
+
+        temp_path = None
+        try:
+            with source:
+                fd, temp_path = tempfile.mkstemp(suffix='.xml', dir=os.path.dirname(os.path.abspath(output_file)))
+                with os.fdopen(fd, 'w', encoding='utf-8') as out:
+                    stats = self._stream_collection(source, out, mode, export_playlists, self.match_rows)
+            if stats['success']:
+                os.replace(temp_path, output_file)
+                temp_path = None
+                logger.info(
+                    f"Synchronisation terminée: {stats['tracks_updated_with_cue_points']} tracks mises à jour, "
+                    f"{stats['total_cue_points_added']} cue points ajoutés"
+                )
+            return stats
+        except ET.ParseError as e:
+            logger.error(f"Erreur chargement fichier: {e}")
+            return {'success': False, 'error': 'Impossible de charger le fichier Rekordbox'}
+        except OSError as e:
+            logger.error(f"Erreur sauvegarde: {e}")
+            return {'success': False, 'error': 'Erreur lors de la sauvegarde'}
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def _stream_collection(self, source, out, mode: str, export_playlists: bool, match_rows: list) -> dict:
+        """Parcourt `source` et écrit le XML synchronisé dans `out` (voir _synchronize_streaming).
+
+        Les éléments de premier niveau autres que COLLECTION et PLAYLISTS (PRODUCT)
+        sont recopiés tels quels; PLAYLISTS est écrit en dernier."""
+        stats = None
+        collection = None
+        depth = 0
+        for event, element in self.timer.timed(SYNC_STAGE_LOAD, ET.iterparse(source, events=('start', 'end'))):
+            if event == 'start':
+                depth += 1
+                if depth == 1:
+                    # Validation: un export Rekordbox a pour racine DJ_PLAYLISTS
+                    if element.tag != 'DJ_PLAYLISTS':
+                        return {
+                            'success': False,
+                            'error': f"Fichier XML invalide: racine '{element.tag}' au lieu de DJ_PLAYLISTS (pas un export Rekordbox)"
+                        }
+                    self.root = element
+                    stats = self._initialize_stats()
+                    with self.timer.stage(SYNC_STAGE_LOOKUP):
+                        rubitrack_tracks, rubitrack_lookup = self._load_sync_data(stats)
+                    matched_track_keys: Dict[int, str] = {}
+                    pending_suggestions: list = []
+                    out.write(XML_DECLARATION)
+                    out.write(self._start_tag(element) + '\n')
+                elif depth == 2 and element.tag == 'COLLECTION' and collection is None:
+                    collection = element
+                    out.write(XML_INDENT + self._start_tag(element) + '\n')
+                continue
+
+            depth -= 1
+            if depth == 2 and collection is not None:
+                # Enfant complet de COLLECTION: traité, écrit puis libéré
+                if element.tag == 'TRACK':
+                    stats['total_tracks_in_rekordbox_file'] += 1
+                    with self.timer.stage(SYNC_STAGE_PROCESS):
+                        self._process_track(
+                            element, stats, mode, rubitrack_lookup, matched_track_keys, pending_suggestions, match_rows
+                        )
+                with self.timer.stage(SYNC_STAGE_SAVE):
+                    self._write_element(out, element, 2)
+                collection.remove(element)
+            elif depth == 1:
+                if element is collection:
+                    out.write(f"{XML_INDENT}</{element.tag}>\n")
+                    self.root.remove(element)
+                    collection = None
+                elif element.tag != 'PLAYLISTS':
+                    self._write_element(out, element, 1)
+                    self.root.remove(element)
+            elif depth == 0:
+                with self.timer.stage(SYNC_STAGE_PROCESS):
+                    self._add_fuzzy_suggestions(pending_suggestions, rubitrack_tracks, stats)
+                # Seul PLAYLISTS reste sous la racine
+                if export_playlists:
+                    with self.timer.stage(SYNC_STAGE_PLAYLISTS):
+                        self._export_playlists(matched_track_keys, stats)
+                with self.timer.stage(SYNC_STAGE_SAVE):
+                    for child in self.root:
+                        self._write_element(out, child, 1)
+                    out.write(f"</{self.root.tag}>\n")
+        return stats
+
+    @staticmethod
+    def _start_tag(element: ET.Element) -> str:
+        attributes = ''.join(f' {name}={quoteattr(value)}' for name, value in element.attrib.items())
+        return f'<{element.tag}{attributes}>'
+
+    @staticmethod
+    def _write_element(out, element: ET.Element, level: int) -> None:
+        """Ecrit un élément complet, indenté comme save_rekordbox_file."""
+        element.tail = None
+        ET.indent(element, space=XML_INDENT, level=level)
+        out.write(XML_INDENT * level + ET.tostring(element, encoding='unicode') + '\n')
+
     def _export_playlists(self, matched_track_keys: Dict[int, str], stats: dict) -> None:
         """Exporte les playlists Rubitrack dans le nœud PLAYLISTS du XML, sous un
         dossier 'Rubitrack' (recréé à chaque sync: idempotent, ne touche pas aux
         autres playlists Rekordbox). Seules les tracks matchées sont référencées
-        (TRACK Key = TrackID, KeyType 0)."""
+        (TRACK Key = TrackID, KeyType 0).
+
+        Le contenu des playlists est lu en une requête ordonnée
+        (RekordboxSyncData.load_playlists) puis regroupé en mémoire. Selon self.playlist_filter, le dossier ne contient
+        que les favorites ou que les playlists dont le contenu exporté a changé
+        depuis la dernière sync réussie."""
         playlists_node = self.root.find('PLAYLISTS')
         if playlists_node is None:
             playlists_node = ET.SubElement(self.root, 'PLAYLISTS')
@@ -352,24 +697,36 @@ class RekordboxCollectionSynchronizer:
             if child.get('Name') == 'Rubitrack' and child.get('Type') == '0':
                 root_node.remove(child)
 
+        if self.data.playlists is None:
+            self.data.load_playlists(self.playlist_filter, [self.target])
+        previous = self.data.previous_playlist_fingerprints.get(self.target, {})
+        keys_by_playlist: Dict[int, List[str]] = defaultdict(list)
+        for playlist_id, track_id in self.data.playlist_entries:
+            key = matched_track_keys.get(track_id)
+            if key is not None:
+                keys_by_playlist[playlist_id].append(key)
+
         folder = ET.SubElement(root_node, 'NODE', {'Name': 'Rubitrack', 'Type': '0', 'Count': '0'})
         exported = 0
-        for playlist in Playlist.objects.order_by('rank', '-id'):
-            keys = [
-                matched_track_keys[track_id]
-                for track_id in playlist.get_ordered_track_ids()
-                if track_id in matched_track_keys
-            ]
+        for playlist_id, name in self.data.playlists:
+            keys = keys_by_playlist.get(playlist_id)
             if not keys:
                 continue
+            fingerprint = self._playlist_fingerprint(name, keys)
+            if previous.get(playlist_id) == fingerprint:
+                stats['playlists_unchanged_skipped'] += 1
+                continue
             playlist_node = ET.SubElement(folder, 'NODE', {
-                'Name': playlist.name,
+                'Name': name,
                 'Type': '1',
                 'KeyType': '0',
                 'Entries': str(len(keys)),
             })
             for key in keys:
                 ET.SubElement(playlist_node, 'TRACK', {'Key': key})
+            self.playlist_export_rows.append(
+                RekordboxPlaylistExport(target=self.target, playlist_id=playlist_id, fingerprint=fingerprint)
+            )
             exported += 1
             stats['playlist_entries_exported'] += len(keys)
 
@@ -379,26 +736,45 @@ class RekordboxCollectionSynchronizer:
         if exported:
             logger.info("Playlists exportées vers Rekordbox: %s", exported)
 
+    @staticmethod
+    def _playlist_fingerprint(name: str, keys: List[str]) -> str:
+        """Empreinte du NODE exporté (nom et TrackID dans l'ordre)."""
+        return hashlib.sha1('\x1f'.join([name, *keys]).encode('utf-8')).hexdigest()
+
     def _initialize_stats(self) -> dict:
         return {
             'success': True,
             'total_tracks_in_rekordbox_file': 0,
             'rubitrack_tracks_processed': 0,
             'tracks_found_and_matched': 0,
+            'tracks_matched_via_map': 0,
+            'tracks_unchanged_skipped': 0,
             'tracks_updated_with_cue_points': 0,
             'total_cue_points_added': 0,
             'beatgrids_written': 0,
             'metadata_fields_filled': 0,
             'playlists_exported': 0,
+            'playlists_unchanged_skipped': 0,
             'playlist_entries_exported': 0,
             'fuzzy_candidates_found': 0,
-            'unmatched_rekordbox_tracks': []
+            'unmatched_rekordbox_tracks': [],
+            # Sync delta seulement: TRACK réécrits (données Rubitrack modifiées ou nouveau match)
+            'changed_rekordbox_tracks': [],
         }
 
+    def _load_sync_data(self, stats: dict) -> Tuple[List[Track], dict]:
+        """Tracks Rubitrack et index de matching de la cible (données partagées d'une
+        sync multi-cible, ou lues en base pour cette seule cible)."""
+        if self.data is None:
+            self.data = RekordboxSyncData(self, [self.target])
+        stats['rubitrack_tracks_processed'] = len(self.data.tracks)
+        logger.info(f"Traitement de {stats['rubitrack_tracks_processed']} tracks Rubitrack avec cue points")
+        return self.data.tracks, self.data.lookup_for(self.target)
+
     def _get_rubitrack_tracks(self) -> Iterable[Track]:
         return Track.objects.filter(
             cue_points__isnull=False
-        ).distinct().select_related('artist').prefetch_related('cue_points')
+        ).distinct().select_related('artist', 'genre').prefetch_related('cue_points')
 
     def _build_rubitrack_lookup(self, rubitrack_tracks: Iterable[Track]) -> Dict[str, Dict[str, Union[str, Track]]]:
         lookup: Dict[str, Dict[str, Union[str, Track]]] = {}
@@ -447,92 +823,204 @@ class RekordboxCollectionSynchronizer:
             choices.setdefault(f"{artist_name} {title}".lower().strip(), track)
         return choices
 
-    def _find_fuzzy_suggestion(self, rb_artist: str, rb_title: str,
-                               rekordbox_track, fuzzy_choices: Dict[str, Track]):
-        """Cherche un candidat approximatif (suggestion pour le rapport, jamais
-        appliqué). Retourne (track, score) ou None. Les candidats dont la durée
-        diverge sont écartés (même garde-fou que le matching exact)."""
-        if not fuzzy_choices:
-            return None
-        query = f"{rb_artist} {rb_title}".strip()
-        if not query:
-            return None
-        results = fuzz_process.extract(
-            query,
-            fuzzy_choices.keys(),
-            scorer=fuzz.token_sort_ratio,
-            score_cutoff=FUZZY_MATCH_MIN_SCORE,
-            limit=FUZZY_MATCH_CANDIDATES,
-        )
-        for choice, score, _ in results:
-            candidate = fuzzy_choices[choice]
-            if not self._duration_mismatch(candidate, rekordbox_track):
-                return candidate, round(score)
-        return None
-
-    def _process_tracks(self, rubitrack_tracks, collection, stats, mode, rubitrack_lookup):
-        # rubitrack track id -> TrackID Rekordbox, pour l'export des playlists
-        matched_track_keys: Dict[int, str] = {}
+    def _add_fuzzy_suggestions(self, pending_suggestions, rubitrack_tracks, stats) -> None:
+        """Renseigne suggested_match/match_score des tracks non trouvées (suggestion
+        pour le rapport, jamais appliquée). Les candidats dont la durée diverge
+        sont écartés (même garde-fou que le matching exact)."""
+        pending_suggestions = [pending for pending in pending_suggestions if pending[1]]
+        if not pending_suggestions:
+            return
         fuzzy_choices = self._build_fuzzy_choices(rubitrack_tracks)
-        for rekordbox_track in collection.findall('TRACK'):
-            # Dans un XML Rekordbox, la localisation est l'attribut Location
-            # du TRACK (URI file://localhost/...), pas un élément enfant
-            rb_path = self._normalize_rekordbox_location(rekordbox_track.get('Location', ''))
-            # Skip Rekordbox sampler content
-            if '/rekordbox/sampler/' in rb_path:
-                # do not count as unmatched or processed
-                continue
-            rb_artist = self._normalize_text(rekordbox_track.get('Artist', '')).lower()
-            rb_title = self._normalize_text(rekordbox_track.get('Name', '')).lower()
-            key = f"{rb_artist}|{rb_title}"
-            unmatched_reason = 'no_match'
-            item = rubitrack_lookup.get(key)
-            if item and self._duration_mismatch(item['track'], rekordbox_track):
+        if not fuzzy_choices:
+            return
+        choice_keys = list(fuzzy_choices)
+        ranked = self._rank_fuzzy_candidates([query for _, query, _ in pending_suggestions], choice_keys)
+        for (entry, _, rekordbox_attributes), candidates in zip(pending_suggestions, ranked):
+            for index, score in candidates:
+                candidate = fuzzy_choices[choice_keys[index]]
+                if self._duration_mismatch(candidate, rekordbox_attributes):
+                    continue
+                artist_name = candidate.artist.name if candidate.artist else ''
+                entry['suggested_match'] = f"{artist_name} - {candidate.title}".strip(' -')
+                entry['match_score'] = round(score)
+                stats['fuzzy_candidates_found'] += 1
                 logger.info(
-                    "Match titre/artiste rejeté (durées divergentes): '%s' (%ss vs %ss)",
-                    rekordbox_track.get('Name', ''),
-                    rekordbox_track.get('TotalTime'),
-                    item['track'].playtime,
+                    "Suggestion approximative: '%s - %s' ~ '%s' (score %s)",
+                    entry['artist'], entry['title'], entry['suggested_match'], entry['match_score'],
                 )
-                item = None
-                unmatched_reason = 'duration_mismatch'
-            if not item and rb_path:
-                # Fallback: match par chemin de fichier (preuve forte, pas de garde-fou durée)
-                item = rubitrack_lookup.get(f"path|{rb_path}")
-            if item:
-                stats['tracks_found_and_matched'] += 1
-                track_id_attr = rekordbox_track.get('TrackID')
-                if track_id_attr:
-                    matched_track_keys[item['track'].id] = track_id_attr
-                try:
-                    self._update_track(rekordbox_track, item['track'], mode, stats)
-                except Exception as e:
-                    logger.error(f"Erreur lors du traitement de {item['track'].title}: {e}")
-            else:
-                entry = {
-                    'title': rekordbox_track.get('Name', '').strip(),
-                    'artist': rekordbox_track.get('Artist', '').strip(),
-                    'location': rekordbox_track.get('Location', ''),
-                    'reason': unmatched_reason,
-                    'suggested_match': '',
-                    'match_score': '',
-                }
-                suggestion = self._find_fuzzy_suggestion(
-                    rb_artist, rb_title, rekordbox_track, fuzzy_choices
+                break
+
+    def _rank_fuzzy_candidates(self, queries: List[str], choice_keys: List[str]) -> List[List[Tuple[int, float]]]:
+        """Pour chaque requête, [(indice dans choice_keys, score)] des
+        FUZZY_MATCH_CANDIDATES meilleurs choix au-dessus de FUZZY_MATCH_MIN_SCORE,
+        dans l'ordre de process.extract (score décroissant, puis indice)."""
+        ranked: List[List[Tuple[int, float]]] = []
+        try:
+            # Chemin rapide: process.cdist multi-thread, par lots de requêtes
+            for start in range(0, len(queries), FUZZY_MATCH_BATCH_SIZE):
+                matrix = fuzz_process.cdist(
+                    queries[start:start + FUZZY_MATCH_BATCH_SIZE], choice_keys,
+                    scorer=fuzz.token_sort_ratio, score_cutoff=FUZZY_MATCH_MIN_SCORE, workers=-1,
                 )
-                if suggestion:
-                    candidate, score = suggestion
-                    artist_name = candidate.artist.name if candidate.artist else ''
-                    entry['suggested_match'] = f"{artist_name} - {candidate.title}".strip(' -')
-                    entry['match_score'] = score
-                    stats['fuzzy_candidates_found'] += 1
-                    logger.info(
-                        "Suggestion approximative: '%s - %s' ~ '%s' (score %s)",
-                        entry['artist'], entry['title'], entry['suggested_match'], score,
+                for row in matrix:
+                    # Scores sous le seuil ramenés à 0 par score_cutoff
+                    hits = sorted(row.nonzero()[0], key=lambda j: (-row[j], j))[:FUZZY_MATCH_CANDIDATES]
+                    ranked.append([(int(j), float(row[j])) for j in hits])
+        except ImportError:
+            # numpy absent: repli une requête à la fois (plus lent mais fonctionnel)
+            logger.warning("numpy absent, suggestions approximatives en mode dégradé (plus lent)")
+            ranked = [
+                [
+                    (index, score) for _, score, index in fuzz_process.extract(
+                        query, choice_keys, scorer=fuzz.token_sort_ratio,
+                        score_cutoff=FUZZY_MATCH_MIN_SCORE, limit=FUZZY_MATCH_CANDIDATES,
                     )
-                stats['unmatched_rekordbox_tracks'].append(entry)
+                ]
+                for query in queries
+            ]
+        return ranked
+
+    def _process_tracks(self, rubitrack_tracks, collection, stats, mode, rubitrack_lookup, match_rows):
+        # rubitrack track id -> TrackID Rekordbox, pour l'export des playlists
+        matched_track_keys: Dict[int, str] = {}
+        pending_suggestions: list = []
+        for rekordbox_track in collection.findall('TRACK'):
+            self._process_track(
+                rekordbox_track, stats, mode, rubitrack_lookup, matched_track_keys, pending_suggestions, match_rows
+            )
+        self._add_fuzzy_suggestions(pending_suggestions, rubitrack_tracks, stats)
         return matched_track_keys
 
+    def _process_track(self, rekordbox_track, stats, mode, rubitrack_lookup, matched_track_keys,
+                       pending_suggestions, match_rows):
+        """Matche un TRACK Rekordbox et le met à jour, ou l'ajoute au rapport
+        des tracks non trouvées. La recherche de suggestion approximative est
+        différée: (entrée du rapport, requête, attributs du TRACK) est ajouté à
+        pending_suggestions, traité en un lot par _add_fuzzy_suggestions.
+        Chaque match est ajouté à match_rows (correspondances à persister).
+
+        Ordre de matching: correspondance persistée d'une sync précédente si le
+        TRACK est inchangé, puis artiste/titre normalisés, puis chemin de fichier."""
+        # Dans un XML Rekordbox, la localisation est l'attribut Location
+        # du TRACK (URI file://localhost/...), pas un élément enfant
+        rb_path = self._normalize_rekordbox_location(rekordbox_track.get('Location', ''))
+        # Skip Rekordbox sampler content
+        if '/rekordbox/sampler/' in rb_path:
+            # do not count as unmatched or processed
+            return
+        track_id_attr = rekordbox_track.get('TrackID')
+        signature = self._rekordbox_signature(rekordbox_track)
+        item = rubitrack_lookup.get(f"rekordbox|{track_id_attr}") if track_id_attr else None
+        if item and item['signature'] == signature:
+            stats['tracks_matched_via_map'] += 1
+            self._apply_match(rekordbox_track, item, stats, mode, matched_track_keys, match_rows, signature)
+            return
+        rb_artist = self._normalize_text(rekordbox_track.get('Artist', '')).lower()
+        rb_title = self._normalize_text(rekordbox_track.get('Name', '')).lower()
+        key = f"{rb_artist}|{rb_title}"
+        unmatched_reason = 'no_match'
+        item = rubitrack_lookup.get(key)
+        if item and self._duration_mismatch(item['track'], rekordbox_track):
+            logger.info(
+                "Match titre/artiste rejeté (durées divergentes): '%s' (%ss vs %ss)",
+                rekordbox_track.get('Name', ''),
+                rekordbox_track.get('TotalTime'),
+                item['track'].playtime,
+            )
+            item = None
+            unmatched_reason = 'duration_mismatch'
+        if not item and rb_path:
+            # Fallback: match par chemin de fichier (preuve forte, pas de garde-fou durée)
+            item = rubitrack_lookup.get(f"path|{rb_path}")
+        if item:
+            self._apply_match(rekordbox_track, item, stats, mode, matched_track_keys, match_rows, signature)
+        else:
+            entry = {
+                'title': rekordbox_track.get('Name', '').strip(),
+                'artist': rekordbox_track.get('Artist', '').strip(),
+                'location': rekordbox_track.get('Location', ''),
+                'reason': unmatched_reason,
+                'suggested_match': '',
+                'match_score': '',
+            }
+            stats['unmatched_rekordbox_tracks'].append(entry)
+            pending_suggestions.append((entry, f"{rb_artist} {rb_title}".strip(), rekordbox_track.attrib))
+
+    def _apply_match(self, rekordbox_track, item, stats, mode, matched_track_keys, match_rows, signature):
+        stats['tracks_found_and_matched'] += 1
+        track_id_attr = rekordbox_track.get('TrackID')
+        sync_fingerprint = self._sync_fingerprint(item['track'], mode)
+        match_row = None
+        if track_id_attr:
+            matched_track_keys[item['track'].id] = track_id_attr
+            match_row = RekordboxTrackMatch(
+                target=self.target,
+                rekordbox_track_id=track_id_attr,
+                location=rekordbox_track.get('Location', ''),
+                signature=signature,
+                sync_fingerprint=sync_fingerprint,
+                track_id=item['track'].id,
+            )
+            match_rows.append(match_row)
+        if self.delta:
+            # Seuls les matchs persistés portent l'empreinte de la sync précédente
+            if item.get('sync_fingerprint') == sync_fingerprint:
+                stats['tracks_unchanged_skipped'] += 1
+                return
+            stats['changed_rekordbox_tracks'].append({
+                'track_id': track_id_attr or '',
+                'title': rekordbox_track.get('Name', '').strip(),
+                'artist': rekordbox_track.get('Artist', '').strip(),
+                'location': rekordbox_track.get('Location', ''),
+            })
+        try:
+            self._update_track(rekordbox_track, item['track'], mode, stats)
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement de {item['track'].title}: {e}")
+            if match_row is not None:
+                # TRACK pas (ou pas entièrement) écrit: la sync delta suivante doit le réécrire
+                match_row.sync_fingerprint = ''
+
+    @staticmethod
+    def _rekordbox_signature(rekordbox_track) -> str:
+        """Empreinte des attributs qui identifient un TRACK (un changement
+        invalide la correspondance persistée)."""
+        identity = '\x1f'.join(rekordbox_track.get(attr, '') for attr in ('Location', 'Artist', 'Name'))
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _sync_fingerprint(rubitrack_track, mode: str) -> str:
+        """Empreinte de tout ce que _update_track écrit dans le TRACK: un TRACK
+        dont l'empreinte est inchangée n'a pas besoin d'être réécrit (sync delta)."""
+        cue_points = sorted(
+            (cp.slot, str(cp.time), str(cp.time_ms), str(cp.len_ms), str(cp.duration), str(cp.traktor_type))
+            for cp in rubitrack_track.cue_points.all()
+        )
+        payload = repr((
+            mode, cue_points, str(rubitrack_track.bpm), rubitrack_track.musical_key, rubitrack_track.ranking,
+            rubitrack_track.comment, rubitrack_track.playcount, rubitrack_track.genre_id,
+        ))
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _save_sync_state(match_rows: List[RekordboxTrackMatch], playlist_export_rows: List[RekordboxPlaylistExport]) -> None:
+        """Persiste les correspondances (remplace celles des mêmes TrackID de la cible)
+        et le contenu des playlists exportées d'une sync réussie."""
+        RekordboxTrackMatch.objects.bulk_create(
+            match_rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['target', 'rekordbox_track_id'],
+            update_fields=['location', 'signature', 'sync_fingerprint', 'track', 'updated_at'],
+        )
+        RekordboxPlaylistExport.objects.bulk_create(
+            playlist_export_rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['target', 'playlist'],
+            update_fields=['fingerprint', 'exported_at'],
+        )
+
     def _sync_beatgrid(self, rekordbox_track, rubitrack_track, cue_points_by_slot, mode, stats):
         """Écrit l'ancre de beatgrid Rekordbox (TEMPO Inizio/Bpm) depuis le cue
         grid Traktor (traktor_type=4) et le BPM de la track.
@@ -599,6 +1087,8 @@ class RekordboxCollectionSynchronizer:
         cue_points_by_slot = {cp.slot: cp for cp in rubitrack_track.cue_points.all()}
         self._sync_beatgrid(rekordbox_track, rubitrack_track, cue_points_by_slot, mode, stats)
         self._fill_missing_metadata(rekordbox_track, rubitrack_track, stats)
+        # Marqueurs restants (manuels) indexés une fois pour les contrôles add_only
+        cue_index = CuePositionIndex(rekordbox_track) if mode == 'add_only' else None
         cue_points_added = 0
         # Ne PAS compacter: respecter les indices d'origine 1..8
         for i in range(1, 9):
@@ -633,10 +1123,10 @@ class RekordboxCollectionSynchronizer:
 
             if mode == 'add_only':
                 # Si un pad 0..2 est déjà occupé (Type 0 ou 4 avec Num), ne pas toucher: ne rien ajouter pour cet index
-                if base_num_value in (0, 1, 2) and self._hot_cue_exists(rekordbox_track, base_num_value):
+                if base_num_value in (0, 1, 2) and cue_index.hot_cue_exists(base_num_value):
                     continue
                 # Ne pas créer de doublon si un marqueur existe déjà très proche de la position
-                if self._has_existing_cue_near_start(rekordbox_track, time_seconds_float, CUE_POINT_IDENTICAL_START_TIME_DIFF_MS):
+                if cue_index.has_cue_near(time_seconds_float, CUE_POINT_IDENTICAL_START_TIME_DIFF_MS):
                     continue
             # Calcul d'une éventuelle loop via LEN/duration
             end_seconds_dec: Optional[Decimal] = None
@@ -662,7 +1152,7 @@ class RekordboxCollectionSynchronizer:
             if i > 3 and is_type4:
                 force_loop = True
 
-            self.add_cue_point_to_track(
+            position_mark = self.add_cue_point_to_track(
                 rekordbox_track,
                 time_seconds_float,
                 name,
@@ -670,6 +1160,8 @@ class RekordboxCollectionSynchronizer:
                 float(end_seconds_dec) if end_seconds_dec is not None else None,
                 force_loop=force_loop,
             )
+            if cue_index is not None:
+                cue_index.add(position_mark)
             cue_points_added += 1
         if cue_points_added > 0:
             stats['tracks_updated_with_cue_points'] += 1
@@ -704,11 +1196,76 @@ class RekordboxCollectionSynchronizer:
             return 0.0
 
 
+# Données partagées d'une sync multi-cible, dans un processus de traitement (fork)
+_target_worker_data: Optional[RekordboxSyncData] = None
+
+
+def _init_target_worker(data: RekordboxSyncData) -> None:
+    global _target_worker_data
+    _target_worker_data = data
+
+
+def _synchronize_target(data: RekordboxSyncData, job: tuple) -> Tuple[dict, list, list]:
+    """Synchronise une cible d'une sync multi-cible, sans accès à la base.
+
+    Returns: (statistiques, correspondances, playlists exportées) à persister si la sync a réussi
+    """
+    target, input_file, output_file, mode, export_playlists, delta, playlist_filter = job
+    synchronizer = RekordboxCollectionSynchronizer()
+    synchronizer._start(delta, playlist_filter, target, None, data)
+    stats = synchronizer._synchronize_streaming(input_file, output_file, mode, export_playlists)
+    return stats, synchronizer.match_rows, synchronizer.playlist_export_rows
+
+
+def _synchronize_target_in_worker(job: tuple) -> Tuple[dict, list, list]:
+    return _synchronize_target(_target_worker_data, job)
+
+
+def rekordbox_target_name(file_name: str) -> str:
+    """Nom de cible d'un export Rekordbox d'après son nom de fichier
+    ('laptop_a.xml' -> 'laptop_a'): les correspondances persistées d'une machine
+    sont retrouvées tant que son export garde le même nom."""
+    return os.path.splitext(os.path.basename(file_name))[0][:100]
+
+
+def synchronize_rekordbox_targets(
+    targets: Sequence[Tuple[str, str, str]],
+    mode: str = 'overwrite',
+    export_playlists: bool = True,
+    delta: bool = False,
+    playlist_filter: str = PLAYLIST_EXPORT_ALL,
+    workers: Optional[int] = None,
+) -> Dict[str, dict]:
+    """
+    Fonction utilitaire pour synchroniser plusieurs exports Rekordbox en une passe
+    (voir RekordboxCollectionSynchronizer.synchronize_targets)
+
+    Args:
+        targets: [(cible, fichier d'entrée, fichier de sortie)]
+
+    Returns:
+        {cible: statistiques}
+
+    Usage:
+        stats_by_target = synchronize_rekordbox_targets([
+            ('laptop_a', '/path/to/laptop_a.xml', '/path/to/laptop_a_synced.xml'),
+            ('usb_prep', '/path/to/usb_prep.xml', '/path/to/usb_prep_synced.xml'),
+        ])
+    """
+    return RekordboxCollectionSynchronizer().synchronize_targets(
+        targets, mode, export_playlists, delta, playlist_filter, workers,
+    )
+
+
 def synchronize_rekordbox_collection(
     input_file: str,
     output_file: Optional[str] = None,
     mode: str = 'overwrite',
     export_playlists: bool = True,
+    streaming: bool = True,
+    delta: bool = False,
+    playlist_filter: str = PLAYLIST_EXPORT_ALL,
+    target: str = '',
 ) -> dict:
     """
     Fonction utilitaire pour synchroniser Rubitrack vers Rekordbox
@@ -719,6 +1276,10 @@ def synchronize_rekordbox_collection(
         output_file (str, optional): Fichier de sortie (si None, remplace l'original)
         mode (str, optional): Mode de synchronisation ('overwrite' ou 'add_only')
         export_playlists (bool, optional): Exporte les playlists Rubitrack dans le XML
+        streaming (bool, optional): Lecture/écriture TRACK par TRACK (False: fichier entier en mémoire)
+        delta (bool, optional): Ne réécrit que les TRACK dont les données Rubitrack ont changé
+        playlist_filter (str, optional): Playlists exportées: 'all', 'favourites' ou 'changed'
+        target (str, optional): Export Rekordbox synchronisé (correspondances persistées par cible)
 
     Returns:
         dict: Statistiques de l'opération
@@ -732,4 +1293,7 @@ def synchronize_rekordbox_collection(
         )
     """
     synchronizer = RekordboxCollectionSynchronizer()
-    return synchronizer.synchronize_rekordbox_collection(input_file, output_file, mode, export_playlists)
+    return synchronizer.synchronize_rekordbox_collection(
+        input_file, output_file, mode, export_playlists, streaming, delta,
+        playlist_filter=playlist_filter, target=target,
+    )
@@ -0,0 +1,107 @@
+"""
+Générateur d'exports Rekordbox (DJ_PLAYLISTS) synthétiques, pour le benchmark de
+la synchronisation (manage.py benchmark_rekordbox_sync) et les tests de volumétrie.
+
+Les TRACK reprennent les tracks d'une base Rubitrack (mêmes Artist/Name, TotalTime
+dans la tolérance de durée): la synchronisation les retrouve comme sur une vraie
+collection. S'y ajoutent des TRACK absents de Rubitrack, des titres avec faute de
+frappe (suggestions approximatives), du contenu sampler, des POSITION_MARK et TEMPO
+existants et des playlists Rekordbox. Le contenu est déterministe pour une graine donnée.
+"""
+
+import random
+from typing import IO, List, Sequence
+from urllib.parse import quote
+from xml.sax.saxutils import quoteattr
+
+SAMPLER_DIR = 'file://localhost/C:/Program%20Files/Pioneer/rekordbox/Sampler/OSC_SAMPLER/PRESET%20ONESHOT/'
+UNMATCHED_DIR = 'file://localhost/C:/Users/dj/Music/rekordbox_only/'
+
+
+def write_synthetic_rekordbox(
+    out: IO[str],
+    tracks: Sequence,
+    unmatched_ratio: float = 0.05,
+    typo_ratio: float = 0.01,
+    sampler_tracks: int = 20,
+    marks_per_track: int = 2,
+    tempo_ratio: float = 0.8,
+    playlists: int = 50,
+    tracks_per_playlist: int = 40,
+    seed: int = 0,
+) -> None:
+    """Ecrit dans `out` un export Rekordbox dont les TRACK reprennent `tracks`
+    (Track Rubitrack avec artist chargé, ex: select_related('artist')).
+
+    - unmatched_ratio: TRACK supplémentaires absents de Rubitrack (en part de len(tracks))
+    - typo_ratio: part des tracks dont le titre a une faute de frappe (non matchées,
+      mais proposées en suggestion approximative)
+    - sampler_tracks: TRACK du sampler Rekordbox (ignorés par la synchronisation)
+    - marks_per_track: POSITION_MARK manuels existants par TRACK (le premier sur le pad 0)
+    - tempo_ratio: part des TRACK ayant déjà un TEMPO
+    """
+    rng = random.Random(seed)
+    unmatched = int(len(tracks) * unmatched_ratio)
+    total = len(tracks) + unmatched + sampler_tracks
+    track_ids: List[int] = []
+
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n<DJ_PLAYLISTS Version="1.0.0">\n')
+    out.write('  <PRODUCT Name="rekordbox" Version="6.8.5" Company="AlphaTheta"/>\n')
+    out.write(f'  <COLLECTION Entries="{total}">\n')
+    track_id = 0
+    for track in tracks:
+        track_id += 1
+        track_ids.append(track_id)
+        title = track.title
+        if rng.random() < typo_ratio:
+            position = rng.randrange(len(title) + 1)
+            title = f'{title[:position]}x{title[position:]}'
+        path = (track.file_path or f'C:/:Users/:dj/:Music/:{track_id}.mp3').replace('/:', '/')
+        out.write(_track_xml(
+            rng, track_id, title, track.artist.name if track.artist else '', track.playtime, track.bpm,
+            'file://localhost/' + quote(path, safe='/:'), marks_per_track, tempo_ratio,
+        ))
+    for number in range(unmatched):
+        track_id += 1
+        track_ids.append(track_id)
+        out.write(_track_xml(
+            rng, track_id, f'Rekordbox Only {number}', f'Unknown Artist {number % 97}',
+            rng.uniform(240, 600), rng.uniform(118, 135), f'{UNMATCHED_DIR}only_{number:06d}.mp3',
+            marks_per_track, tempo_ratio,
+        ))
+    for number in range(sampler_tracks):
+        track_id += 1
+        out.write(
+            f'    <TRACK TrackID="{track_id}" Name="OneShot {number}" Artist="" Kind="WAV File" TotalTime="2" '
+            f'Location="{SAMPLER_DIR}oneshot_{number}.wav"/>\n'
+        )
+    out.write('  </COLLECTION>\n')
+
+    out.write(f'  <PLAYLISTS>\n    <NODE Type="0" Name="ROOT" Count="{playlists}">\n')
+    for number in range(playlists):
+        keys = rng.sample(track_ids, min(tracks_per_playlist, len(track_ids)))
+        out.write(f'      <NODE Name="Rekordbox Set {number}" Type="1" KeyType="0" Entries="{len(keys)}">\n')
+        for key in keys:
+            out.write(f'        <TRACK Key="{key}"/>\n')
+        out.write('      </NODE>\n')
+    out.write('    </NODE>\n  </PLAYLISTS>\n</DJ_PLAYLISTS>\n')
+
+
+def _track_xml(rng, track_id, title, artist, playtime, bpm, location, marks_per_track, tempo_ratio) -> str:
+    total_time = int(playtime) + rng.randint(-1, 1) if playtime else 0
+    bpm = bpm or 125.0
+    parts = [
+        f'    <TRACK TrackID="{track_id}" Name={quoteattr(title)} Artist={quoteattr(artist)} Kind="MP3 File" '
+        f'TotalTime="{max(total_time, 0)}" AverageBpm="{bpm:.2f}" Location={quoteattr(location)}>\n'
+    ]
+    if rng.random() < tempo_ratio:
+        parts.append(f'      <TEMPO Inizio="{rng.uniform(0, 0.5):.3f}" Bpm="{bpm:.2f}" Metro="4/4" Battito="1"/>\n')
+    beat_seconds = 60 / bpm
+    for number in range(marks_per_track):
+        start = number * 64 * beat_seconds + rng.uniform(0, 2)
+        pad = 0 if number == 0 else -1
+        parts.append(
+            f'      <POSITION_MARK Name="Manual {number}" Type="0" Start="{start:.3f}" Num="{pad}"/>\n'
+        )
+    parts.append('    </TRACK>\n')
+    return ''.join(parts)
@@ -4,25 +4,35 @@ Vues pour la synchronisation avec Rekordbox
 
 import csv
 import io
+import itertools
 import json
 import logging
 import os
 import tempfile
 import zipfile
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_http_methods
 
 from track.models import Config
 
-from .synchronize_rekordbox_collection import synchronize_rekordbox_collection
+from .synchronize_rekordbox_collection import (
+    PLAYLIST_EXPORT_ALL,
+    PLAYLIST_EXPORT_FILTERS,
+    rekordbox_target_name,
+    synchronize_rekordbox_collection,
+    synchronize_rekordbox_targets,
+)
 
 logger = logging.getLogger(__name__)
 
+# Taille des blocs du XML synchronisé compressés dans le ZIP de réponse
+ZIP_STREAM_BLOCK_SIZE = 1 << 20
+
 
 @staff_member_required
 def rekordbox_sync_view(request):
@@ -38,8 +48,9 @@ def synchronize_rekordbox_collection_api(request):
     """
     API pour synchroniser les cue points avec un fichier Rekordbox.
 
-    Succès: réponse ZIP (collection modifiée + liste des tracks non trouvées),
-    stats résumées dans le header X-Sync-Stats (JSON).
+    Succès: réponse ZIP (collection modifiée + liste des tracks non trouvées,
+    + liste des tracks réécrites en sync delta), stats résumées dans le header
+    X-Sync-Stats (JSON).
     Erreur: réponse JSON avec le code HTTP approprié.
     """
     if 'rekordbox_file' not in request.FILES:
@@ -70,16 +81,23 @@ def synchronize_rekordbox_collection_api(request):
             temp_file.write(chunk)
         temp_file_path = temp_file.name
 
-    # Fichier de sortie temporaire
+    # Fichier de sortie temporaire (supprimé par SyncArchiveStream.close() si la sync réussit)
     output_file_path = temp_file_path + '_output.xml'
+    archive = None
 
     try:
         mode = request.POST.get('mode', 'overwrite')
+        delta = request.POST.get('delta') in ('1', 'true', 'on')
+        playlist_filter = request.POST.get('playlists', PLAYLIST_EXPORT_ALL)
+        if playlist_filter not in PLAYLIST_EXPORT_FILTERS:
+            playlist_filter = PLAYLIST_EXPORT_ALL
         # Synchronisation des cue points
         stats = synchronize_rekordbox_collection(
             temp_file_path,
             output_file_path,
-            mode=mode
+            mode=mode,
+            delta=delta,
+            playlist_filter=playlist_filter,
         )
 
         if not stats['success']:
@@ -90,32 +108,29 @@ def synchronize_rekordbox_collection_api(request):
             )
 
         current_date = datetime.now().strftime('%Y%m%d')
-        xml_filename = f'rekordbox_collection_with_cues_{current_date}.xml'
-        not_found_filename = f'rekordbox_tracks_not_found_{current_date}.csv'
-        not_found_content = generate_not_found_csv(stats['unmatched_rekordbox_tracks'])
-
-        # Construction du ZIP en mémoire (XML modifié + tracks non trouvées)
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-            zf.write(output_file_path, arcname=xml_filename)
-            zf.writestr(not_found_filename, not_found_content)
+        # ZIP produit au fil de l'envoi (XML modifié + tracks non trouvées)
+        csv_reports = [
+            (f'rekordbox_tracks_not_found_{current_date}.csv',
+             iter_not_found_csv(stats['unmatched_rekordbox_tracks'])),
+        ]
+        if delta:
+            csv_reports.append((
+                f'rekordbox_tracks_changed_{current_date}.csv',
+                iter_changed_csv(stats['changed_rekordbox_tracks']),
+            ))
+        archive = SyncArchiveStream(
+            [(output_file_path, f'rekordbox_collection_with_cues_{current_date}.xml')], csv_reports
+        )
 
-        response = HttpResponse(zip_buffer.getvalue(), content_type='application/zip')
+        response = StreamingHttpResponse(archive, content_type='application/zip')
         response['Content-Disposition'] = (
             f'attachment; filename="rekordbox_sync_{current_date}.zip"'
         )
         response['X-Sync-Stats'] = json.dumps({
             'mode': mode,
-            'total_tracks_in_rekordbox_file': stats['total_tracks_in_rekordbox_file'],
-            'rubitrack_tracks_processed': stats['rubitrack_tracks_processed'],
-            'tracks_found_and_matched': stats['tracks_found_and_matched'],
-            'tracks_updated_with_cue_points': stats['tracks_updated_with_cue_points'],
-            'total_cue_points_added': stats['total_cue_points_added'],
-            'beatgrids_written': stats['beatgrids_written'],
-            'metadata_fields_filled': stats['metadata_fields_filled'],
-            'playlists_exported': stats['playlists_exported'],
-            'fuzzy_candidates_found': stats['fuzzy_candidates_found'],
-            'unmatched_count': len(stats['unmatched_rekordbox_tracks']),
+            'delta': delta,
+            'playlist_filter': playlist_filter,
+            **summarize_sync_stats(stats),
         })
         return response
 
@@ -127,29 +142,251 @@ def synchronize_rekordbox_collection_api(request):
         }, status=500)
 
     finally:
-        # Nettoyage des fichiers temporaires
+        # Nettoyage des fichiers temporaires (la sortie est gardée pour la réponse en streaming)
         if os.path.exists(temp_file_path):
             os.unlink(temp_file_path)
-        if os.path.exists(output_file_path):
+        if archive is None and os.path.exists(output_file_path):
             os.unlink(output_file_path)
 
 
-def generate_not_found_csv(unmatched_tracks: List[Dict[str, Any]]) -> str:
-    """Génère le rapport CSV des tracks Rekordbox non synchronisées
-    (délimiteur ';' pour ouverture directe dans Excel FR)."""
+@staff_member_required
+@require_http_methods(["POST"])
+def synchronize_rekordbox_targets_api(request):
+    """
+    API de synchronisation de plusieurs exports Rekordbox en une passe (un par
+    machine, champ multiple rekordbox_files). Le nom de fichier sans extension
+    identifie la cible (correspondances persistées propres à chaque machine).
+
+    Succès: un ZIP avec, par cible, un dossier <cible>/ contenant le XML modifié, la
+    liste des tracks non trouvées (et des tracks réécrites en sync delta). Les stats
+    de chaque cible sont dans le header X-Sync-Stats (JSON, 'targets'); une cible en
+    échec y figure avec son erreur, sans fichiers dans le ZIP.
+    Erreur (fichiers invalides, ou aucune cible synchronisée): réponse JSON.
+    """
+    uploaded_files = request.FILES.getlist('rekordbox_files')
+    if not uploaded_files:
+        return JsonResponse({'success': False, 'error': 'Aucun fichier fourni'}, status=400)
+    names = [rekordbox_target_name(uploaded_file.name) for uploaded_file in uploaded_files]
+    if any(not uploaded_file.name.endswith('.xml') for uploaded_file in uploaded_files):
+        return JsonResponse({'success': False, 'error': 'Les fichiers doivent être des fichiers XML'}, status=400)
+    if len(set(names)) != len(names):
+        return JsonResponse({
+            'success': False,
+            'error': 'Deux fichiers portent le même nom: le nom identifie la machine synchronisée'
+        }, status=400)
+
+    max_upload_size_mb = Config.get_config().max_upload_size_mb
+    total_size = sum(uploaded_file.size for uploaded_file in uploaded_files)
+    if total_size > max_upload_size_mb * 1024 * 1024:
+        return JsonResponse({
+            'success': False,
+            'error': f'Fichiers trop volumineux ({total_size // (1024 * 1024)} Mo, maximum {max_upload_size_mb} Mo)'
+        }, status=413)
+
+    work_dir = tempfile.mkdtemp(prefix='rekordbox_sync_')
+    targets = []
+    archive = None
+    try:
+        for name, uploaded_file in zip(names, uploaded_files):
+            input_path = os.path.join(work_dir, f'{len(targets)}_input.xml')
+            targets.append((name, input_path, os.path.join(work_dir, f'{len(targets)}_output.xml')))
+            with open(input_path, 'wb') as temp_file:
+                for chunk in uploaded_file.chunks():
+                    temp_file.write(chunk)
+
+        mode = request.POST.get('mode', 'overwrite')
+        delta = request.POST.get('delta') in ('1', 'true', 'on')
+        playlist_filter = request.POST.get('playlists', PLAYLIST_EXPORT_ALL)
+        if playlist_filter not in PLAYLIST_EXPORT_FILTERS:
+            playlist_filter = PLAYLIST_EXPORT_ALL
+        # Cibles traitées l'une après l'autre dans le processus uWSGI (pas de fork d'un
+        # worker web); le pool de processus reste réservé à manage.py sync_rekordbox_targets
+        report = synchronize_rekordbox_targets(
+            targets, mode=mode, delta=delta, playlist_filter=playlist_filter, workers=1,
+        )
+
+        succeeded = [(name, output_path) for name, _, output_path in targets if report[name]['success']]
+        if not succeeded:
+            return JsonResponse({
+                'success': False,
+                'error': '; '.join(f"{name}: {report[name].get('error', 'Erreur inconnue')}" for name in names),
+            }, status=400)
+
+        current_date = datetime.now().strftime('%Y%m%d')
+        archive = build_targets_archive(report, succeeded, delta, current_date)
+        response = StreamingHttpResponse(archive, content_type='application/zip')
+        response['Content-Disposition'] = (
+            f'attachment; filename="rekordbox_sync_{len(targets)}_targets_{current_date}.zip"'
+        )
+        response['X-Sync-Stats'] = json.dumps({
+            'mode': mode,
+            'delta': delta,
+            'playlist_filter': playlist_filter,
+            'targets': {
+                name: summarize_sync_stats(stats) if stats['success'] else {'success': False, 'error': stats.get('error')}
+                for name, stats in report.items()
+            },
+        })
+        return response
+
+    except Exception as e:
+        logger.exception('Erreur lors de la synchronisation Rekordbox multi-cible')
+        return JsonResponse({
+            'success': False,
+            'error': f'Erreur lors de la synchronisation: {str(e)}'
+        }, status=500)
+
+    finally:
+        # Les sorties synchronisées sont supprimées par SyncArchiveStream.close() une fois envoyées
+        for _, input_path, output_path in targets:
+            if os.path.exists(input_path):
+                os.unlink(input_path)
+            if archive is None and os.path.exists(output_path):
+                os.unlink(output_path)
+        if archive is None:
+            os.rmdir(work_dir)
+        else:
+            archive.cleanup_dirs.append(work_dir)
+
+
+def summarize_sync_stats(stats: dict) -> Dict[str, Any]:
+    """Statistiques d'une sync réussie renvoyées dans le header X-Sync-Stats."""
+    return {
+        'total_tracks_in_rekordbox_file': stats['total_tracks_in_rekordbox_file'],
+        'rubitrack_tracks_processed': stats['rubitrack_tracks_processed'],
+        'tracks_found_and_matched': stats['tracks_found_and_matched'],
+        'tracks_matched_via_map': stats['tracks_matched_via_map'],
+        'tracks_unchanged_skipped': stats['tracks_unchanged_skipped'],
+        'changed_count': len(stats['changed_rekordbox_tracks']),
+        'tracks_updated_with_cue_points': stats['tracks_updated_with_cue_points'],
+        'total_cue_points_added': stats['total_cue_points_added'],
+        'beatgrids_written': stats['beatgrids_written'],
+        'metadata_fields_filled': stats['metadata_fields_filled'],
+        'playlists_exported': stats['playlists_exported'],
+        'playlists_unchanged_skipped': stats['playlists_unchanged_skipped'],
+        'fuzzy_candidates_found': stats['fuzzy_candidates_found'],
+        'unmatched_count': len(stats['unmatched_rekordbox_tracks']),
+    }
+
+
+def build_targets_archive(
+    report: Dict[str, dict], outputs: List[Tuple[str, str]], delta: bool, current_date: str
+) -> 'SyncArchiveStream':
+    """ZIP d'une sync multi-cible: pour chaque (cible, XML synchronisé) de `outputs`,
+    un dossier <cible>/ avec le XML, les tracks non trouvées et, en delta, les tracks réécrites."""
+    xml_files = []
+    csv_reports = []
+    for name, output_path in outputs:
+        xml_files.append((output_path, f'{name}/rekordbox_collection_with_cues_{current_date}.xml'))
+        csv_reports.append((
+            f'{name}/rekordbox_tracks_not_found_{current_date}.csv',
+            iter_not_found_csv(report[name]['unmatched_rekordbox_tracks']),
+        ))
+        if delta:
+            csv_reports.append((
+                f'{name}/rekordbox_tracks_changed_{current_date}.csv',
+                iter_changed_csv(report[name]['changed_rekordbox_tracks']),
+            ))
+    return SyncArchiveStream(xml_files, csv_reports)
+
+
+class _ZipChunkBuffer:
+    """Sortie non-seekable pour zipfile: accumule les octets écrits jusqu'au prochain envoi."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class SyncArchiveStream:
+    """
+    Contenu d'une StreamingHttpResponse: ZIP des XML synchronisés et des rapports CSV,
+    compressé au fil de l'itération. Les XML sont lus par blocs de ZIP_STREAM_BLOCK_SIZE
+    et les CSV ligne par ligne: la mémoire ne dépend pas de la taille des collections.
+
+    close() (appelé par Django en fin de réponse, même si le client abandonne)
+    supprime les XML de sortie, puis les dossiers de cleanup_dirs (vides).
+    """
+
+    def __init__(self, xml_files: List[Tuple[str, str]], csv_reports: List[Tuple[str, Iterable[str]]]) -> None:
+        self.xml_files = xml_files  # [(chemin du XML synchronisé, nom dans le ZIP)]
+        self.csv_reports = csv_reports
+        self.cleanup_dirs: List[str] = []
+
+    def __iter__(self) -> Iterator[bytes]:
+        buffer = _ZipChunkBuffer()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for xml_path, xml_name in self.xml_files:
+                with open(xml_path, 'rb') as source, zf.open(xml_name, 'w') as entry:
+                    for block in iter(lambda: source.read(ZIP_STREAM_BLOCK_SIZE), b''):
+                        entry.write(block)
+                        data = buffer.pop()
+                        if data:
+                            yield data
+            for csv_name, lines in self.csv_reports:
+                with zf.open(csv_name, 'w') as entry:
+                    for line in lines:
+                        entry.write(line.encode('utf-8'))
+                yield buffer.pop()
+        # Répertoire central, écrit à la fermeture du ZipFile
+        yield buffer.pop()
+
+    def close(self) -> None:
+        for xml_path, _ in self.xml_files:
+            if os.path.exists(xml_path):
+                os.unlink(xml_path)
+        for directory in self.cleanup_dirs:
+            if os.path.isdir(directory):
+                os.rmdir(directory)
+
+
+def _iter_csv_rows(header: List[str], rows: Iterable[List[Any]]) -> Iterator[str]:
+    """Lignes CSV une à une (délimiteur ';' pour ouverture directe dans Excel FR)."""
     buffer = io.StringIO()
     writer = csv.writer(buffer, delimiter=';', lineterminator='\n')
-    writer.writerow(['artist', 'title', 'location', 'reason', 'suggested_match', 'match_score'])
-    for t in unmatched_tracks:
-        writer.writerow([
-            t.get('artist', ''),
-            t.get('title', ''),
-            t.get('location', ''),
-            t.get('reason', 'no_match'),
-            t.get('suggested_match', ''),
-            t.get('match_score', ''),
-        ])
-    return buffer.getvalue()
+    for row in itertools.chain([header], rows):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def iter_not_found_csv(unmatched_tracks: List[Dict[str, Any]]) -> Iterator[str]:
+    """Rapport CSV des tracks Rekordbox non synchronisées, ligne par ligne."""
+    return _iter_csv_rows(
+        ['artist', 'title', 'location', 'reason', 'suggested_match', 'match_score'],
+        (
+            [
+                t.get('artist', ''),
+                t.get('title', ''),
+                t.get('location', ''),
+                t.get('reason', 'no_match'),
+                t.get('suggested_match', ''),
+                t.get('match_score', ''),
+            ]
+            for t in unmatched_tracks
+        ),
+    )
+
+
+def iter_changed_csv(changed_tracks: List[Dict[str, Any]]) -> Iterator[str]:
+    """Rapport CSV des tracks Rekordbox réécrites par une sync delta, ligne par ligne."""
+    return _iter_csv_rows(
+        ['track_id', 'artist', 'title', 'location'],
+        ([t.get('track_id', ''), t.get('artist', ''), t.get('title', ''), t.get('location', '')]
+         for t in changed_tracks),
+    )
 
 
 @staff_member_required
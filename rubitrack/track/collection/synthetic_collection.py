@@ -0,0 +1,116 @@
+"""
+Générateur de collection.nml Traktor synthétiques, pour les benchmarks d'import
+(manage.py benchmark_import) et les tests de volumétrie.
+
+Les fichiers reprennent la structure d'un export Traktor réel: ENTRY avec
+LOCATION/ALBUM/INFO/TEMPO/LOUDNESS/MUSICAL_KEY/CUE_V2, ENTRY en double pour un
+même AUDIO_ID, titres suffixés "Titre - Clé - Note", samples sans INFO, et une
+arborescence de playlists. Le contenu est déterministe pour une graine donnée.
+"""
+
+import random
+from typing import IO, List
+from xml.sax.saxutils import quoteattr
+
+TRAKTOR_KEYS = [
+    'Am', 'Em', 'Bm', 'F#m', 'C#m', 'G#m', 'D#m', 'A#m', 'Fm', 'Cm', 'Gm', 'Dm',
+    'C', 'G', 'D', 'A', 'E', 'B', 'F#', 'C#', 'G#', 'D#', 'A#', 'F',
+]
+GENRES = ['Techno', 'House', 'Minimal', 'Trance', 'Progressive', 'Electro']
+MUSIC_DIR = '/:Users/:dj/:Music/:'
+VOLUME = 'Macintosh HD'
+
+
+def write_synthetic_collection(
+    out: IO[str],
+    entries: int,
+    cues_per_track: int = 4,
+    playlists: int = 50,
+    tracks_per_playlist: int = 40,
+    duplicate_ratio: float = 0.02,
+    key_suffix_ratio: float = 0.3,
+    sample_ratio: float = 0.01,
+    artists: int = 0,
+    seed: int = 0,
+) -> None:
+    """Ecrit dans `out` un collection.nml de `entries` ENTRY (doublons et samples compris).
+
+    - cues_per_track: CUE_V2 par track (HOTCUE 0..7, le premier est une grille TYPE=4)
+    - duplicate_ratio: part d'ENTRY qui répètent l'AUDIO_ID d'une ENTRY précédente
+    - key_suffix_ratio: part de titres suffixés " - Clé - Note" (titre-base de l'import)
+    - sample_ratio: part d'ENTRY sans INFO (samples ignorés par l'import)
+    - artists: nombre d'artistes distincts (entries / 10 par défaut)
+    """
+    rng = random.Random(seed)
+    artists = artists or max(entries // 10, 1)
+    file_paths: List[str] = []
+
+    out.write('<?xml version="1.0" encoding="UTF-8" standalone="no" ?>\n')
+    out.write('<NML VERSION="19"><HEAD COMPANY="www.native-instruments.com" PROGRAM="Traktor"></HEAD>\n')
+    out.write(f'<MUSICFOLDERS></MUSICFOLDERS>\n<COLLECTION ENTRIES="{entries}">\n')
+    for number in range(entries):
+        roll = rng.random()
+        if roll < sample_ratio:
+            out.write(f'<ENTRY MODIFIED_DATE="2025/1/1" TITLE="Sample {number}"></ENTRY>\n')
+            continue
+        duplicate_of = number > 0 and roll < sample_ratio + duplicate_ratio
+        track_number = rng.randrange(number) if duplicate_of else number
+        file_name = f'track_{number:06d}.mp3'
+        file_paths.append(f'{VOLUME}{MUSIC_DIR}{file_name}')
+        out.write(_entry_xml(rng, track_number, number, file_name, artists, cues_per_track, key_suffix_ratio))
+    out.write('</COLLECTION>\n')
+
+    out.write('<SETS ENTRIES="0"></SETS>\n<PLAYLISTS>\n<NODE TYPE="FOLDER" NAME="$ROOT">\n')
+    out.write(f'<SUBNODES COUNT="{playlists}">\n')
+    for number in range(playlists):
+        keys = rng.sample(file_paths, min(tracks_per_playlist, len(file_paths)))
+        out.write(f'<NODE TYPE="PLAYLIST" NAME={quoteattr(_playlist_name(rng, number))}>')
+        out.write(f'<PLAYLIST ENTRIES="{len(keys)}" TYPE="LIST" UUID="{rng.getrandbits(128):032x}">')
+        for key in keys:
+            out.write(f'<ENTRY><PRIMARYKEY TYPE="TRACK" KEY={quoteattr(key)}></PRIMARYKEY></ENTRY>')
+        out.write('</PLAYLIST></NODE>\n')
+    out.write('</SUBNODES>\n</NODE>\n</PLAYLISTS>\n</NML>\n')
+
+
+def _entry_xml(rng, track_number, number, file_name, artists, cues_per_track, key_suffix_ratio) -> str:
+    # Titre/artiste/clé dérivés du numéro de track: un doublon reprend ceux de l'original
+    track_rng = random.Random(track_number)
+    key = track_rng.choice(TRAKTOR_KEYS)
+    title = f'Track {track_number}'
+    if track_rng.random() < key_suffix_ratio:
+        title = f'{title} - {key} - {track_rng.randint(1, 9)}'
+    artist_number = track_rng.randrange(artists)
+    artist = f'Artist {artist_number} & Friends' if artist_number % 7 == 0 else f'Artist {artist_number}'
+    bpm = track_rng.uniform(118, 135)
+    playtime = track_rng.uniform(240, 600)
+
+    parts = [
+        f'<ENTRY MODIFIED_DATE="2025/{rng.randint(1, 12)}/{rng.randint(1, 28)}" MODIFIED_TIME="{rng.randrange(86400)}" '
+        f'AUDIO_ID="AUDIO{track_number:08d}" TITLE={quoteattr(title)} ARTIST={quoteattr(artist)}>',
+        f'<LOCATION DIR="{MUSIC_DIR}" FILE="{file_name}" VOLUME="{VOLUME}" VOLUMEID="{VOLUME}"></LOCATION>',
+        f'<ALBUM TRACK="{track_rng.randint(1, 12)}" TITLE="Album {track_number // 10}"></ALBUM>',
+        '<MODIFICATION_INFO AUTHOR_TYPE="user"></MODIFICATION_INFO>',
+        f'<INFO BITRATE="320000" GENRE="{track_rng.choice(GENRES)}" KEY="{key}" '
+        f'PLAYCOUNT="{rng.randint(0, 40)}" PLAYTIME="{int(playtime)}" PLAYTIME_FLOAT="{playtime:.6f}" '
+        f'RANKING="{rng.choice((0, 51, 102, 153, 204, 255))}" IMPORT_DATE="2024/6/1" '
+        f'LAST_PLAYED="2025/{rng.randint(1, 12)}/{rng.randint(1, 28)}" FILESIZE="{rng.randint(8000, 20000)}" '
+        f'COMMENT="comment {number}"></INFO>',
+        f'<TEMPO BPM="{bpm:.6f}" BPM_QUALITY="100.000000"></TEMPO>',
+        '<LOUDNESS PEAK_DB="-0.5" PERCEIVED_DB="0.1" ANALYZED_DB="0.1"></LOUDNESS>',
+        f'<MUSICAL_KEY VALUE="{TRAKTOR_KEYS.index(key)}"></MUSICAL_KEY>',
+    ]
+    beat_ms = 60000 / bpm
+    for hotcue in range(min(cues_per_track, 8)):
+        start = hotcue * 32 * beat_ms + rng.uniform(0, 5)
+        cue_type = 4 if hotcue == 0 else rng.choice((0, 0, 0, 5))
+        length = 16 * beat_ms if cue_type == 5 else 0
+        parts.append(
+            f'<CUE_V2 NAME="{"AutoGrid" if cue_type == 4 else f"Cue {hotcue}"}" DISPL_ORDER="0" TYPE="{cue_type}" '
+            f'START="{start:.6f}" LEN="{length:.6f}" REPEATS="-1" HOTCUE="{hotcue}"></CUE_V2>'
+        )
+    parts.append('</ENTRY>\n')
+    return ''.join(parts)
+
+
+def _playlist_name(rng, number) -> str:
+    return f'{rng.randint(2018, 2026)}-{rng.randint(1, 12):02d} Set {number}'
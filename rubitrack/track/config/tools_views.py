@@ -9,7 +9,7 @@ from django.contrib import messages
 from django.db import transaction
 from django.db.models import Q, Count
 
-from ..models import Track, CuePoint
+from ..models import Track, CuePoint, IcecastTrackResolution
 from ..musical_key.musical_key_utils import extract_musical_key_from_title
 
 
@@ -236,6 +236,66 @@ def delete_all_cue_points(request):
     """Delete all cue points."""
     if request.method == 'POST':
         CuePoint.objects.all().delete()
+        # Sinon l'import incrémental ignorerait les ENTRY inchangées et ne recréerait pas les cues
+        Track.objects.update(import_fingerprint=None)
         messages.success(request, "All cue points deleted.")
         return redirect('tools')
     return render(request, 'track/tools/confirm_delete_all_cue_points.html')
+
+
+# Résolutions affichées au plus sur la page (les plus récentes d'abord)
+ICECAST_RESOLUTIONS_PAGE_SIZE = 200
+
+
+def _posted_id(request, name):
+    """Identifiant entier posté, None s'il est absent ou non numérique."""
+    value = request.POST.get(name, '').strip()
+    return int(value) if value.isdigit() else None
+
+
+@login_required
+def icecast_resolutions(request):
+    """
+    Résolutions mémorisées du log Icecast (chaîne -> track): liste des résolutions
+    peu sûres (approchées, titre-base, tracks créées) à confirmer ou corriger.
+    Une résolution corrigée ou confirmée passe au palier 'manual'; une résolution
+    oubliée est recalculée au prochain passage de la chaîne dans le log.
+    """
+    if request.method == 'POST':
+        resolution_id = _posted_id(request, 'resolution_id')
+        resolution = IcecastTrackResolution.objects.filter(pk=resolution_id).first() if resolution_id else None
+        action = request.POST.get('action')
+        if resolution is None:
+            messages.error(request, "Résolution introuvable.")
+        elif action == 'forget':
+            resolution.delete()
+            messages.success(request, f"« {resolution.log_string} » sera résolue à nouveau au prochain passage.")
+        else:
+            if action == 'correct':
+                track_id = _posted_id(request, 'track_id')
+                track = Track.objects.filter(pk=track_id).first() if track_id else None
+                if track is None:
+                    messages.error(request, "Track introuvable.")
+                    return redirect('icecast_resolutions')
+                resolution.track = track
+            resolution.match_tier = IcecastTrackResolution.TIER_MANUAL
+            resolution.save()
+            messages.success(request, f"« {resolution.log_string} » → {resolution.track}")
+        return redirect('icecast_resolutions')
+
+    show_all = request.GET.get('show') == 'all'
+    resolutions = IcecastTrackResolution.objects.select_related('track__artist')
+    if not show_all:
+        resolutions = resolutions.filter(match_tier__in=IcecastTrackResolution.LOW_CONFIDENCE_TIERS)
+    tier_counts = dict(
+        IcecastTrackResolution.objects.values_list('match_tier').annotate(count=Count('id')).order_by()
+    )
+    context = {
+        'resolutions': resolutions[:ICECAST_RESOLUTIONS_PAGE_SIZE],
+        'total': resolutions.count(),
+        'show_all': show_all,
+        'tier_counts': [
+            (label, tier_counts.get(tier, 0)) for tier, label in IcecastTrackResolution.TIER_CHOICES
+        ],
+    }
+    return render(request, 'track/tools/icecast_resolutions.html', context)
@@ -1,4 +1,5 @@
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import HttpResponse
 
 from django.shortcuts import render
@@ -12,11 +13,12 @@ from ..playlist.playlist_context import get_next_tracks_in_playlists
 from track.playlist.playlist_transitions import get_playlists_by_track_id, get_separator_track_id
 from ..constants import REFRESH_INTERVAL_CURRENTLY_PLAYING_MS
 
-from ..models import Track, Transition, CurrentlyPlaying, Config
+from ..models import Track, Transition, CurrentlyPlaying, Config, IcecastLogState
+from .icecast_log import read_new_log_lines
+from .track_resolver import invalidate_track_resolver_index, resolve_track
 from ..track_db_service import (
     are_track_related,
     get_track_related_text,
-    get_track_by_title_and_artist_name,
     get_currently_playing_track_from_db,
     get_currently_playing_track_time_from_db,
 )
@@ -177,31 +179,45 @@ def display_history_editing(request, track_id):
 
 def get_currently_playing_track(with_refresh=True):
     if with_refresh:
-        refresh_currently_playing_from_log()
+        refresh_currently_playing_for_request()
     return get_currently_playing_track_from_db()
 
 
+def refresh_currently_playing_for_request():
+    """Rafraîchissement depuis le log pendant une requête HTTP, sauf si le log est
+    lu par manage.py ingest_icecast (Config.icecast_ingest_daemon): la vue lit alors
+    seulement la base, sa latence ne dépend plus du log."""
+    if not Config.get_config().icecast_ingest_daemon:
+        refresh_currently_playing_from_log()
+
+
 def refresh_currently_playing_from_log():
+    """Enregistre les morceaux ajoutés au playlist log Icecast depuis le dernier
+    rafraîchissement: seules les nouvelles lignes sont lues et parsées (position
+    persistée dans IcecastLogState, voir read_new_log_lines).
+
+    Returns: nombre de morceaux enregistrés
+    """
     config = Config.get_config()
     path_to_playlist_log = config.rubi_icecast_playlist_file
-    # Log absent ou illisible (Icecast arrêté, autre machine): on lit la DB telle quelle
-    try:
-        with open(path_to_playlist_log, 'r') as file:
-            line_list = file.readlines()
-    except OSError:
-        logger.warning("Playlist log illisible (%s), lecture DB directe", path_to_playlist_log)
-        return False
-    if len(line_list) < 1:
-        logger.info("Nothing to scrap in playlist log")
-        return False
-
-    # we check if the previous lines have been added from log to db
-    last_db_played_time = get_currently_playing_track_time_from_db()
-    logger.info('Current last time played in DB: %s', last_db_played_time)
-
-    # new version to iterate on lines, to see if past tracks have been saved into DB
-    with open(path_to_playlist_log) as playlist_file:
-        for current_line in playlist_file:
+    with transaction.atomic():
+        # Verrou sur la position: deux rafraîchissements simultanés ne traitent pas les mêmes lignes
+        state, _ = IcecastLogState.objects.select_for_update().get_or_create(path=path_to_playlist_log)
+        line_list = read_new_log_lines(path_to_playlist_log, state)
+        # Log absent ou illisible (Icecast arrêté, autre machine): on lit la DB telle quelle
+        if line_list is None:
+            logger.warning("Playlist log illisible (%s), lecture DB directe", path_to_playlist_log)
+            return 0
+        if not line_list:
+            logger.debug("Nothing new in playlist log")
+            return 0
+
+        # we check if the new lines are posterior to the last track saved in DB
+        last_db_played_time = get_currently_playing_track_time_from_db()
+        logger.info('Current last time played in DB: %s', last_db_played_time)
+
+        saved = 0
+        for current_line in line_list:
 
             #get time of log 08/Jan/2023:20:57:58
             parts = get_log_parts_from_log_line(current_line)
@@ -213,9 +229,14 @@ def refresh_currently_playing_from_log():
             utc = pytz.UTC
             log_time_object = utc.localize(log_time_object)
 
-            if log_time_object > last_db_played_time:
+            if last_db_played_time is None or log_time_object > last_db_played_time:
                 logger.info('Last DB time ( %s %s %s', last_db_played_time, ') is anterior to previous logs time ==> saving past logs:', current_line)
-                save_track_played_to_db_from_log_line(current_line)
+                if save_track_played_to_db_from_log_line(current_line):
+                    saved += 1
+
+        # Position avancée seulement une fois les lignes enregistrées (même transaction)
+        state.save()
+    return saved
 
 
 def save_track_played_to_db_from_log_line(track_line_log):
@@ -232,37 +253,22 @@ def save_track_played_to_db_from_log_line(track_line_log):
 
         # Get the track info part (after last '|')
         track_info = parts[-1].strip()
-        # Split on ' - ' (with spaces)
-        track_fields = [f.strip() for f in track_info.split(' - ')]
-
-        artist_name = None
-        track_title = None
-        initial_key = None
-        energy = None
-
-        if len(track_fields) == 2:
-            # Format: ARTIST - TITLE
-            artist_name = track_fields[0]
-            track_title = track_fields[1]
-        elif len(track_fields) == 4:
-            # Format: ARTIST - TITLE - KEY - ENERGY
-            artist_name = track_fields[0]
-            track_title = f"{track_fields[1]} - {track_fields[2]} - {track_fields[3]}"
-            initial_key = track_fields[2]
-            energy = track_fields[3]
-        else:
-            logger.info('Unexpected track field count: %s', track_fields)
+        artist_and_title = get_artist_and_title_from_track_info(track_info)
+        if artist_and_title is None:
+            logger.info('Unexpected track field count: %s', track_info)
             return False
+        artist_name, track_title = artist_and_title
 
         logger.info(f"track_title : {track_title}")
         logger.info(f"artist_name : {artist_name}")
-        if initial_key:
-            logger.info(f"initial_key : {initial_key}")
-        if energy:
-            logger.info(f"energy : {energy}")
 
         search_title = track_title
-        track = get_track_by_title_and_artist_name(search_title, artist_name)
+        track = resolve_track(search_title, artist_name, log_string=track_info)
+        if not Track.objects.filter(pk=track.id).exists():
+            # Track fusionnée ou supprimée par un autre process depuis le chargement de l'index
+            # (les clés étrangères sont vérifiées au commit: l'INSERT annulerait tout le lot)
+            invalidate_track_resolver_index()
+            track = resolve_track(search_title, artist_name, log_string=track_info)
         last_track_played = get_currently_playing_track_from_db()
 
         if last_track_played is not None and (track is None or track.id == last_track_played.id):
@@ -278,6 +284,21 @@ def save_track_played_to_db_from_log_line(track_line_log):
         logger.error('Error parsing log line: %s %s', track_line_log, e)
         return False
 
+
+def get_artist_and_title_from_track_info(track_info):
+    """(artiste, titre) d'une chaîne du log, None si le format est inattendu:
+    - ARTIST - TITLE
+    - ARTIST - TITLE - KEY - ENERGY (titre conservé avec clé et note, comme dans Traktor)
+    """
+    # Split on ' - ' (with spaces)
+    track_fields = [f.strip() for f in track_info.split(' - ')]
+    if len(track_fields) == 2:
+        return track_fields[0], track_fields[1]
+    if len(track_fields) == 4:
+        return track_fields[0], f"{track_fields[1]} - {track_fields[2]} - {track_fields[3]}"
+    return None
+
+
 def get_log_time_object_from_log_parts(parts):
     log_time_raw = parts[0].split(' ')[0]
     log_time_object = datetime.strptime(log_time_raw, '%d/%b/%Y:%H:%M:%S')
@@ -391,7 +412,7 @@ def get_more_transition_block_history(request, current_track_id=None):
 
 def get_playing_track_list_history(with_refresh=True, remove_last=True, current_track=None):
     if with_refresh:
-        refresh_currently_playing_from_log()
+        refresh_currently_playing_for_request()
     current_playlist = CurrentlyPlaying.objects.order_by('date_played')
 
     config = Config.get_config()
@@ -0,0 +1,148 @@
+"""
+Reprise de l'historique (CurrentlyPlaying) depuis des logs de playlist Icecast
+archivés (manage.py backfill_icecast): playlist.log.N, playlist.log.N.gz.
+
+Contrairement à save_track_played_to_db_from_log_line (une résolution, une requête
+"dernière track" et un INSERT par ligne), les lignes sont lues en flux et traitées
+par paquets de chunk_size:
+- chaque chaîne distincte du log est résolue une fois (index en mémoire et
+  résolutions mémorisées, cf. track_resolver)
+- les dates déjà présentes en base sont lues en une requête par paquet: une ligne
+  déjà enregistrée (même date) est ignorée, la reprise peut être relancée
+- les lignes restantes sont insérées par bulk_create
+
+Un fichier est repris dans une seule transaction: en cas d'erreur, rien n'est écrit.
+"""
+
+import gzip
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import CurrentlyPlaying
+from .currently_playing import get_artist_and_title_from_track_info, get_log_time_object_from_log_parts
+from .track_resolver import invalidate_track_resolver_index, resolve_track
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_CHUNK_SIZE = 1000
+
+# (date jouée, chaîne du log, artiste, titre)
+LogEntry = Tuple[datetime, str, str, str]
+
+
+def open_icecast_log(path: str):
+    """Log en texte, décompressé à la volée s'il est gzippé (.gz)."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
+
+
+def parse_backfill_line(line: str) -> Optional[LogEntry]:
+    """Comme save_track_played_to_db_from_log_line, sans log d'erreur par ligne
+    (les lignes invalides sont seulement comptées). None si la ligne est invalide."""
+    parts = line.strip().split('|')
+    if len(parts) < 4:
+        return None
+    try:
+        date_played = timezone.make_aware(get_log_time_object_from_log_parts(parts))
+    except ValueError:
+        return None
+    track_info = parts[-1].strip()
+    artist_and_title = get_artist_and_title_from_track_info(track_info)
+    if artist_and_title is None:
+        return None
+    return (date_played, track_info) + artist_and_title
+
+
+def backfill_icecast_log(path: str, chunk_size: int = BACKFILL_CHUNK_SIZE) -> Dict[str, int]:
+    """Enregistre dans CurrentlyPlaying les morceaux du log `path` absents de la base.
+
+    Comme à la lecture du log en direct, un morceau identique au précédent (le
+    précédent dans le fichier, ou la dernière écoute en base avant la première
+    ligne) n'est pas enregistré une deuxième fois.
+
+    Returns: statistiques {'lines', 'invalid', 'duplicates', 'repeats', 'inserted', 'resolved_strings'}
+    """
+    stats = {'lines': 0, 'invalid': 0, 'duplicates': 0, 'repeats': 0, 'inserted': 0, 'resolved_strings': 0}
+    try:
+        with transaction.atomic(), open_icecast_log(path) as log_file:
+            backfill = _Backfill(stats)
+            for chunk in _read_chunks(log_file, chunk_size, stats):
+                backfill.save_chunk(chunk, chunk_size)
+    except BaseException:
+        # Les tracks et artistes créés pendant la résolution ont été annulés
+        invalidate_track_resolver_index()
+        raise
+    logger.info("Reprise de %s: %s", path, stats)
+    return stats
+
+
+def _read_chunks(log_file, chunk_size: int, stats: Dict[str, int]) -> Iterator[List[LogEntry]]:
+    chunk: List[LogEntry] = []
+    for line in log_file:
+        if not line.strip():
+            continue
+        stats['lines'] += 1
+        entry = parse_backfill_line(line)
+        if entry is None:
+            stats['invalid'] += 1
+            continue
+        chunk.append(entry)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Backfill:
+    """État d'une reprise entre deux paquets: dates vues et dernière track."""
+
+    def __init__(self, stats: Dict[str, int]):
+        self.stats = stats
+        self.track_ids: Dict[str, int] = {}
+        self.seen_dates = set()
+        self.last_track_id: Optional[int] = None
+        self.started = False
+
+    def save_chunk(self, chunk: List[LogEntry], batch_size: int) -> None:
+        dates = [entry[0] for entry in chunk]
+        existing = dict(
+            CurrentlyPlaying.objects.filter(date_played__range=(min(dates), max(dates)))
+            .values_list('date_played', 'track_id')
+        )
+        if not self.started:
+            self.started = True
+            self.last_track_id = (
+                CurrentlyPlaying.objects.filter(date_played__lt=min(dates))
+                .order_by('-date_played').values_list('track_id', flat=True).first()
+            )
+
+        rows = []
+        for date_played, track_info, artist_name, track_title in chunk:
+            if date_played in existing or date_played in self.seen_dates:
+                self.stats['duplicates'] += 1
+                self.last_track_id = existing.get(date_played, self.last_track_id)
+                continue
+            self.seen_dates.add(date_played)
+            track_id = self._resolve(track_info, artist_name, track_title)
+            if track_id == self.last_track_id:
+                self.stats['repeats'] += 1
+                continue
+            self.last_track_id = track_id
+            rows.append(CurrentlyPlaying(track_id=track_id, date_played=date_played))
+
+        CurrentlyPlaying.objects.bulk_create(rows, batch_size=batch_size)
+        self.stats['inserted'] += len(rows)
+
+    def _resolve(self, track_info: str, artist_name: str, track_title: str) -> int:
+        track_id = self.track_ids.get(track_info)
+        if track_id is None:
+            track_id = resolve_track(track_title, artist_name, log_string=track_info).id
+            self.track_ids[track_info] = track_id
+            self.stats['resolved_strings'] += 1
+        return track_id
@@ -0,0 +1,86 @@
+"""
+Lecture incrémentale du log de playlist Icecast (Config.rubi_icecast_playlist_file):
+seules les lignes ajoutées depuis la lecture précédente sont lues puis parsées.
+La position de lecture (octet et inode du fichier) est persistée dans IcecastLogState.
+"""
+
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from django.utils import timezone
+
+from ..models import IcecastLogState
+
+logger = logging.getLogger(__name__)
+
+# Nom de l'ancien log après rotation (logrotate): sa fin non lue est reprise
+ROTATED_LOG_SUFFIX = '.1'
+
+
+def read_new_log_lines(path: str, state: IcecastLogState) -> Optional[List[str]]:
+    """Lignes complètes ajoutées au log `path` depuis la position `state`, qui est
+    avancée (sans être sauvegardée: à l'appelant de le faire une fois les lignes traitées).
+
+    - rotation (inode différent de celui mémorisé): fin non lue de l'ancien fichier
+      (path + ROTATED_LOG_SUFFIX, s'il a l'inode mémorisé), puis le nouveau depuis le début
+    - troncature (fichier plus court que la position): relecture depuis le début
+    - une dernière ligne sans fin de ligne (en cours d'écriture par Icecast) est
+      laissée pour la lecture suivante
+
+    Returns: lignes (avec fin de ligne), None si le log est illisible
+    """
+    lines: List[str] = []
+    try:
+        with open(path, 'rb') as log_file:
+            stat = os.fstat(log_file.fileno())
+            offset = state.offset
+            if state.inode is not None and stat.st_ino != state.inode:
+                logger.info("Rotation du playlist log %s détectée, lecture depuis le début", path)
+                lines = _read_rotated_tail(path + ROTATED_LOG_SUFFIX, state)
+                offset = 0
+            elif stat.st_size < offset:
+                logger.info("Playlist log %s tronqué (%s < %s octets), lecture depuis le début", path, stat.st_size, offset)
+                offset = 0
+            log_file.seek(offset)
+            data = log_file.read()
+    except OSError:
+        return None
+
+    complete = data[:data.rfind(b'\n') + 1]
+    state.inode = stat.st_ino
+    state.offset = offset + len(complete)
+    lines.extend(_decode_lines(complete))
+    return lines
+
+
+def _read_rotated_tail(rotated_path: str, state: IcecastLogState) -> List[str]:
+    """Lignes de l'ancien log écrites après la dernière lecture (avant sa rotation)."""
+    try:
+        with open(rotated_path, 'rb') as rotated_file:
+            if os.fstat(rotated_file.fileno()).st_ino != state.inode:
+                return []
+            rotated_file.seek(state.offset)
+            # L'ancien fichier n'est plus écrit: sa dernière ligne est complète
+            return _decode_lines(rotated_file.read())
+    except OSError:
+        return []
+
+
+def _decode_lines(data: bytes) -> List[str]:
+    return data.decode('utf-8', errors='replace').splitlines(keepends=True)
+
+
+def log_file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """(inode, taille) du log, None s'il est absent: tant que la signature ne change
+    pas, il n'y a rien de nouveau à lire (scrutation de manage.py ingest_icecast)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size
+
+
+def record_ingest_heartbeat(path: str) -> None:
+    """Date du dernier passage de manage.py ingest_icecast (IcecastLogState.heartbeat_at)."""
+    IcecastLogState.objects.update_or_create(path=path, defaults={'heartbeat_at': timezone.now()})
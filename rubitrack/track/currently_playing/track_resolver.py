@@ -0,0 +1,276 @@
+"""
+Résolution en mémoire des lignes du log Icecast ("Artiste - Titre") vers une Track.
+
+Même cascade que track_db_service.get_track_by_title_and_artist_name (exact, exact
+original, insensible à la casse, 1 caractère d'écart, icontains, puis par artiste:
+titre exact, dernier caractère retiré, 1 caractère d'écart, icontains, titre-base),
+mais sur un index chargé une fois par process: une ligne connue se résout sans
+requête SQL. Ce que l'index ne résout pas (artiste ou track inconnus) repasse par
+la cascade en base, qui crée l'artiste/la track si besoin. Les résolutions mémorisées
+(IcecastTrackResolution) sont chargées avec l'index et consultées en premier.
+
+L'index est tenu à jour par les signaux Track/Artist/IcecastTrackResolution du
+process (ajout direct des créations, rechargement après modification ou suppression)
+et, pour les écritures d'autres process ou en masse (import, bulk_create), par une
+empreinte (nombre et id max des tracks et artistes, dernière résolution modifiée)
+revérifiée au plus toutes les RESOLVER_STAMP_CHECK_SECONDS.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..duplicate.detection import normalize_title_base
+from ..models import Artist, IcecastTrackResolution, Track
+from ..near_match import NearMatchIndex
+from ..track_db_service import (
+    create_artist_db,
+    create_track_db,
+    find_artist_db_from_artist_name,
+    find_track_db_from_title_artist,
+    get_track_by_title_and_artist_name,
+)
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de revérification de l'empreinte de la collection (écritures d'autres process)
+RESOLVER_STAMP_CHECK_SECONDS = 30
+
+RESOLUTION_LOG_STRING_MAX_LENGTH = IcecastTrackResolution._meta.get_field('log_string').max_length
+
+
+class TrackResolverIndex:
+    """Artistes et tracks de la base, indexés pour la cascade de résolution.
+
+    Les entrées sont des tuples (id, nom/titre), dans l'ordre des requêtes de la
+    cascade en base (artistes par id, tracks par position): à égalité, la même
+    entrée est retenue. Les instances renvoyées sont construites sans requête
+    (champs non indexés différés).
+    """
+
+    def __init__(self):
+        self.artists: List[Tuple[int, str]] = []
+        self.artists_by_name: Dict[str, Tuple[int, str]] = {}
+        self.artists_by_casefold: Dict[str, Tuple[int, str]] = {}
+        # Correspondances à 1 caractère près (comme is_similar_with_char_diff)
+        self.artists_near: NearMatchIndex[Tuple[int, str]] = NearMatchIndex()
+        self.tracks_by_artist: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+        # Construits à la première recherche approchée d'un artiste
+        self._tracks_near: Dict[int, NearMatchIndex[int]] = {}
+        self.tracks_by_title: Dict[Tuple[int, str], int] = {}
+        self.tracks_by_title_base: Dict[Tuple[int, str], int] = {}
+        # Résolutions mémorisées: chaîne du log -> (id track, id artiste)
+        self.resolutions: Dict[str, Tuple[int, int]] = {}
+        self.stamp: Dict[str, tuple] = {}
+
+    @classmethod
+    def load(cls) -> 'TrackResolverIndex':
+        start = time.perf_counter()
+        index = cls()
+        index.stamp = collection_stamp()
+        for artist_id, name in Artist.objects.order_by('pk').values_list('id', 'name').iterator(chunk_size=5000):
+            index.add_artist(artist_id, name)
+        tracks = Track.objects.order_by('position', 'pk').values_list('id', 'title', 'artist_id')
+        for track_id, title, artist_id in tracks.iterator(chunk_size=5000):
+            index.add_track(track_id, title, artist_id)
+        resolutions = IcecastTrackResolution.objects.values_list('log_string', 'track_id', 'track__artist_id')
+        for log_string, track_id, artist_id in resolutions.iterator(chunk_size=5000):
+            index.resolutions[log_string] = (track_id, artist_id)
+        logger.info(
+            "Index de résolution chargé: %s artistes, %s tracks en %.2fs",
+            len(index.artists), len(index.tracks_by_title), time.perf_counter() - start,
+        )
+        return index
+
+    def add_artist(self, artist_id: int, name: str) -> None:
+        entry = (artist_id, name)
+        self.artists_by_name.setdefault(name, entry)
+        self.artists_by_casefold.setdefault(name.lower(), entry)
+        self.artists_near.add(name, entry)
+        self.artists.append(entry)
+
+    def add_track(self, track_id: int, title: str, artist_id: int) -> None:
+        self.tracks_by_artist[artist_id].append((track_id, title))
+        self._tracks_near.pop(artist_id, None)
+        self.tracks_by_title.setdefault((artist_id, title), track_id)
+        title_base = normalize_title_base(title)
+        if title_base:
+            self.tracks_by_title_base.setdefault((artist_id, title_base), track_id)
+
+    def resolve_artist(self, artist_name: str) -> Tuple[Optional[Tuple[int, str]], Optional[str]]:
+        """(id, nom) de l'artiste et palier, comme find_artist_db_from_artist_name."""
+        original_name = artist_name
+        artist_name = artist_name.strip() or original_name
+
+        entry = (
+            self.artists_by_name.get(artist_name) or self.artists_by_name.get(original_name)
+            or self.artists_by_casefold.get(artist_name.lower())
+        )
+        if entry is not None:
+            return entry, IcecastTrackResolution.TIER_EXACT
+        entry = self.artists_near.find_first(artist_name)
+        if entry is not None:
+            logger.info('FOUND similar artist with 1 char difference: %s original: %s', entry[1], original_name)
+            return entry, IcecastTrackResolution.TIER_NEAR
+        for needle in dict.fromkeys((artist_name.lower(), original_name.lower())):
+            entry = next((a for a in self.artists if needle in a[1].lower()), None)
+            if entry is not None:
+                return entry, IcecastTrackResolution.TIER_CONTAINS
+        return None, None
+
+    def resolve_track_id(self, track_title: str, artist_id: int) -> Tuple[Optional[int], Optional[str]]:
+        """Id de la track de l'artiste et palier, comme find_track_db_from_title_artist."""
+        track_id = self.tracks_by_title.get((artist_id, track_title))
+        if track_id is not None:
+            return track_id, IcecastTrackResolution.TIER_EXACT
+        if track_title:
+            track_id = self.tracks_by_title.get((artist_id, track_title[:-1]))
+            if track_id is not None:
+                return track_id, IcecastTrackResolution.TIER_TRAILING_CHAR
+
+        artist_tracks = self.tracks_by_artist.get(artist_id, ())
+        if artist_tracks:
+            tracks_near = self._tracks_near.get(artist_id)
+            if tracks_near is None:
+                tracks_near = self._tracks_near[artist_id] = NearMatchIndex().add_all(
+                    (title, candidate_id) for candidate_id, title in artist_tracks
+                )
+            track_id = tracks_near.find_first(track_title)
+            if track_id is not None:
+                logger.info('FOUND with 1 char difference : %s original: %s', track_id, track_title)
+                return track_id, IcecastTrackResolution.TIER_NEAR
+
+        needle = track_title.lstrip().lower()
+        for candidate_id, title in artist_tracks:
+            if needle in title.lower():
+                return candidate_id, IcecastTrackResolution.TIER_CONTAINS
+
+        title_base = normalize_title_base(track_title)
+        track_id = self.tracks_by_title_base.get((artist_id, title_base)) if title_base else None
+        if track_id is not None:
+            return track_id, IcecastTrackResolution.TIER_TITLE_BASE
+        return None, None
+
+    def note_created(self, table: str, *lasts) -> None:
+        """Empreinte tenue à jour après une création ajoutée directement à l'index."""
+        count, *previous_lasts = self.stamp[table]
+        self.stamp[table] = (count + 1, *(
+            last if previous_last is None else max(previous_last, last)
+            for previous_last, last in zip(previous_lasts, lasts)
+        ))
+
+
+def collection_stamp() -> dict:
+    """Empreinte des tables indexées: change à chaque création, suppression ou
+    modification, y compris par un autre process (renommage dans l'admin, import
+    NML, fusion de doublons), via updated_at."""
+    tracks = Track.objects.aggregate(count=Count('id'), last=Max('id'), updated=Max('updated_at'))
+    artists = Artist.objects.aggregate(count=Count('id'), last=Max('id'), updated=Max('updated_at'))
+    resolutions = IcecastTrackResolution.objects.aggregate(count=Count('id'), last=Max('updated_at'))
+    return {
+        'track': (tracks['count'], tracks['last'], tracks['updated']),
+        'artist': (artists['count'], artists['last'], artists['updated']),
+        'resolution': (resolutions['count'], resolutions['last']),
+    }
+
+
+_index: Optional[TrackResolverIndex] = None
+_index_checked_at = 0.0
+
+
+def get_track_resolver_index() -> TrackResolverIndex:
+    """Index du process, (re)chargé s'il est absent, invalidé ou si l'empreinte a changé."""
+    global _index, _index_checked_at
+    now = time.monotonic()
+    if _index is not None and now - _index_checked_at >= RESOLVER_STAMP_CHECK_SECONDS:
+        _index_checked_at = now
+        if _index.stamp != collection_stamp():
+            _index = None
+    if _index is None:
+        _index = TrackResolverIndex.load()
+        _index_checked_at = now
+    return _index
+
+
+def invalidate_track_resolver_index() -> None:
+    global _index
+    _index = None
+
+
+def resolve_track(track_title: str, artist_name: str, log_string: Optional[str] = None) -> Track:
+    """Track correspondant à une ligne du log (get_track_by_title_and_artist_name),
+    depuis l'index en mémoire; cascade en base (et création) si l'index ne trouve pas.
+
+    log_string: chaîne brute du log ("Artiste - Titre ..."). Sa résolution mémorisée
+    (IcecastTrackResolution) est prise avant toute recherche; à défaut, la résolution
+    obtenue est mémorisée avec son palier.
+    """
+    if artist_name is None or track_title is None:
+        return get_track_by_title_and_artist_name(track_title, artist_name)
+    index = get_track_resolver_index()
+    if log_string is not None:
+        log_string = log_string[:RESOLUTION_LOG_STRING_MAX_LENGTH]
+        cached = index.resolutions.get(log_string)
+        if cached is not None:
+            return Track.from_db(None, ['id', 'artist_id'], cached)
+
+    track, tier = _resolve(index, track_title.strip(), artist_name)
+    if log_string is not None:
+        IcecastTrackResolution.objects.get_or_create(
+            log_string=log_string, defaults={'track': track, 'match_tier': tier},
+        )
+    return track
+
+
+def _resolve(index: TrackResolverIndex, track_title: str, artist_name: str) -> Tuple[Track, str]:
+    artist, artist_tier = index.resolve_artist(artist_name)
+    if artist is not None:
+        artist_db = Artist.from_db(None, ['id', 'name'], artist)
+        track_id, track_tier = index.resolve_track_id(track_title, artist[0])
+        if track_id is not None:
+            track = Track.from_db(None, ['id', 'artist_id'], (track_id, artist[0]))
+            track.artist = artist_db
+            return track, IcecastTrackResolution.weakest_tier(artist_tier, track_tier)
+    else:
+        # Artiste inconnu de l'index (ou créé par un autre process depuis son chargement)
+        artist_db, artist_tier = find_artist_db_from_artist_name(artist_name)
+        if artist_db is None:
+            artist_db, artist_tier = create_artist_db(artist_name), IcecastTrackResolution.TIER_CREATED
+
+    track_db, track_tier = find_track_db_from_title_artist(track_title, artist_db)
+    if track_db is None:
+        track_db, track_tier = create_track_db(track_title, artist_db), IcecastTrackResolution.TIER_CREATED
+    return track_db, IcecastTrackResolution.weakest_tier(artist_tier, track_tier)
+
+
+@receiver(post_save, sender=Artist)
+@receiver(post_save, sender=Track)
+@receiver(post_save, sender=IcecastTrackResolution)
+def _update_index_on_save(sender, instance, created, raw=False, **kwargs):
+    if _index is None or raw:
+        return
+    if not created:
+        invalidate_track_resolver_index()
+        return
+    # Création (ex: track inconnue créée par la cascade): ajout direct, sans rechargement
+    if sender is Artist:
+        _index.add_artist(instance.pk, instance.name)
+        _index.note_created('artist', instance.pk, instance.updated_at)
+    elif sender is Track:
+        _index.add_track(instance.pk, instance.title, instance.artist_id)
+        _index.note_created('track', instance.pk, instance.updated_at)
+    else:
+        _index.resolutions[instance.log_string] = (instance.track_id, instance.track.artist_id)
+        _index.note_created('resolution', instance.updated_at)
+
+
+@receiver(post_delete, sender=Artist)
+@receiver(post_delete, sender=Track)
+@receiver(post_delete, sender=IcecastTrackResolution)
+def _invalidate_index_on_delete(sender, **kwargs):
+    invalidate_track_resolver_index()
@@ -3,9 +3,10 @@ import logging
 from django import forms
 from django.db import transaction
 from django.shortcuts import render, redirect
+from django.utils import timezone
 
 from ..models import (
-    CurrentlyPlaying, MergeLog, PlaylistTrack, Track, Transition,
+    CurrentlyPlaying, IcecastTrackResolution, MergeLog, PlaylistTrack, Track, Transition,
 )
 
 logger = logging.getLogger(__name__)
@@ -60,7 +61,7 @@ def merge_duplicate_tracks(track_a_id: int, track_b_id: int):
     - champs simples: coalesce (A prioritaire), playcount = somme,
       ranking / date_last_played = max
     - cue points: union PAR SLOT (les slots vides de A sont comblés par B)
-    - transitions / playlists / CurrentlyPlaying: réaffectés à A
+    - transitions / playlists / CurrentlyPlaying / résolutions du log Icecast: réaffectés à A
     - MergeLog: snapshot de B (les DuplicateCandidate impliquant B partent en cascade)
     """
     track_a = Track.objects.get(id=track_a_id)
@@ -111,6 +112,10 @@ def merge_duplicate_tracks(track_a_id: int, track_b_id: int):
 
     # --- Historique de lecture: réaffectation par FK
     CurrentlyPlaying.objects.filter(track=track_b).update(track=track_a)
+    # Les chaînes du log Icecast résolues vers B désignent désormais A
+    IcecastTrackResolution.objects.filter(track=track_b).update(
+        track=track_a, match_tier=IcecastTrackResolution.TIER_MERGED, updated_at=timezone.now(),
+    )
 
     # --- Playlists: B remplacé par A à la même position
     for entry in PlaylistTrack.objects.filter(track=track_b):
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from track.currently_playing.icecast_backfill import BACKFILL_CHUNK_SIZE, backfill_icecast_log
+
+
+class Command(BaseCommand):
+    help = (
+        "Reprend l'historique des morceaux joués (CurrentlyPlaying) depuis des logs de playlist "
+        "Icecast archivés, gzippés ou non. Les lignes déjà en base (même date) sont ignorées"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+',
+                            help="Logs à reprendre, du plus ancien au plus récent (playlist.log.3.gz playlist.log.2 ...)")
+        parser.add_argument('--chunk-size', type=int, default=BACKFILL_CHUNK_SIZE,
+                            help="Lignes traitées (et insérées) par paquet")
+
+    def handle(self, *args, **options):
+        for path in options['files']:
+            stats = backfill_icecast_log(path, chunk_size=options['chunk_size'])
+            self.stdout.write(
+                f"{path}: {stats['inserted']} morceau(x) enregistré(s) sur {stats['lines']} ligne(s) "
+                f"({stats['duplicates']} déjà en base, {stats['repeats']} répétition(s), "
+                f"{stats['invalid']} invalide(s), {stats['resolved_strings']} chaîne(s) résolue(s))"
+            )
@@ -0,0 +1,76 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from track.collection.import_benchmark import BENCHMARK_SIZES, find_regressions, run_import_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de l'import collection.nml sur des collections synthétiques "
+        "(temps, requêtes SQL, pic mémoire), dans une base de test créée pour l'occasion"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=list(BENCHMARK_SIZES),
+                            help="Nombres d'ENTRY à générer")
+        parser.add_argument('--cues', type=int, default=4, help="Cue points par track")
+        parser.add_argument('--playlists', type=int, default=200)
+        parser.add_argument('--tracks-per-playlist', type=int, default=40)
+        parser.add_argument('--duplicate-ratio', type=float, default=0.02, help="Part d'ENTRY en double")
+        parser.add_argument('--key-suffix-ratio', type=float, default=0.3,
+                            help="Part de titres suffixés ' - Clé - Note'")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--parse-workers', type=int, default=None,
+                            help="Processus de lecture des ENTRY (IMPORT_PARSE_WORKERS par défaut; "
+                                 "la passe mémoire lit toujours dans le processus courant)")
+        parser.add_argument('--no-memory', action='store_true', help="Sans la passe de mesure mémoire")
+        parser.add_argument('--output', help="Ecrit le rapport JSON dans ce fichier")
+        parser.add_argument('--baseline', help="Rapport JSON de référence: échec si une mesure régresse")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Marge tolérée par rapport à --baseline (0.25 = +25%%)")
+
+    def handle(self, *args, **options):
+        # Base de test dédiée (test_<NAME>, même moteur): la base réelle n'est pas touchée
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        import_logger = logging.getLogger('track.collection')
+        log_level = import_logger.level
+        if options['verbosity'] < 2:
+            import_logger.setLevel(logging.ERROR)  # une ligne par track créée fausserait les temps
+        try:
+            report = run_import_benchmark(
+                options['sizes'],
+                measure_memory=not options['no_memory'],
+                parse_workers=options['parse_workers'],
+                cues_per_track=options['cues'],
+                playlists=options['playlists'],
+                tracks_per_playlist=options['tracks_per_playlist'],
+                duplicate_ratio=options['duplicate_ratio'],
+                key_suffix_ratio=options['key_suffix_ratio'],
+                seed=options['seed'],
+            )
+        finally:
+            import_logger.setLevel(log_level)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        for size, stages in report.items():
+            self.stdout.write(f"{size} entrées")
+            for stage, measures in stages.items():
+                memory = f" — pic {measures['peak_memory_mb']} Mo" if 'peak_memory_mb' in measures else ''
+                self.stdout.write(
+                    f"  {stage:<14} {measures['seconds']:>8.2f}s  {measures['queries']:>6} requêtes{memory}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = find_regressions(report, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Régressions:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Aucune régression par rapport à la référence"))
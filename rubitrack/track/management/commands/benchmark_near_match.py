@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from track.collection.import_benchmark import find_regressions
+from track.near_match_benchmark import BENCHMARK_SIZES, run_near_match_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark des correspondances approchées (artiste à 1 caractère près): ancienne "
+        "distance d'édition, distance bornée et index par suppressions, sur des noms synthétiques"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=list(BENCHMARK_SIZES),
+                            help="Nombres de noms d'artistes générés")
+        parser.add_argument('--queries', type=int, default=60, help="Recherches par taille")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-reference', action='store_true',
+                            help="Sans l'ancienne distance d'édition (lente sur les grandes tailles)")
+        parser.add_argument('--output', help="Ecrit le rapport JSON dans ce fichier")
+        parser.add_argument('--baseline', help="Rapport JSON de référence: échec si une mesure régresse")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Marge tolérée par rapport à --baseline (0.25 = +25%%)")
+
+    def handle(self, *args, **options):
+        report = run_near_match_benchmark(
+            options['sizes'], queries=options['queries'], seed=options['seed'],
+            reference=not options['no_reference'],
+        )
+
+        for size, stages in report.items():
+            self.stdout.write(f"{size} noms")
+            for stage, measures in stages.items():
+                if 'seconds' in measures:
+                    self.stdout.write(f"  {stage:<15} {measures['seconds']:>10.3f}s")
+                else:
+                    self.stdout.write(
+                        f"  {stage:<15} {measures['us_per_query']:>10.1f} µs/recherche  {measures['matched']} trouvés"
+                    )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = find_regressions(report, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Régressions:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Aucune régression par rapport à la référence"))
@@ -0,0 +1,80 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from track.collection.import_benchmark import find_regressions
+from track.collection.rekordbox.sync_benchmark import BENCHMARK_SIZES, run_sync_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de la synchronisation Rekordbox sur des exports synthétiques "
+        "(temps, requêtes SQL, pic RSS, temps par étape), dans une base de test créée pour l'occasion"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=list(BENCHMARK_SIZES),
+                            help="Nombres de tracks Rubitrack (ENTRY de la collection.nml générée)")
+        parser.add_argument('--cues', type=int, default=4, help="Cue points par track Rubitrack")
+        parser.add_argument('--rubitrack-playlists', type=int, default=200)
+        parser.add_argument('--rekordbox-playlists', type=int, default=50)
+        parser.add_argument('--tracks-per-playlist', type=int, default=40)
+        parser.add_argument('--marks', type=int, default=2, help="POSITION_MARK existants par TRACK Rekordbox")
+        parser.add_argument('--unmatched-ratio', type=float, default=0.05,
+                            help="TRACK Rekordbox absents de Rubitrack (part du nombre de tracks)")
+        parser.add_argument('--typo-ratio', type=float, default=0.01,
+                            help="Part de titres Rekordbox avec faute de frappe (suggestions approximatives)")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--in-memory', action='store_true',
+                            help="Synchronisation avec le fichier entier en mémoire (streaming=False)")
+        parser.add_argument('--output', help="Ecrit le rapport JSON dans ce fichier")
+        parser.add_argument('--baseline', help="Rapport JSON de référence: échec si une mesure régresse")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Marge tolérée par rapport à --baseline (0.25 = +25%%)")
+
+    def handle(self, *args, **options):
+        # Base de test dédiée (test_<NAME>, même moteur): la base réelle n'est pas touchée
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        sync_logger = logging.getLogger('track.collection')
+        log_level = sync_logger.level
+        if options['verbosity'] < 2:
+            sync_logger.setLevel(logging.ERROR)  # une ligne par track importée ou non trouvée fausserait les temps
+        try:
+            report = run_sync_benchmark(
+                options['sizes'],
+                streaming=not options['in_memory'],
+                cues_per_track=options['cues'],
+                rubitrack_playlists=options['rubitrack_playlists'],
+                tracks_per_playlist=options['tracks_per_playlist'],
+                seed=options['seed'],
+                playlists=options['rekordbox_playlists'],
+                marks_per_track=options['marks'],
+                unmatched_ratio=options['unmatched_ratio'],
+                typo_ratio=options['typo_ratio'],
+            )
+        finally:
+            sync_logger.setLevel(log_level)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        for size, stages in report.items():
+            self.stdout.write(f"{size} tracks")
+            for stage, measures in stages.items():
+                phases = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in measures['phases'].items())
+                self.stdout.write(
+                    f"  {stage:<10} {measures['seconds']:>8.2f}s  {measures['queries']:>6} requêtes  "
+                    f"pic RSS {measures['peak_rss_mb']} Mo  {measures['matched']} matchées  ({phases})"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = find_regressions(report, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Régressions:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Aucune régression par rapport à la référence"))
@@ -0,0 +1,70 @@
+import cProfile
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from track.collection.import_collection import IMPORT_STAGES, ImportStageTimer, handle_uploaded_file
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe un collection.nml Traktor (même traitement que la page d'import) "
+        "et affiche le temps et les requêtes SQL de chaque étape"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Chemin du collection.nml")
+        parser.add_argument('--user', required=True, help="Utilisateur propriétaire de la collection")
+        parser.add_argument('--dry-run', action='store_true', help="Import complet puis annulation (rien n'est écrit)")
+        parser.add_argument('--full', action='store_true', help="Réimporter aussi les entrées inchangées")
+        parser.add_argument('--parse-workers', type=int, default=None,
+                            help="Processus de lecture des ENTRY (IMPORT_PARSE_WORKERS par défaut)")
+        parser.add_argument('--profile', metavar='FICHIER',
+                            help="Ecrit un profil cProfile du processus principal (python -m pstats FICHIER)")
+
+    def handle(self, *args, **options):
+        path = options['file']
+        if not os.path.isfile(path):
+            raise CommandError(f"Fichier introuvable: {path}")
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f"Utilisateur inconnu: {options['user']}")
+
+        timer = ImportStageTimer()
+        stats = {}
+        profiler = cProfile.Profile() if options['profile'] else None
+        start = time.perf_counter()
+        with transaction.atomic(), timer.count_queries():
+            if profiler:
+                profiler.enable()
+            try:
+                cptNewTracks, cptExistingTracks = handle_uploaded_file(
+                    path, user, stats=stats, incremental=not options['full'],
+                    parse_workers=options['parse_workers'], timer=timer,
+                )
+            finally:
+                if profiler:
+                    profiler.disable()
+            if options['dry_run']:
+                transaction.set_rollback(True)
+        total_seconds = time.perf_counter() - start
+
+        for stage in (*IMPORT_STAGES, 'other'):
+            if stage == 'other' and not timer.queries[stage]:
+                continue
+            self.stdout.write(f"  {stage:<11} {timer.seconds[stage]:>8.2f}s  {timer.queries[stage]:>6} requêtes")
+        self.stdout.write(f"  {'total':<11} {total_seconds:>8.2f}s  {sum(timer.queries.values()):>6} requêtes")
+
+        if profiler:
+            profiler.dump_stats(options['profile'])
+            self.stdout.write(f"Profil écrit dans {options['profile']}")
+
+        outcome = "Import simulé (--dry-run, annulé)" if options['dry_run'] else "Import terminé"
+        self.stdout.write(self.style.SUCCESS(
+            f"{outcome}: {cptNewTracks} nouvelles, {stats['nb_changed']} modifiées, "
+            f"{stats['nb_unchanged']} inchangées — {stats['cue_points_created']} cue points créés, "
+            f"{stats['cue_points_updated']} mis à jour, {stats['cue_points_deleted']} supprimés"
+        ))
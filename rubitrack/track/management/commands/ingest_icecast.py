@@ -0,0 +1,58 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from track.currently_playing.currently_playing import refresh_currently_playing_from_log
+from track.currently_playing.icecast_log import log_file_signature, record_ingest_heartbeat
+from track.models import Config
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Suit le playlist log Icecast et enregistre les morceaux joués (CurrentlyPlaying) au fil "
+        "de l'eau, hors requête HTTP. Activer Config.icecast_ingest_daemon pour que les pages "
+        "currently playing ne lisent plus le log"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Lit les nouvelles lignes puis s'arrête (cron)")
+        parser.add_argument('--interval', type=float, default=1.0, help="Secondes entre deux scrutations du log")
+        parser.add_argument('--heartbeat', type=float, default=30.0,
+                            help="Secondes entre deux enregistrements du heartbeat (IcecastLogState.heartbeat_at)")
+
+    def handle(self, *args, **options):
+        last_signature = None
+        last_heartbeat = None
+        while True:
+            close_old_connections()
+            try:
+                now = time.monotonic()
+                if last_heartbeat is None or now - last_heartbeat >= options['heartbeat']:
+                    # Relit aussi la config: le chemin du log a pu changer dans l'admin
+                    Config.clear_cache()
+                    record_ingest_heartbeat(Config.get_config().rubi_icecast_playlist_file)
+                    last_heartbeat = now
+
+                path = Config.get_config().rubi_icecast_playlist_file
+                signature = log_file_signature(path)
+                # Log inchangé (même inode, même taille) ou absent: rien à lire, pas de requête SQL
+                if signature is not None and signature != last_signature:
+                    saved = refresh_currently_playing_from_log()
+                    if saved:
+                        self.stdout.write(f"{saved} morceau(x) enregistré(s) depuis {path}")
+                # Avancée seulement après un passage réussi: en cas d'erreur, le log est relu au suivant
+                last_signature = signature
+            except Exception:
+                if options['once']:
+                    raise
+                # Les pages ne lisent plus le log (icecast_ingest_daemon): le daemon ne doit pas s'arrêter
+                logger.exception("Erreur pendant le suivi du playlist log Icecast, nouvel essai")
+                close_old_connections()
+
+            if options['once']:
+                return
+            time.sleep(options['interval'])
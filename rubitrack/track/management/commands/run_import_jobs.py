@@ -0,0 +1,51 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from track.collection.import_jobs import claim_next_import_job, run_import_job
+from track.models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Exécute les imports de collection en attente (ImportJob), hors requête HTTP"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Traite les jobs en attente puis s'arrête (cron)")
+        parser.add_argument('--interval', type=float, default=5.0, help="Secondes entre deux scrutations")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                job = claim_next_import_job()
+            except Exception:
+                if options['once']:
+                    raise
+                logger.exception("Erreur en réclamant un import en attente, nouvel essai")
+                close_old_connections()
+                time.sleep(options['interval'])
+                continue
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+
+            try:
+                job = run_import_job(job)
+            except Exception:
+                # L'échec d'un job ne doit pas arrêter le worker: les jobs suivants restent à traiter
+                logger.exception("Import job #%s interrompu", job.pk)
+                close_old_connections()
+                self.stderr.write(f"Import #{job.pk} interrompu (voir les logs)")
+                continue
+            if job.status == ImportJob.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Import #{job.pk} terminé: {job.stats.get('nb_new', 0)} nouvelles, "
+                    f"{job.stats.get('nb_changed', 0)} modifiées, {job.stats.get('nb_unchanged', 0)} inchangées"
+                ))
+            else:
+                self.stderr.write(f"Import #{job.pk} en échec: {job.error}")
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from track.collection.rekordbox.synchronize_rekordbox_collection import (
+    PLAYLIST_EXPORT_ALL,
+    PLAYLIST_EXPORT_FILTERS,
+    rekordbox_target_name,
+    synchronize_rekordbox_targets,
+)
+from track.collection.rekordbox.views import build_targets_archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Synchronise plusieurs exports Rekordbox (un par machine) en une passe: données "
+        "Rubitrack lues une fois, fichiers traités en parallèle, un ZIP avec un dossier par machine"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help="Exports Rekordbox (le nom du fichier identifie la machine)")
+        parser.add_argument('--output', required=True, help="Archive ZIP à écrire")
+        parser.add_argument('--mode', choices=('overwrite', 'add_only'), default='overwrite')
+        parser.add_argument('--delta', action='store_true', help="Ne réécrire que les tracks modifiées")
+        parser.add_argument('--playlists', choices=PLAYLIST_EXPORT_FILTERS, default=PLAYLIST_EXPORT_ALL,
+                            help="Playlists exportées dans le dossier Rubitrack")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Processus de traitement (SYNC_TARGET_WORKERS par défaut)")
+
+    def handle(self, *args, **options):
+        names = [rekordbox_target_name(path) for path in options['files']]
+        for path in options['files']:
+            if not os.path.isfile(path):
+                raise CommandError(f"Fichier introuvable: {path}")
+        if len(set(names)) != len(names):
+            raise CommandError("Deux fichiers portent le même nom: le nom identifie la machine synchronisée")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            targets = [
+                (name, path, os.path.join(tmp_dir, f'{index}_output.xml'))
+                for index, (name, path) in enumerate(zip(names, options['files']))
+            ]
+            start = time.perf_counter()
+            report = synchronize_rekordbox_targets(
+                targets, mode=options['mode'], delta=options['delta'],
+                playlist_filter=options['playlists'], workers=options['workers'],
+            )
+            seconds = time.perf_counter() - start
+
+            for name, stats in report.items():
+                if stats['success']:
+                    self.stdout.write(
+                        f"  {name}: {stats['tracks_found_and_matched']} matchées, "
+                        f"{stats['tracks_updated_with_cue_points']} mises à jour, "
+                        f"{len(stats['unmatched_rekordbox_tracks'])} non trouvées"
+                    )
+                else:
+                    self.stderr.write(f"  {name}: {stats.get('error', 'Erreur inconnue')}")
+            succeeded = [(name, output_path) for name, _, output_path in targets if report[name]['success']]
+            if not succeeded:
+                raise CommandError("Aucun export synchronisé")
+
+            archive = build_targets_archive(report, succeeded, options['delta'], datetime.now().strftime('%Y%m%d'))
+            try:
+                with open(options['output'], 'wb') as f:
+                    for chunk in archive:
+                        f.write(chunk)
+            finally:
+                archive.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(succeeded)}/{len(targets)} exports synchronisés en {seconds:.2f}s, archive: {options['output']}"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track', '0032_config_overlay_max_transitions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, help_text="Empreinte de l'ENTRY Traktor au dernier import (les ENTRY inchangées sont ignorées)", max_length=40, null=True),
+        ),
+    ]
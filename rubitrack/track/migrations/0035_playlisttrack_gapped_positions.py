@@ -0,0 +1,38 @@
+# Positions PlaylistTrack espacées (POSITION_GAP): Playlist.set_tracks place un
+# ajout ou un déplacement entre ses voisines sans renuméroter la playlist.
+
+from django.db import migrations
+from django.db.models import F
+
+POSITION_GAP = 1024
+
+
+def spread_positions(apps, schema_editor):
+    """0, 1, 2... -> 1024, 2048, 3072... (ordre conservé, une seule requête)."""
+    PlaylistTrack = apps.get_model('track', 'PlaylistTrack')
+    PlaylistTrack.objects.update(position=(F('position') + 1) * POSITION_GAP)
+
+
+def compact_positions(apps, schema_editor):
+    """Retour aux positions contiguës 0, 1, 2... par playlist."""
+    PlaylistTrack = apps.get_model('track', 'PlaylistTrack')
+    rows = list(PlaylistTrack.objects.order_by('playlist_id', 'position'))
+    previous_playlist_id = None
+    for row in rows:
+        if row.playlist_id != previous_playlist_id:
+            previous_playlist_id = row.playlist_id
+            position = 0
+        row.position = position
+        position += 1
+    PlaylistTrack.objects.bulk_update(rows, ['position'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track', '0034_importjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_positions, compact_positions),
+    ]
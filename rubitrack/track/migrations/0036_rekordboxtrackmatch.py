@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track', '0035_playlisttrack_gapped_positions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RekordboxTrackMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rekordbox_track_id', models.CharField(help_text='TrackID du TRACK Rekordbox', max_length=32, unique=True)),
+                ('location', models.TextField(blank=True, default='', help_text='Attribut Location du TRACK')),
+                ('signature', models.CharField(help_text='sha1 de Location/Artist/Name au moment du match', max_length=40)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rekordbox_matches', to='track.track')),
+            ],
+            options={
+                'ordering': ['rekordbox_track_id'],
+            },
+        ),
+    ]
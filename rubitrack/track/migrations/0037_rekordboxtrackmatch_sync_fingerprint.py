@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track', '0036_rekordboxtrackmatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rekordboxtrackmatch',
+            name='sync_fingerprint',
+            field=models.CharField(blank=True, default='', help_text='sha1 des données Rubitrack écrites dans le TRACK (cues, bpm, clé, note, commentaire...)', max_length=40),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track', '0037_rekordboxtrackmatch_sync_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RekordboxPlaylistExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(help_text='sha1 du nom et des TrackID exportés', max_length=40)),
+                ('exported_at', models.DateTimeField(auto_now=True)),
+                ('playlist', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rekordbox_export', to='track.playlist')),
+            ],
+        ),
+    ]
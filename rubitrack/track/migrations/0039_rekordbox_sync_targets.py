@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track', '0038_rekordboxplaylistexport'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='rekordboxtrackmatch',
+            options={'ordering': ['target', 'rekordbox_track_id']},
+        ),
+        migrations.AddField(
+            model_name='rekordboxplaylistexport',
+            name='target',
+            field=models.CharField(blank=True, default='', help_text='Export Rekordbox synchronisé', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='rekordboxtrackmatch',
+            name='target',
+            field=models.CharField(blank=True, default='', help_text='Export Rekordbox synchronisé', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='rekordboxplaylistexport',
+            name='playlist',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rekordbox_exports', to='track.playlist'),
+        ),
+        migrations.AlterField(
+            model_name='rekordboxtrackmatch',
+            name='rekordbox_track_id',
+            field=models.CharField(help_text='TrackID du TRACK Rekordbox', max_length=32),
+        ),
+        migrations.AddConstraint(
+            model_name='rekordboxplaylistexport',
+            constraint=models.UniqueConstraint(fields=('target', 'playlist'), name='unique_rekordbox_target_playlist'),
+        ),
+        migrations.AddConstraint(
+            model_name='rekordboxtrackmatch',
+            constraint=models.UniqueConstraint(fields=('target', 'rekordbox_track_id'), name='unique_rekordbox_target_track'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track', '0039_rekordbox_sync_targets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IcecastLogState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, unique=True)),
+                ('inode', models.BigIntegerField(blank=True, null=True)),
+                ('offset', models.BigIntegerField(default=0, help_text='Octets déjà lus (fin de la dernière ligne complète)')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
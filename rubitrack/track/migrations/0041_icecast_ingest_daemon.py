@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track', '0040_icecastlogstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='config',
+            name='icecast_ingest_daemon',
+            field=models.BooleanField(default=False, help_text='Le log Icecast est lu par manage.py ingest_icecast: les pages currently playing lisent seulement la base (sinon chaque rafraîchissement lit le log)'),
+        ),
+        migrations.AddField(
+            model_name='icecastlogstate',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Dernier passage de manage.py ingest_icecast', null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track', '0041_icecast_ingest_daemon'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IcecastTrackResolution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_string', models.CharField(max_length=500, unique=True)),
+                ('match_tier', models.CharField(choices=[('exact', 'Exacte'), ('trailing_char', 'Dernier caractère retiré'), ('near', "1 caractère d'écart"), ('contains', 'Contenu'), ('title_base', 'Titre-base'), ('created', 'Créée'), ('merged', 'Fusionnée'), ('manual', 'Manuelle')], db_index=True, max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='icecast_resolutions', to='track.track')),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+            },
+        ),
+    ]
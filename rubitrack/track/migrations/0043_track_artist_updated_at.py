@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track', '0042_icecasttrackresolution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artist',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
@@ -8,6 +8,8 @@ Ranking_CHOICES = ((1, 'Poor'), (2, 'Average'), (3, 'Good'), (4, 'Very Good'), (
 
 class Artist(models.Model):
     name = models.CharField(max_length=200)
+    # Dernière modification (y compris depuis un autre process): empreinte de l'index de résolution Icecast
+    updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)
 
     def __str__(self):
         return self.name
@@ -39,6 +41,10 @@ class Track(models.Model):
     audio_id = models.CharField(max_length=2000, blank=True, null=True, db_index=True)
     location_dir = models.CharField(max_length=2000, blank=True, null=True)
     file_path = models.CharField(max_length=2000, blank=True, null=True, db_index=True)
+    import_fingerprint = models.CharField(
+        max_length=40, blank=True, null=True,
+        help_text="Empreinte de l'ENTRY Traktor au dernier import (les ENTRY inchangées sont ignorées)"
+    )
 
     # all dates
     date_collection_created = models.DateTimeField('date added to collection', auto_now_add=True, blank=True, null=True)
@@ -52,6 +58,8 @@ class Track(models.Model):
         null=True,
     )
     date_last_played = models.DateTimeField('date last played', blank=True, null=True)
+    # Dernière écriture en base (save, et bulk_update de l'import qui le renseigne): voir collection_stamp
+    updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)
 
     def __repr__(self):
         return f'Track({self.title}, {self.artist.name}, {self.genre.name if self.genre else "N/A"}, {self.bpm if self.bpm else "N/A"}, {self.musical_key if self.musical_key else "N/A"}, {self.ranking if self.ranking else "N/A"})'
@@ -147,16 +155,46 @@ class Playlist(models.Model):
 
     def set_tracks(self, tracks):
         """Remplace le contenu de la playlist par `tracks`, dans cet ordre.
-        Les doublons sont dédupliqués (première occurrence conservée)."""
-        self.playlist_tracks.all().delete()
-        entries = []
-        seen = set()
-        for track in tracks:
-            if track.pk in seen:
-                continue
-            seen.add(track.pk)
-            entries.append(PlaylistTrack(playlist=self, track=track, position=len(entries)))
-        PlaylistTrack.objects.bulk_create(entries)
+        Les doublons sont dédupliqués (première occurrence conservée).
+
+        Mise à jour par diff: les lignes déjà à leur place ne sont pas réécrites,
+        seules les tracks retirées sont supprimées, les nouvelles insérées et les
+        déplacées repositionnées dans l'espace libre entre leurs voisines
+        (positions espacées de PlaylistTrack.POSITION_GAP). La playlist n'est
+        renumérotée que si cet espace est épuisé.
+
+        Returns: nombre de lignes PlaylistTrack écrites ou supprimées
+        """
+        wanted_ids = list(dict.fromkeys(track.pk for track in tracks))
+        current = {pt.track_id: pt for pt in self.playlist_tracks.all()}
+
+        wanted = set(wanted_ids)
+        removed = [pt.pk for track_id, pt in current.items() if track_id not in wanted]
+        if removed:
+            PlaylistTrack.objects.filter(pk__in=removed).delete()
+
+        # Les tracks déjà présentes dont l'ordre relatif est conservé (plus longue
+        # sous-suite croissante des positions actuelles) restent en place
+        kept = [current[track_id] for track_id in wanted_ids if track_id in current]
+        anchored = {id(pt) for pt in PlaylistTrack.longest_ordered_run(kept)}
+        entries = [current.get(track_id) or PlaylistTrack(playlist=self, track_id=track_id) for track_id in wanted_ids]
+        anchors = [pt.position if id(pt) in anchored else None for pt in entries]
+        positions = PlaylistTrack.fill_positions(anchors)
+        if positions is None:
+            positions = [(i + 1) * PlaylistTrack.POSITION_GAP for i in range(len(entries))]
+
+        moved = []
+        created = []
+        for pt, position in zip(entries, positions):
+            if pt.pk is None:
+                pt.position = position
+                created.append(pt)
+            elif pt.position != position:
+                pt.position = position
+                moved.append(pt)
+        PlaylistTrack.objects.bulk_update(moved, ['position'])
+        PlaylistTrack.objects.bulk_create(created)
+        return len(removed) + len(moved) + len(created)
 
 
 class PlaylistTrack(models.Model):
@@ -165,6 +203,10 @@ class PlaylistTrack(models.Model):
     track = models.ForeignKey(Track, on_delete=models.CASCADE, related_name='playlist_entries')
     position = models.PositiveIntegerField()
 
+    # Ecart entre deux positions consécutives: un déplacement ou un ajout prend une
+    # position libre entre ses voisines sans renuméroter la playlist
+    POSITION_GAP = 1024
+
     class Meta:
         ordering = ['position']
         constraints = [
@@ -177,6 +219,57 @@ class PlaylistTrack(models.Model):
     def __str__(self):
         return f"{self.playlist.name}[{self.position}] {self.track.title}"
 
+    @staticmethod
+    def longest_ordered_run(entries):
+        """Plus longue sous-suite de `entries` dont les positions sont croissantes
+        (O(n log n)): les entrées qui n'ont pas besoin de bouger."""
+        tails = []  # tails[k]: indice de la fin de la meilleure sous-suite de longueur k+1
+        previous = [None] * len(entries)
+        for i, entry in enumerate(entries):
+            lo, hi = 0, len(tails)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if entries[tails[mid]].position < entry.position:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            previous[i] = tails[lo - 1] if lo else None
+            if lo == len(tails):
+                tails.append(i)
+            else:
+                tails[lo] = i
+        run = []
+        i = tails[-1] if tails else None
+        while i is not None:
+            run.append(entries[i])
+            i = previous[i]
+        return run[::-1]
+
+    @classmethod
+    def fill_positions(cls, anchors):
+        """Complète une liste de positions où None marque une entrée à placer, en
+        répartissant chaque groupe entre ses voisines fixes (POSITION_GAP après la
+        dernière). None si l'espace libre ne suffit pas: il faut renuméroter."""
+        positions = list(anchors)
+        i = 0
+        while i < len(positions):
+            if positions[i] is not None:
+                i += 1
+                continue
+            end = i
+            while end < len(positions) and positions[end] is None:
+                end += 1
+            count = end - i
+            low = positions[i - 1] if i else 0
+            high = positions[end] if end < len(positions) else low + (count + 1) * cls.POSITION_GAP
+            step = (high - low) // (count + 1)
+            if step < 1:
+                return None
+            for k in range(count):
+                positions[i + k] = low + (k + 1) * step
+            i = end
+        return positions
+
 
 class Collection(models.Model):
     name = models.CharField(max_length=200, blank=True)
@@ -230,6 +323,69 @@ class CurrentlyPlaying(models.Model):
         return self.track.title + " - " + self.date_played.strftime("%H:%M:%S, %d/%m/%Y")
 
 
+class IcecastLogState(models.Model):
+    """
+    Position de lecture du log de playlist Icecast (Config.rubi_icecast_playlist_file):
+    chaque rafraîchissement ne lit que les octets ajoutés depuis `offset`. L'inode
+    détecte la rotation du log, une taille inférieure à `offset` sa troncature.
+    """
+    path = models.CharField(max_length=500, unique=True)
+    inode = models.BigIntegerField(null=True, blank=True)
+    offset = models.BigIntegerField(default=0, help_text="Octets déjà lus (fin de la dernière ligne complète)")
+    updated_at = models.DateTimeField(auto_now=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Dernier passage de manage.py ingest_icecast")
+
+    def __str__(self):
+        return f"{self.path} @ {self.offset}"
+
+
+class IcecastTrackResolution(models.Model):
+    """
+    Track retenue pour une chaîne du log Icecast ("Artiste - Titre - Clé - Note"),
+    consultée avant toute recherche approchée: une chaîne déjà vue donne toujours la
+    même track, même si la cascade de résolution change entre deux passages.
+    Réaffectée au survivant d'une fusion, supprimée avec sa track.
+    """
+    # Paliers de la cascade, du plus sûr au moins sûr
+    TIER_EXACT = 'exact'  # nom et titre identiques (casse de l'artiste ignorée)
+    TIER_TRAILING_CHAR = 'trailing_char'  # dernier caractère du titre en trop
+    TIER_NEAR = 'near'  # 1 caractère d'écart (artiste ou titre)
+    TIER_CONTAINS = 'contains'  # nom ou titre contenu dans celui de la base
+    TIER_TITLE_BASE = 'title_base'  # même titre sans le suffixe " - Clé - Note"
+    TIER_CREATED = 'created'  # introuvable: artiste ou track créé
+    TIER_MERGED = 'merged'  # track d'origine fusionnée dans celle-ci
+    TIER_MANUAL = 'manual'  # corrigée ou confirmée dans les outils
+    TIER_CHOICES = (
+        (TIER_EXACT, 'Exacte'),
+        (TIER_TRAILING_CHAR, 'Dernier caractère retiré'),
+        (TIER_NEAR, '1 caractère d\'écart'),
+        (TIER_CONTAINS, 'Contenu'),
+        (TIER_TITLE_BASE, 'Titre-base'),
+        (TIER_CREATED, 'Créée'),
+        (TIER_MERGED, 'Fusionnée'),
+        (TIER_MANUAL, 'Manuelle'),
+    )
+    CASCADE_TIERS = (TIER_EXACT, TIER_TRAILING_CHAR, TIER_NEAR, TIER_CONTAINS, TIER_TITLE_BASE, TIER_CREATED)
+    LOW_CONFIDENCE_TIERS = (TIER_NEAR, TIER_CONTAINS, TIER_TITLE_BASE, TIER_CREATED)
+
+    log_string = models.CharField(max_length=500, unique=True)
+    track = models.ForeignKey(Track, on_delete=models.CASCADE, related_name='icecast_resolutions')
+    match_tier = models.CharField(max_length=20, choices=TIER_CHOICES, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+
+    def __str__(self):
+        return f"{self.log_string} -> #{self.track_id} ({self.match_tier})"
+
+    @classmethod
+    def weakest_tier(cls, *tiers: str) -> str:
+        """Palier le moins sûr parmi `tiers` (ex: artiste approché + titre exact -> near)."""
+        return max(tiers, key=cls.CASCADE_TIERS.index)
+
+
 class Config(models.Model):
     """
     Configuration model to store application settings in database
@@ -242,6 +398,11 @@ class Config(models.Model):
 
     # Icecast and playlist settings
     rubi_icecast_playlist_file = models.CharField(max_length=500, default='/var/log/icecast2/playlist.log', help_text="Path to Icecast playlist log file")
+    icecast_ingest_daemon = models.BooleanField(
+        default=False,
+        help_text="Le log Icecast est lu par manage.py ingest_icecast: les pages currently playing "
+                  "lisent seulement la base (sinon chaque rafraîchissement lit le log)"
+    )
     max_playlist_history_size = models.IntegerField(default=10, help_text="Maximum number of tracks in playlist history")
     max_suggestions_auto_size = models.IntegerField(default=20, help_text="Maximum number of automatic suggestions")
 
@@ -419,6 +580,45 @@ class DuplicateCandidate(models.Model):
         return f"Dup[{self.score}] #{self.track_a_id} ~ #{self.track_b_id} ({self.status})"
 
 
+class ImportJob(models.Model):
+    """
+    Import de collection Traktor exécuté hors requête HTTP par `manage.py run_import_jobs`.
+    L'avancement en cours d'import est lu dans un fichier voisin de l'upload
+    (l'import tourne dans une transaction: ses écritures ne sont visibles qu'à la fin).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_DONE, 'Terminé'),
+        (STATUS_FAILED, 'Echec'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    file = models.FileField(upload_to='imports/')
+    full_import = models.BooleanField(default=False, help_text="Réimporter aussi les entrées inchangées")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    stats = models.JSONField(default=dict, blank=True, help_text="Résumé de l'import (handle_uploaded_file)")
+    error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"ImportJob #{self.pk} ({self.status})"
+
+    @property
+    def progress_path(self) -> str:
+        return self.file.path + '.progress.json'
+
+
 class MergeLog(models.Model):
     """Trace de chaque fusion: snapshot JSON de la track supprimée (audit / undo de dernier recours)."""
     survivor = models.ForeignKey(Track, on_delete=models.SET_NULL, null=True, related_name='merge_logs')
@@ -433,3 +633,55 @@ class MergeLog(models.Model):
         return f"Merge #{self.deleted_track_id} -> #{self.survivor_id} ({self.created_at:%Y-%m-%d %H:%M})"
 
 
+class RekordboxTrackMatch(models.Model):
+    """
+    Correspondance TRACK Rekordbox <-> track Rubitrack retenue par la dernière
+    synchronisation réussie. Réutilisée telle quelle tant que le TRACK est
+    inchangé (même TrackID, Location, Artist, Name): seuls les TRACK nouveaux
+    ou modifiés repassent par le matching titre/artiste/chemin.
+
+    Les TrackID étant propres à chaque bibliothèque Rekordbox, les correspondances
+    sont tenues par cible (machine dont l'export est synchronisé; '' par défaut).
+    """
+    target = models.CharField(max_length=100, blank=True, default='', help_text="Export Rekordbox synchronisé")
+    rekordbox_track_id = models.CharField(max_length=32, help_text="TrackID du TRACK Rekordbox")
+    location = models.TextField(blank=True, default='', help_text="Attribut Location du TRACK")
+    signature = models.CharField(max_length=40, help_text="sha1 de Location/Artist/Name au moment du match")
+    track = models.ForeignKey(Track, on_delete=models.CASCADE, related_name='rekordbox_matches')
+    sync_fingerprint = models.CharField(
+        max_length=40, blank=True, default='',
+        help_text="sha1 des données Rubitrack écrites dans le TRACK (cues, bpm, clé, note, commentaire...)",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['target', 'rekordbox_track_id']
+        constraints = [
+            models.UniqueConstraint(fields=['target', 'rekordbox_track_id'], name='unique_rekordbox_target_track'),
+        ]
+
+    def __str__(self):
+        return f"Rekordbox {self.target or '-'}/{self.rekordbox_track_id} -> #{self.track_id}"
+
+
+class RekordboxPlaylistExport(models.Model):
+    """
+    Contenu de la playlist exporté dans le dossier 'Rubitrack' de Rekordbox par la
+    dernière synchronisation réussie. L'export des seules playlists modifiées
+    compare l'empreinte courante (nom et TrackID Rekordbox, dans l'ordre) à celle-ci.
+    Tenu par cible, comme RekordboxTrackMatch.
+    """
+    target = models.CharField(max_length=100, blank=True, default='', help_text="Export Rekordbox synchronisé")
+    playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE, related_name='rekordbox_exports')
+    fingerprint = models.CharField(max_length=40, help_text="sha1 du nom et des TrackID exportés")
+    exported_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['target', 'playlist'], name='unique_rekordbox_target_playlist'),
+        ]
+
+    def __str__(self):
+        return f"{self.playlist_id} exportée vers {self.target or '-'} le {self.exported_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,86 @@
+"""
+Correspondances approchées (noms d'artistes, titres) à distance d'édition bornée.
+
+- bounded_levenshtein: distance de Levenshtein avec sortie anticipée dès que la
+  borne est dépassée (rapidfuzz, en C) au lieu de la matrice O(m·n) complète
+- NearMatchIndex: index de voisinage par suppressions (symmetric delete): chaque clé
+  est indexée sous toutes ses variantes à k suppressions près. Deux chaînes à
+  distance <= k partagent au moins une variante: une recherche ne compare que les
+  clés qui en partagent une avec la requête, pas toute la liste.
+
+Les clés sont comparées sans casse ni espaces en bordure (comme is_similar_with_char_diff).
+"""
+
+from typing import Dict, Generic, Iterable, List, Set, Tuple, TypeVar
+
+from rapidfuzz.distance import Levenshtein
+
+V = TypeVar('V')
+
+DEFAULT_MAX_DISTANCE = 1
+
+
+def near_match_key(text: str) -> str:
+    return text.lower().strip()
+
+
+def bounded_levenshtein(s1: str, s2: str, max_distance: int) -> int:
+    """Distance de Levenshtein entre s1 et s2 si elle est <= max_distance, sinon
+    max_distance + 1 (le calcul s'arrête dès que la borne est dépassée)."""
+    if abs(len(s1) - len(s2)) > max_distance:
+        return max_distance + 1
+    return Levenshtein.distance(s1, s2, score_cutoff=max_distance)
+
+
+def _deletion_variants(key: str, max_distance: int) -> Set[str]:
+    variants = {key}
+    frontier = variants
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+class NearMatchIndex(Generic[V]):
+    """Valeurs indexées par texte, retrouvées à max_distance éditions près.
+
+    find() renvoie les valeurs dans leur ordre d'ajout (le premier ajouté est le
+    premier candidat, comme le premier résultat d'une requête triée)."""
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._keys: List[str] = []
+        self._values: List[V] = []
+        self._variants: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, text: str, value: V) -> None:
+        key = near_match_key(text)
+        rank = len(self._keys)
+        self._keys.append(key)
+        self._values.append(value)
+        for variant in _deletion_variants(key, self.max_distance):
+            self._variants.setdefault(variant, []).append(rank)
+
+    def add_all(self, items: Iterable[Tuple[str, V]]) -> 'NearMatchIndex[V]':
+        for text, value in items:
+            self.add(text, value)
+        return self
+
+    def find(self, text: str) -> List[V]:
+        """Valeurs dont le texte est à distance <= max_distance de `text`."""
+        key = near_match_key(text)
+        candidates: Set[int] = set()
+        for variant in _deletion_variants(key, self.max_distance):
+            candidates.update(self._variants.get(variant, ()))
+        # Les variantes communes sont nécessaires mais pas suffisantes (ex: transposition)
+        return [
+            self._values[rank] for rank in sorted(candidates)
+            if bounded_levenshtein(key, self._keys[rank], self.max_distance) <= self.max_distance
+        ]
+
+    def find_first(self, text: str):
+        matches = self.find(text)
+        return matches[0] if matches else None
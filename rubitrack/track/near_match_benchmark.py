@@ -0,0 +1,120 @@
+"""
+Benchmark des correspondances approchées (manage.py benchmark_near_match): sur des
+listes de noms d'artistes synthétiques, temps d'une recherche "premier nom à 1
+caractère près" (palier approché de get_artist_db_from_artist_name) avec:
+
+- STAGE_REFERENCE: parcours complet avec l'ancienne distance d'édition (matrice
+  O(m·n) complète en Python, reproduite ici pour la comparaison)
+- STAGE_SCAN: parcours complet avec is_similar_with_char_diff (distance bornée)
+- STAGE_INDEX: NearMatchIndex (voisinage par suppressions), sans parcours
+
+Tout est en mémoire: pas de base de données.
+"""
+
+import random
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .near_match import NearMatchIndex
+from .track_db_service import is_similar_with_char_diff
+
+BENCHMARK_SIZES = (1000, 10000, 50000)
+STAGE_REFERENCE = 'reference_scan'
+STAGE_SCAN = 'bounded_scan'
+STAGE_INDEX = 'index'
+STAGE_INDEX_BUILD = 'index_build'
+
+_SYLLABLES = ('da', 'ft', 'pu', 'nk', 'ma', 'ri', 'lo', 'ke', 'zo', 'an', 'el', 'tu', 'be', 'ro', 'si', 'ne')
+
+
+def reference_edit_distance(s1: str, s2: str) -> int:
+    """Distance d'édition telle que calculée avant la distance bornée (matrice complète)."""
+    m, n = len(s1), len(s2)
+    dp = [[0] * (n + 1) for _ in range(m + 1)]
+    for i in range(m + 1):
+        dp[i][0] = i
+    for j in range(n + 1):
+        dp[0][j] = j
+    for i in range(1, m + 1):
+        for j in range(1, n + 1):
+            if s1[i - 1] == s2[j - 1]:
+                dp[i][j] = dp[i - 1][j - 1]
+            else:
+                dp[i][j] = 1 + min(dp[i - 1][j], dp[i][j - 1], dp[i - 1][j - 1])
+    return dp[m][n]
+
+
+def reference_is_similar(str1: str, str2: str, max_diff: int = 1) -> bool:
+    if abs(len(str1) - len(str2)) > max_diff:
+        return False
+    return reference_edit_distance(str1.lower().strip(), str2.lower().strip()) <= max_diff
+
+
+def synthetic_names(count: int, seed: int = 0) -> List[str]:
+    """Noms d'artistes de 1 à 3 mots, déterministes pour une graine donnée."""
+    rng = random.Random(seed)
+    names = []
+    for number in range(count):
+        words = [
+            ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+            for _ in range(rng.randint(1, 3))
+        ]
+        names.append(f"{' '.join(words)} {number}" if rng.random() < 0.3 else ' '.join(words))
+    return names
+
+
+def synthetic_queries(names: Sequence[str], count: int, seed: int = 0) -> List[str]:
+    """Requêtes du log: un tiers à 1 faute de frappe d'un nom existant, un tiers
+    à 2 fautes (sans correspondance le plus souvent), un tiers de noms inconnus."""
+    rng = random.Random(seed + 1)
+    queries = []
+    for number in range(count):
+        name = rng.choice(names)
+        kind = number % 3
+        if kind == 2:
+            queries.append(f"Unknown Artist {rng.randrange(10 ** 6)}")
+            continue
+        for _ in range(kind + 1):
+            position = rng.randrange(len(name))
+            name = f"{name[:position]}{rng.choice('xyzq')}{name[position + 1:]}"
+        queries.append(name)
+    return queries
+
+
+def _first_by_scan(names: Sequence[str], query: str, similar: Callable[[str, str], bool]) -> Optional[str]:
+    for name in names:
+        if similar(query, name):
+            return name
+    return None
+
+
+def _measure_queries(results: dict, stage: str, queries: Sequence[str], find: Callable[[str], Optional[str]]):
+    start = time.perf_counter()
+    matched = sum(1 for query in queries if find(query) is not None)
+    seconds = time.perf_counter() - start
+    results[stage] = {'us_per_query': round(seconds / len(queries) * 1e6, 1), 'matched': matched}
+
+
+def run_near_match_benchmark(
+    sizes: Sequence[int] = BENCHMARK_SIZES, queries: int = 60, seed: int = 0, reference: bool = True,
+) -> Dict[str, dict]:
+    """Returns: {taille: {étape: mesures}}; les trois recherches doivent trouver
+    autant de correspondances ('matched')."""
+    report = {}
+    for size in sizes:
+        names = synthetic_names(size, seed)
+        query_list = synthetic_queries(names, queries, seed)
+        results: Dict[str, dict] = {}
+
+        start = time.perf_counter()
+        index = NearMatchIndex().add_all((name, name) for name in names)
+        results[STAGE_INDEX_BUILD] = {'seconds': round(time.perf_counter() - start, 3)}
+
+        if reference:
+            _measure_queries(results, STAGE_REFERENCE, query_list,
+                             lambda query: _first_by_scan(names, query, reference_is_similar))
+        _measure_queries(results, STAGE_SCAN, query_list,
+                         lambda query: _first_by_scan(names, query, is_similar_with_char_diff))
+        _measure_queries(results, STAGE_INDEX, query_list, index.find_first)
+        report[str(size)] = results
+    return report
@@ -1,11 +1,15 @@
 import pytest
 
+from track.currently_playing.track_resolver import invalidate_track_resolver_index
 from track.models import Config
 
 
 @pytest.fixture(autouse=True)
 def _clear_config_cache():
-    """Le cache process-level de Config survivrait au rollback entre tests."""
+    """Les caches process-level (Config, index de résolution du log Icecast)
+    survivraient au rollback entre tests."""
     Config.clear_cache()
+    invalidate_track_resolver_index()
     yield
     Config.clear_cache()
+    invalidate_track_resolver_index()
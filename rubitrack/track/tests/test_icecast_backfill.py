@@ -0,0 +1,111 @@
+"""
+Tests de la reprise de l'historique depuis des logs Icecast archivés: logs
+gzippés ou non, lignes déjà en base ignorées, répétitions non enregistrées,
+nombre de requêtes indépendant du nombre de lignes.
+"""
+
+import gzip
+from datetime import datetime
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from track.currently_playing.icecast_backfill import backfill_icecast_log
+from track.models import Artist, CurrentlyPlaying, IcecastTrackResolution, Track
+
+
+def log_line(time, artist, title):
+    return f"{time} +0000|/|0|{artist} - {title}\n"
+
+
+def played_at(time):
+    return timezone.make_aware(datetime.strptime(time, '%d/%b/%Y:%H:%M:%S'))
+
+
+def history():
+    return [
+        (row.date_played, row.track.title)
+        for row in CurrentlyPlaying.objects.select_related('track').order_by('date_played')
+    ]
+
+
+@pytest.fixture
+def tracks(db):
+    amy = Artist.objects.create(name="Amy Winehouse")
+    return {
+        'rehab': Track.objects.create(title="Rehab", artist=amy),
+        'valerie': Track.objects.create(title="Valerie", artist=amy),
+    }
+
+
+@pytest.mark.django_db
+class TestBackfillIcecastLog:
+    def test_plain_and_gzipped_logs(self, tracks, tmp_path):
+        old = tmp_path / "playlist.log.2.gz"
+        with gzip.open(old, "wt") as f:
+            f.write(log_line("08/Dec/2021:14:59:43", "Amy Winehouse", "Rehab"))
+            f.write(log_line("08/Dec/2021:15:03:10", "Amy Winehouse", "Valerie - Am - 6"))
+        recent = tmp_path / "playlist.log.1"
+        recent.write_text(
+            log_line("09/Dec/2021:20:00:00", "Amy Winehouse", "Rehab")
+            + "not a log line\n"
+            + log_line("09/Dec/2021:20:04:00", "Deadmau5", "Strobe")
+        )
+
+        assert backfill_icecast_log(str(old))['inserted'] == 2
+        stats = backfill_icecast_log(str(recent))
+        assert (stats['lines'], stats['invalid'], stats['inserted']) == (3, 1, 2)
+        assert history() == [
+            (played_at("08/Dec/2021:14:59:43"), "Rehab"),
+            (played_at("08/Dec/2021:15:03:10"), "Valerie"),
+            (played_at("09/Dec/2021:20:00:00"), "Rehab"),
+            (played_at("09/Dec/2021:20:04:00"), "Strobe"),
+        ]
+        assert IcecastTrackResolution.objects.filter(log_string="Deadmau5 - Strobe").exists()
+
+    def test_existing_rows_and_repeats_skipped(self, tracks, tmp_path):
+        CurrentlyPlaying.objects.create(track=tracks['rehab'], date_played=played_at("08/Dec/2021:15:00:00"))
+        log = tmp_path / "playlist.log.1"
+        log.write_text(
+            log_line("08/Dec/2021:15:00:00", "Amy Winehouse", "Rehab")      # déjà en base
+            + log_line("08/Dec/2021:15:00:30", "Amy Winehouse", "Rehab")    # répétition
+            + log_line("08/Dec/2021:15:04:00", "Amy Winehouse", "Valerie")
+            + log_line("08/Dec/2021:15:04:00", "Amy Winehouse", "Valerie")  # même date dans le fichier
+        )
+        stats = backfill_icecast_log(str(log), chunk_size=2)
+        assert (stats['duplicates'], stats['repeats'], stats['inserted']) == (2, 1, 1)
+        # Relancer la reprise n'ajoute rien
+        assert backfill_icecast_log(str(log))['inserted'] == 0
+        assert CurrentlyPlaying.objects.count() == 2
+
+    def test_queries_per_chunk_not_per_line(self, tracks, tmp_path, django_assert_max_num_queries):
+        log = tmp_path / "playlist.log.1"
+        titles = ["Rehab", "Valerie"]
+        log.write_text("".join(
+            log_line(f"08/Dec/2021:{hour:02d}:{minute:02d}:00", "Amy Winehouse", titles[minute % 2])
+            for hour in range(10) for minute in range(60)
+        ))
+        backfill_icecast_log(str(log))  # résolutions mémorisées des deux chaînes
+        CurrentlyPlaying.objects.all().delete()
+        # 600 lignes, 3 paquets: dates existantes par paquet, écoute précédente, inserts, savepoint
+        with django_assert_max_num_queries(12):
+            stats = backfill_icecast_log(str(log), chunk_size=200)
+        assert stats['inserted'] == 600
+
+    def test_error_rolls_back_file(self, tracks, tmp_path, monkeypatch):
+        log = tmp_path / "playlist.log.1"
+        log.write_text(log_line("08/Dec/2021:15:00:00", "Amy Winehouse", "Rehab"))
+        monkeypatch.setattr(CurrentlyPlaying.objects, 'bulk_create', lambda *args, **kwargs: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            backfill_icecast_log(str(log))
+        assert not IcecastTrackResolution.objects.exists()
+
+    def test_command(self, tracks, tmp_path):
+        log = tmp_path / "playlist.log.1"
+        log.write_text(log_line("08/Dec/2021:15:00:00", "Amy Winehouse", "Rehab"))
+        out = StringIO()
+        call_command('backfill_icecast', str(log), stdout=out)
+        assert "1 morceau(x) enregistré(s)" in out.getvalue()
+        assert CurrentlyPlaying.objects.count() == 1
@@ -0,0 +1,128 @@
+"""
+Tests du générateur de collections synthétiques et du benchmark d'import, plus
+un garde-fou de volumétrie: le nombre de requêtes de l'import (hors INSERT)
+ne doit pas croître avec le nombre d'ENTRY d'un même lot.
+"""
+
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from track.collection import import_benchmark
+from track.collection.import_collection import handle_uploaded_file
+from track.collection.synthetic_collection import write_synthetic_collection
+from track.models import Artist, CuePoint, Playlist, Track
+
+
+def _write(tmp_path, entries, **options):
+    path = tmp_path / f"collection_{entries}.nml"
+    with open(path, "w", encoding="utf-8") as out:
+        write_synthetic_collection(out, entries, **options)
+    return str(path)
+
+
+class TestSyntheticCollection:
+    def test_structure(self):
+        out = io.StringIO()
+        write_synthetic_collection(
+            out, 200, cues_per_track=3, playlists=5, tracks_per_playlist=10,
+            duplicate_ratio=0.1, key_suffix_ratio=0.5, sample_ratio=0.05,
+        )
+        root = ET.fromstring(out.getvalue())
+        entries = root.find("COLLECTION").findall("ENTRY")
+        assert len(entries) == 200
+        tracks = [e for e in entries if e.find("INFO") is not None]
+        samples = len(entries) - len(tracks)
+        audio_ids = [e.get("AUDIO_ID") for e in tracks]
+        assert 0 < samples < 30
+        assert 0 < len(audio_ids) - len(set(audio_ids)) < 40
+        assert any(e.get("TITLE").count(" - ") == 2 for e in tracks)
+        assert all(len(e.findall("CUE_V2")) == 3 for e in tracks)
+        playlists = [n for n in root.iter("NODE") if n.get("TYPE") == "PLAYLIST"]
+        assert len(playlists) == 5
+        assert all(len(p.findall("PLAYLIST/ENTRY")) == 10 for p in playlists)
+
+    def test_deterministic_for_a_seed(self):
+        first, second, other = io.StringIO(), io.StringIO(), io.StringIO()
+        write_synthetic_collection(first, 50, seed=1)
+        write_synthetic_collection(second, 50, seed=1)
+        write_synthetic_collection(other, 50, seed=2)
+        assert first.getvalue() == second.getvalue() != other.getvalue()
+
+
+@pytest.mark.django_db
+class TestImportBenchmark:
+    def test_synthetic_collection_imports(self, tmp_path):
+        user = User.objects.create_user(username="dj")
+        path = _write(tmp_path, 300, cues_per_track=2, playlists=4, tracks_per_playlist=5, duplicate_ratio=0.05)
+
+        new_count, _ = handle_uploaded_file(path, user)
+
+        assert 250 < new_count < 300
+        assert Track.objects.count() == new_count
+        assert CuePoint.objects.count() == 2 * new_count
+        assert Playlist.objects.count() == 4
+
+    def test_query_count_does_not_grow_within_a_batch(self, tmp_path):
+        # Hors INSERT (découpés selon la limite de paramètres du moteur), un import
+        # de 400 ENTRY fait autant de requêtes qu'un import de 100
+        counts = []
+        for entries in (100, 400):
+            path = _write(tmp_path, entries, artists=20, playlists=3, cues_per_track=1)
+            user = User.objects.create_user(username=f"dj{entries}")
+            with CaptureQueriesContext(connection) as ctx:
+                handle_uploaded_file(path, user)
+            counts.append(len([q for q in ctx.captured_queries if not q["sql"].startswith("INSERT")]))
+            Track.objects.all().delete()
+            Artist.objects.all().delete()
+        assert counts[1] == counts[0]
+
+    def test_benchmark_report_and_rollback(self):
+        report = import_benchmark.run_import_benchmark(
+            [60], playlists=3, tracks_per_playlist=5, cues_per_track=2,
+        )
+        stages = report["60"]
+        assert set(stages) == {"import", "reimport", "reimport_full", "playlists"}
+        assert stages["import"]["queries"] > stages["reimport"]["queries"]
+        assert stages["import"]["peak_memory_mb"] > 0
+        assert Track.objects.count() == 0  # tout est annulé
+        assert not User.objects.filter(username="benchmark_import").exists()
+
+    def test_memory_pass_parses_in_process(self, tmp_path, monkeypatch):
+        path = _write(tmp_path, 30, playlists=1, tracks_per_playlist=5, cues_per_track=1)
+        calls = []
+        real_import = import_benchmark.handle_uploaded_file
+
+        def recording_import(*args, **kwargs):
+            calls.append(kwargs.get("parse_workers"))
+            return real_import(*args, **kwargs)
+
+        monkeypatch.setattr(import_benchmark, "handle_uploaded_file", recording_import)
+        import_benchmark.benchmark_collection_file(path, parse_workers=2)
+        # 3 passes mesurées avec les workers demandés, passe mémoire dans le processus courant
+        assert calls == [2, 2, 2, 1]
+
+
+class TestFindRegressions:
+    def test_flags_only_measures_beyond_tolerance(self):
+        baseline = {"1000": {"import": {"seconds": 2.0, "queries": 100}}}
+        report = {
+            "1000": {"import": {"seconds": 2.4, "queries": 130}, "playlists": {"seconds": 1.0, "queries": 3}},
+            "50000": {"import": {"seconds": 99.0, "queries": 9999}},
+        }
+        regressions = import_benchmark.find_regressions(report, baseline, tolerance=0.25)
+        assert len(regressions) == 1
+        assert "queries 130 > 100" in regressions[0]
+
+    @pytest.mark.parametrize("matched, flagged", [(100, False), (90, True), (110, True), (130, True)])
+    def test_matched_must_equal_baseline(self, matched, flagged):
+        baseline = {"1000": {"overwrite": {"seconds": 2.0, "matched": 100}}}
+        report = {"1000": {"overwrite": {"seconds": 2.0, "matched": matched}}}
+        regressions = import_benchmark.find_regressions(report, baseline, tolerance=0.25)
+        assert bool(regressions) == flagged
+        if flagged:
+            assert f"matched {matched} != 100" in regressions[0]
@@ -4,14 +4,24 @@ extraction des cue points, dédoublonnage, playlists, collection utilisateur,
 et rollback transactionnel en cas de fichier corrompu.
 """
 
+import io
+import pstats
+import time
+import xml.etree.ElementTree as ET
 from decimal import Decimal
 from pathlib import Path
 
 import pytest
 from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
 
+from track.collection import import_collection
 from track.collection.import_collection import handle_uploaded_file
-from track.models import Collection, CuePoint, Playlist, Track
+from track.models import Artist, Collection, CuePoint, Playlist, PlaylistTrack, Track
 
 FIXTURES = Path(__file__).parent / "fixtures"
 TRAKTOR_NML = FIXTURES / "traktor_collection.nml"
@@ -98,6 +108,32 @@ class TestImportCuePoints:
         # Pas de CuePoint orphelins accumulés
         assert CuePoint.objects.count() == 5  # 4 Strobe + 1 Opus
 
+    def test_reimport_unchanged_writes_no_cue_points(self, imported, user):
+        stats = {}
+        with CaptureQueriesContext(connection) as ctx:
+            handle_uploaded_file(str(TRAKTOR_NML), user, stats=stats)
+        cue_writes = [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].startswith(('INSERT INTO "track_cuepoint"', 'UPDATE "track_cuepoint"', 'DELETE FROM "track_cuepoint"'))
+        ]
+        assert cue_writes == []
+        assert (stats["cue_points_created"], stats["cue_points_updated"], stats["cue_points_deleted"]) == (0, 0, 0)
+
+    def test_reimport_applies_cue_diff(self, imported, user):
+        strobe = Track.objects.get(title="Strobe")
+        by_slot = strobe.get_cue_points_by_slot()
+        by_slot[2].time_ms = Decimal("1.000000")
+        by_slot[2].save()
+        by_slot[5].delete()
+        CuePoint.objects.create(track=strobe, slot=8, time="0:01.000", time_ms=Decimal("1000"))
+
+        stats = {}
+        handle_uploaded_file(str(TRAKTOR_NML), user, stats=stats, incremental=False)
+        assert (stats["cue_points_created"], stats["cue_points_updated"], stats["cue_points_deleted"]) == (1, 1, 1)
+        by_slot = strobe.get_cue_points_by_slot()
+        assert set(by_slot) == {1, 2, 5, 6}
+        assert by_slot[2].time_ms == Decimal("30000.500000")
+
 
 @pytest.mark.django_db
 class TestImportPlaylists:
@@ -119,6 +155,144 @@ class TestImportPlaylists:
         assert ordered_titles == ["Strobe", "Opus - A#m - 6"]
 
 
+def _playlists_xml(names, keys=("strobe.mp3", "opus.mp3")):
+    """Section PLAYLISTS avec une playlist par nom, contenant les fichiers `keys`."""
+    entries = "".join(
+        f'<ENTRY><PRIMARYKEY TYPE="TRACK" KEY="C:/:Users/:antoine/:Music/:{key}"></PRIMARYKEY></ENTRY>' for key in keys
+    )
+    nodes = "".join(
+        f'<NODE TYPE="PLAYLIST" NAME="{name}"><PLAYLIST ENTRIES="{len(keys)}" TYPE="LIST">{entries}</PLAYLIST></NODE>'
+        for name in names
+    )
+    return ET.fromstring(f'<NML><PLAYLISTS><NODE TYPE="FOLDER" NAME="$ROOT"><SUBNODES>{nodes}</SUBNODES></NODE></PLAYLISTS></NML>')
+
+
+@pytest.mark.django_db
+class TestPlaylistImportIndex:
+    def _import(self, xmldoc, user):
+        collection = Collection.objects.get(user=user)
+        with CaptureQueriesContext(connection) as ctx:
+            import_collection.import_playlist_from_xml_doc(xmldoc, collection)
+        return ctx.captured_queries
+
+    def test_query_count_does_not_grow_with_playlists(self, imported, user):
+        few = self._import(_playlists_xml([f"A{i}" for i in range(3)]), user)
+        many = self._import(_playlists_xml([f"B{i}" for i in range(30)]), user)
+        assert len(many) == len(few)
+        assert Playlist.objects.get(name="B29").get_ordered_track_ids() == Playlist.objects.get(
+            name="My Test Set"
+        ).get_ordered_track_ids()
+
+    def test_unchanged_reimport_writes_nothing(self, imported, user):
+        xmldoc = _playlists_xml([f"A{i}" for i in range(5)])
+        self._import(xmldoc, user)
+        queries = self._import(xmldoc, user)
+        assert [q["sql"] for q in queries if not q["sql"].startswith("SELECT")] == []
+
+    def test_changed_playlist_is_rewritten(self, imported, user):
+        self._import(_playlists_xml(["A", "B"]), user)
+        self._import(_playlists_xml(["B"], keys=("opus.mp3", "strobe.mp3")), user)
+        assert [t.title for t in Playlist.objects.get(name="B").get_ordered_tracks()] == ["Opus - A#m - 6", "Strobe"]
+        assert [t.title for t in Playlist.objects.get(name="A").get_ordered_tracks()] == ["Strobe", "Opus - A#m - 6"]
+
+    def test_missing_rank_is_backfilled(self, imported, user):
+        Playlist.objects.filter(name="My Test Set").update(rank=None)
+        handle_uploaded_file(str(TRAKTOR_NML), user)
+        assert Playlist.objects.get(name="My Test Set").rank is not None
+
+    def test_duplicate_node_names_last_wins(self, imported, user):
+        xmldoc = _playlists_xml(["Dup"])
+        other = _playlists_xml(["Dup"], keys=("opus.mp3",))
+        xmldoc.find("PLAYLISTS/NODE/SUBNODES").extend(other.find("PLAYLISTS/NODE/SUBNODES"))
+        self._import(xmldoc, user)
+        assert Playlist.objects.filter(name="Dup").count() == 1
+        assert [t.title for t in Playlist.objects.get(name="Dup").get_ordered_tracks()] == ["Opus - A#m - 6"]
+
+
+@pytest.mark.django_db
+class TestPlaylistSetTracks:
+    @pytest.fixture
+    def playlist(self, user):
+        artist = Artist.objects.create(name="A")
+        collection = Collection.objects.create(user=user, name="c")
+        tracks = [Track.objects.create(title=f"T{i}", artist=artist) for i in range(6)]
+        playlist = Playlist.objects.create(name="P", collection=collection)
+        playlist.set_tracks(tracks[:5])
+        return playlist, tracks
+
+    @staticmethod
+    def _writes(ctx):
+        return [q["sql"] for q in ctx.captured_queries if not q["sql"].startswith("SELECT")]
+
+    def test_positions_are_gapped(self, playlist):
+        playlist, tracks = playlist
+        positions = list(playlist.playlist_tracks.values_list("position", flat=True))
+        assert positions == [1024, 2048, 3072, 4096, 5120]
+        assert playlist.get_ordered_track_ids() == [t.pk for t in tracks[:5]]
+
+    def test_unchanged_list_writes_nothing(self, playlist):
+        playlist, tracks = playlist
+        with CaptureQueriesContext(connection) as ctx:
+            assert playlist.set_tracks(tracks[:5]) == 0
+        assert self._writes(ctx) == []
+
+    def test_move_rewrites_one_row(self, playlist):
+        playlist, tracks = playlist
+        new_order = [tracks[0], tracks[4], tracks[1], tracks[2], tracks[3]]
+        with CaptureQueriesContext(connection) as ctx:
+            assert playlist.set_tracks(new_order) == 1
+        assert len(self._writes(ctx)) == 1
+        assert playlist.get_ordered_track_ids() == [t.pk for t in new_order]
+
+    def test_insert_and_remove_touch_only_those_rows(self, playlist):
+        playlist, tracks = playlist
+        new_order = [tracks[0], tracks[5], tracks[1], tracks[3], tracks[4]]
+        with CaptureQueriesContext(connection) as ctx:
+            assert playlist.set_tracks(new_order) == 2
+        writes = self._writes(ctx)
+        assert len(writes) == 2
+        assert writes[0].startswith("DELETE") and writes[1].startswith("INSERT")
+        assert playlist.get_ordered_track_ids() == [t.pk for t in new_order]
+
+    def test_duplicates_keep_first_occurrence(self, playlist):
+        playlist, tracks = playlist
+        playlist.set_tracks([tracks[1], tracks[0], tracks[1]])
+        assert playlist.get_ordered_track_ids() == [tracks[1].pk, tracks[0].pk]
+
+    def test_exhausted_gap_renumbers(self, playlist):
+        playlist, tracks = playlist
+        PlaylistTrack.objects.filter(playlist=playlist).update(position=F("position") / 1024 - 1)
+        new_order = [tracks[5], *tracks[:5]]
+        playlist.set_tracks(new_order)
+        assert playlist.get_ordered_track_ids() == [t.pk for t in new_order]
+        positions = list(playlist.playlist_tracks.values_list("position", flat=True))
+        assert positions == [1024, 2048, 3072, 4096, 5120, 6144]
+
+    def test_reimport_touches_only_changed_playlist(self, imported, user, tmp_path):
+        nml = TRAKTOR_NML.read_text(encoding="utf-8")
+        second = nml.replace('NAME="My Test Set"', 'NAME="Other Set"')
+        playlists = second[second.index('<NODE TYPE="PLAYLIST"'):second.index("</SUBNODES>")]
+        both = nml.replace("</SUBNODES>", playlists + "</SUBNODES>").replace('SUBNODES COUNT="1"', 'SUBNODES COUNT="2"')
+        (tmp_path / "both.nml").write_text(both, encoding="utf-8")
+        handle_uploaded_file(str(tmp_path / "both.nml"), user)
+
+        swapped = both.replace(
+            '<NODE TYPE="PLAYLIST" NAME="Other Set">',
+            '<NODE TYPE="PLAYLIST" NAME="Other Set" SWAP="1">',
+        )
+        head, tail = swapped.split('SWAP="1">')
+        tail = tail.replace("strobe.mp3", "__tmp__", 1).replace("opus.mp3", "strobe.mp3", 1).replace("__tmp__", "opus.mp3", 1)
+        (tmp_path / "swapped.nml").write_text(head + 'SWAP="1">' + tail, encoding="utf-8")
+        with CaptureQueriesContext(connection) as ctx:
+            handle_uploaded_file(str(tmp_path / "swapped.nml"), user)
+        playlist_writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "track_playlisttrack"')
+                           or q["sql"].startswith('INSERT INTO "track_playlisttrack"')
+                           or q["sql"].startswith('DELETE FROM "track_playlisttrack"')]
+        assert len(playlist_writes) == 1
+        assert [t.title for t in Playlist.objects.get(name="Other Set").get_ordered_tracks()] == ["Opus - A#m - 6", "Strobe"]
+        assert [t.title for t in Playlist.objects.get(name="My Test Set").get_ordered_tracks()] == ["Strobe", "Opus - A#m - 6"]
+
+
 @pytest.mark.django_db
 class TestImportTransaction:
     def test_corrupt_file_rolls_back_everything(self, user, tmp_path):
@@ -143,3 +317,218 @@ class TestImportTransaction:
             handle_uploaded_file(str(bad_xml), user)
         # Rollback complet : même la première entrée valide n'est pas persistée
         assert Track.objects.count() == 0
+
+
+@pytest.mark.django_db
+class TestImportModes:
+    def test_full_parse_mode_matches_streaming_mode(self, user):
+        handle_uploaded_file(str(TRAKTOR_NML), user, streaming=False)
+        full_tracks = sorted(Track.objects.values_list("title", "bpm", "ranking", "file_path"))
+        full_cues = sorted(CuePoint.objects.values_list("track__title", "slot", "time_ms"))
+        full_order = Playlist.objects.get(name="My Test Set").get_ordered_track_ids()
+
+        new_count, existing_count = handle_uploaded_file(str(TRAKTOR_NML), user, streaming=True)
+        assert (new_count, existing_count) == (0, 3)
+        assert sorted(Track.objects.values_list("title", "bpm", "ranking", "file_path")) == full_tracks
+        assert sorted(CuePoint.objects.values_list("track__title", "slot", "time_ms")) == full_cues
+        assert Playlist.objects.get(name="My Test Set").get_ordered_track_ids() == full_order
+
+    def test_streaming_accepts_uploaded_file(self, user):
+        # Fichier déjà ouvert (upload Django): rembobiné pour la passe playlists
+        upload = SimpleUploadedFile("collection.nml", TRAKTOR_NML.read_bytes())
+        new_count, _ = handle_uploaded_file(upload, user)
+        assert new_count == 3
+        assert Playlist.objects.get(name="My Test Set").tracks.count() == 2
+
+
+@pytest.mark.django_db
+class TestParallelParse:
+    def test_entry_chunks_are_standalone_documents(self):
+        with open(TRAKTOR_NML, "rb") as stream:
+            chunks = list(import_collection.iter_collection_entry_chunks(stream, 3))
+        assert len(chunks) == 2
+        records = [r for chunk in chunks for r in import_collection.parse_collection_chunk(chunk)]
+        assert [r["title"] if r else None for r in records] == ["Strobe", "Opus - A#m - 6", "No Cues Here", None]
+
+    def test_empty_collection_has_no_chunk(self):
+        nml = io.BytesIO(b'<?xml version="1.0"?><NML><COLLECTION ENTRIES="0"/><PLAYLISTS/></NML>')
+        assert list(import_collection.iter_collection_entry_chunks(nml, 10)) == []
+
+    def test_truncated_collection_raises(self):
+        nml = io.BytesIO(TRAKTOR_NML.read_bytes().split(b"</COLLECTION>")[0])
+        with pytest.raises(ET.ParseError):
+            list(import_collection.iter_collection_entry_chunks(nml, 10))
+
+    def test_workers_give_same_records_as_serial_parse(self):
+        with open(TRAKTOR_NML, "rb") as stream:
+            serial = list(import_collection.iter_collection_records(stream, workers=1))
+        with open(TRAKTOR_NML, "rb") as stream:
+            parallel = list(import_collection.iter_collection_records(stream, workers=2, chunk_size=1))
+        assert parallel == serial
+
+    def test_workers_skip_known_fingerprints(self):
+        with open(TRAKTOR_NML, "rb") as stream:
+            records = list(import_collection.iter_collection_records(stream, workers=1))
+        known = {records[0]["fingerprint"]}
+        with open(TRAKTOR_NML, "rb") as stream:
+            parallel = list(import_collection.iter_collection_records(stream, known, workers=2, chunk_size=1))
+        assert parallel[0] == {"dedup_key": records[0]["dedup_key"], "fingerprint": records[0]["fingerprint"]}
+        assert parallel[1] == records[1]
+
+    def test_parallel_import_matches_serial_import(self, user, monkeypatch):
+        monkeypatch.setattr(import_collection, "IMPORT_PARSE_CHUNK_SIZE", 1)
+        new_count, _ = handle_uploaded_file(str(TRAKTOR_NML), user, parse_workers=2)
+        assert new_count == 3
+        assert CuePoint.objects.count() == 5
+        assert Playlist.objects.get(name="My Test Set").tracks.count() == 2
+
+
+@pytest.mark.django_db
+class TestBulkWrites:
+    def test_reimport_writes_no_track_rows(self, imported, user):
+        stats = {}
+        with CaptureQueriesContext(connection) as ctx:
+            handle_uploaded_file(str(TRAKTOR_NML), user, stats=stats)
+        assert stats["tracks_written"] == 0
+        assert not [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "track_track"')]
+
+    def test_only_changed_fields_are_updated(self, imported, user):
+        Track.objects.filter(title="Strobe").update(playcount=1)
+        stats = {}
+        with CaptureQueriesContext(connection) as ctx:
+            handle_uploaded_file(str(TRAKTOR_NML), user, stats=stats, incremental=False)
+        assert stats["tracks_written"] == 1
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "track_track"')]
+        assert len(updates) == 1
+        assert '"playcount"' in updates[0] and '"bpm"' not in updates[0]
+        assert Track.objects.get(title="Strobe").playcount == 12
+
+    def test_new_tracks_are_bulk_created(self, user):
+        stats = {}
+        with CaptureQueriesContext(connection) as ctx:
+            handle_uploaded_file(str(TRAKTOR_NML), user, stats=stats)
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "track_track"')]
+        assert len(inserts) == 1
+        assert stats["tracks_written"] == 3
+        assert stats["rows_per_second"] > 0
+
+    def test_small_batches_give_same_result(self, user, monkeypatch):
+        monkeypatch.setattr(import_collection, "IMPORT_BATCH_SIZE", 1)
+        new_count, _ = handle_uploaded_file(str(TRAKTOR_NML), user)
+        assert new_count == 3
+        assert CuePoint.objects.count() == 5
+        assert Playlist.objects.get(name="My Test Set").tracks.count() == 2
+
+    def test_pending_track_is_found_by_following_entry(self, user, tmp_path):
+        # Même titre-base, AUDIO_ID différents: la 2e ENTRY doit retrouver la track
+        # créée par la 1re alors qu'elle n'est pas encore écrite en base
+        nml = tmp_path / "retag.nml"
+        nml.write_text(
+            """<?xml version="1.0" encoding="UTF-8"?>
+<NML VERSION="19">
+  <COLLECTION ENTRIES="2">
+    <ENTRY TITLE="Song - Am - 6" ARTIST="Some Artist" AUDIO_ID="A1">
+      <LOCATION DIR="/:Music/:" FILE="song_a.mp3" VOLUME="C:"></LOCATION>
+      <INFO BITRATE="320000"></INFO>
+    </ENTRY>
+    <ENTRY TITLE="Song - Gm - 5" ARTIST="Some Artist" AUDIO_ID="A2">
+      <LOCATION DIR="/:Music/:" FILE="song_b.mp3" VOLUME="C:"></LOCATION>
+      <INFO BITRATE="320000"></INFO>
+    </ENTRY>
+  </COLLECTION>
+  <PLAYLISTS></PLAYLISTS>
+</NML>""",
+            encoding="utf-8",
+        )
+        new_count, existing_count = handle_uploaded_file(str(nml), user)
+        assert (new_count, existing_count) == (1, 1)
+        assert Track.objects.get().title == "Song - Gm - 5"
+
+
+@pytest.mark.django_db
+class TestIncrementalImport:
+    def test_unchanged_entries_are_skipped(self, imported, user):
+        stats = {}
+        new_count, existing_count = handle_uploaded_file(str(TRAKTOR_NML), user, stats=stats)
+        assert (new_count, existing_count) == (0, 3)
+        assert (stats["nb_new"], stats["nb_changed"], stats["nb_unchanged"]) == (0, 0, 3)
+        assert stats["tracks_written"] == 0
+
+    def test_changed_entry_is_reimported(self, imported, user, tmp_path):
+        modified = tmp_path / "modified.nml"
+        modified.write_text(
+            TRAKTOR_NML.read_text(encoding="utf-8").replace('PLAYCOUNT="12"', 'PLAYCOUNT="13"'),
+            encoding="utf-8",
+        )
+        stats = {}
+        handle_uploaded_file(str(modified), user, stats=stats)
+        assert (stats["nb_new"], stats["nb_changed"], stats["nb_unchanged"]) == (0, 1, 2)
+        assert Track.objects.get(title="Strobe").playcount == 13
+
+    def test_full_import_ignores_fingerprints(self, imported, user):
+        Track.objects.filter(title="Strobe").update(playcount=1)
+        stats = {}
+        handle_uploaded_file(str(TRAKTOR_NML), user, stats=stats, incremental=False)
+        assert (stats["nb_changed"], stats["nb_unchanged"]) == (3, 0)
+        assert Track.objects.get(title="Strobe").playcount == 12
+
+    def test_skipped_tracks_are_attached_to_new_user_collection(self, imported):
+        other = User.objects.create_user(username="other", password="x")
+        handle_uploaded_file(str(TRAKTOR_NML), other)
+        assert Collection.objects.get(user=other).tracks.count() == 3
+
+
+@pytest.mark.django_db
+class TestImportCommand:
+    def test_imports_and_reports_stages(self, user):
+        out = io.StringIO()
+        call_command("import_collection", str(TRAKTOR_NML), user="dj", stdout=out)
+        output = out.getvalue()
+        assert Track.objects.count() == 3
+        for stage in ("parse", "tracks", "cues", "collection", "playlists", "total"):
+            assert f"  {stage} " in output
+        assert "Import terminé: 3 nouvelles" in output
+
+    def test_dry_run_writes_nothing(self, user):
+        out = io.StringIO()
+        call_command("import_collection", str(TRAKTOR_NML), "--dry-run", user="dj", stdout=out)
+        assert Track.objects.count() == 0
+        assert Playlist.objects.count() == 0
+        assert "--dry-run" in out.getvalue()
+
+    def test_profile_dump(self, user, tmp_path):
+        dump = tmp_path / "import.prof"
+        call_command("import_collection", str(TRAKTOR_NML), user="dj", profile=str(dump), stdout=io.StringIO())
+        stats = pstats.Stats(str(dump))
+        assert any(name == "handle_uploaded_file" for _, _, name in stats.stats)
+
+    def test_unknown_user_or_file(self, user):
+        with pytest.raises(CommandError):
+            call_command("import_collection", str(TRAKTOR_NML), user="nobody")
+        with pytest.raises(CommandError):
+            call_command("import_collection", "/nonexistent.nml", user="dj")
+
+
+@pytest.mark.django_db
+class TestImportStageTimer:
+    def test_nested_stage_time_is_exclusive(self):
+        timer = import_collection.ImportStageTimer()
+        with timer.stage("outer"):
+            time.sleep(0.02)
+            with timer.stage("inner"):
+                time.sleep(0.05)
+        assert timer.seconds["inner"] >= 0.05
+        assert 0.02 <= timer.seconds["outer"] < 0.05
+
+    def test_queries_charged_to_current_stage(self, imported):
+        timer = import_collection.ImportStageTimer()
+        with timer.count_queries():
+            with timer.stage("a"):
+                list(Track.objects.all())
+            list(Track.objects.all())
+        assert (timer.queries["a"], timer.queries["other"]) == (1, 1)
+
+    def test_stage_seconds_in_stats(self, user):
+        stats = {}
+        handle_uploaded_file(str(TRAKTOR_NML), user, stats=stats)
+        assert set(stats["stage_seconds"]) == set(import_collection.IMPORT_STAGES)
@@ -0,0 +1,152 @@
+"""
+Tests des imports de collection en tâche de fond: création du job par la vue,
+exécution par `run_import_jobs`, endpoint d'avancement.
+"""
+
+from pathlib import Path
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+
+from track.collection import import_jobs
+from track.collection.import_collection import IMPORT_PHASE_PLAYLISTS, IMPORT_PHASE_TRACKS
+from track.management.commands import run_import_jobs
+from track.models import ImportJob, Track
+
+TRAKTOR_NML = Path(__file__).parent / "fixtures" / "traktor_collection.nml"
+
+
+@pytest.fixture
+def logged_client(client, db, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    User.objects.create_user(username="dj", password="x")
+    client.login(username="dj", password="x")
+    return client
+
+
+def _upload(client, **extra):
+    data = {
+        'file': SimpleUploadedFile('collection.nml', TRAKTOR_NML.read_bytes()),
+        'run_in_background': 'on',
+    }
+    data.update(extra)
+    return client.post(reverse('import_collection_view'), data)
+
+
+@pytest.mark.django_db
+class TestImportJobs:
+    def test_post_creates_pending_job_and_redirects(self, logged_client):
+        response = _upload(logged_client)
+
+        job = ImportJob.objects.get()
+        assert response.status_code == 302
+        assert response.url.endswith('?job=%d' % job.pk)
+        assert job.status == ImportJob.STATUS_PENDING
+        assert Track.objects.count() == 0
+
+    def test_page_polls_job(self, logged_client):
+        _upload(logged_client)
+        job = ImportJob.objects.get()
+
+        response = logged_client.get(reverse('import_collection_view') + '?job=%d' % job.pk)
+
+        assert response.status_code == 200
+        assert reverse('import_job_progress', args=[job.pk]) in response.content.decode()
+
+    def test_worker_runs_job(self, logged_client):
+        _upload(logged_client)
+
+        call_command('run_import_jobs', '--once')
+
+        job = ImportJob.objects.get()
+        assert job.status == ImportJob.STATUS_DONE
+        assert job.finished_at is not None
+        assert job.stats['nb_new_tracks'] == Track.objects.count() > 0
+        assert not job.file  # upload supprimé une fois importé
+
+        data = logged_client.get(reverse('import_job_progress', args=[job.pk])).json()
+        assert data['status'] == 'done'
+        assert data['stats']['nb_new'] == job.stats['nb_new']
+
+    def test_failed_job_keeps_error(self, logged_client):
+        logged_client.post(reverse('import_collection_view'), {
+            'file': SimpleUploadedFile('collection.nml', b'<NML><COLLECTION ENTRIES="1"><ENTRY'),
+            'run_in_background': 'on',
+        })
+
+        call_command('run_import_jobs', '--once')
+
+        job = ImportJob.objects.get()
+        assert job.status == ImportJob.STATUS_FAILED
+        assert job.error
+
+    def test_non_xml_upload_fails_and_next_job_runs(self, logged_client):
+        logged_client.post(reverse('import_collection_view'), {
+            'file': SimpleUploadedFile('collection.nml', b'this is not xml'),
+            'run_in_background': 'on',
+        })
+        _upload(logged_client)
+
+        call_command('run_import_jobs', '--once')
+
+        failed, done = ImportJob.objects.order_by('pk')
+        assert failed.status == ImportJob.STATUS_FAILED
+        assert failed.error
+        assert done.status == ImportJob.STATUS_DONE
+
+    def test_worker_survives_unexpected_job_error(self, logged_client, monkeypatch):
+        _upload(logged_client)
+        _upload(logged_client)
+        calls = []
+
+        def flaky_run(job):
+            calls.append(job.pk)
+            if len(calls) == 1:
+                raise RuntimeError("base indisponible")
+            return import_jobs.run_import_job(job)
+
+        monkeypatch.setattr(run_import_jobs, 'run_import_job', flaky_run)
+        call_command('run_import_jobs', '--once')
+
+        assert len(calls) == 2
+        assert ImportJob.objects.filter(status=ImportJob.STATUS_DONE).count() == 1
+
+    def test_progress_of_other_user_is_404(self, logged_client):
+        other = User.objects.create_user(username="other", password="x")
+        job = ImportJob.objects.create(user=other, file='imports/x.nml')
+
+        response = logged_client.get(reverse('import_job_progress', args=[job.pk]))
+
+        assert response.status_code == 404
+
+    def test_running_job_reports_progress_file(self, logged_client):
+        _upload(logged_client)
+        job = import_jobs.claim_next_import_job()
+        progress = import_jobs.ImportProgress(job, entries_total=10)
+        progress(IMPORT_PHASE_TRACKS, 4)
+
+        data = logged_client.get(reverse('import_job_progress', args=[job.pk])).json()
+
+        assert data['status'] == 'running'
+        assert data['phase'] == IMPORT_PHASE_TRACKS
+        assert data['entries_processed'] == 4
+        assert data['entries_total'] == 10
+        assert data['eta_seconds'] is not None
+
+
+class TestImportProgress:
+    def test_eta_only_during_entries(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+        (tmp_path / 'imports').mkdir()
+        progress = import_jobs.ImportProgress(ImportJob(file='imports/x.nml'), entries_total=10)
+
+        assert progress.eta_seconds() is None
+        progress(IMPORT_PHASE_TRACKS, 5)
+        assert progress.eta_seconds() is not None
+        progress(IMPORT_PHASE_PLAYLISTS, 3)
+        assert progress.eta_seconds() is None
+        assert progress.snapshot()['playlists_processed'] == 3
+        assert progress.snapshot()['entries_processed'] == 5
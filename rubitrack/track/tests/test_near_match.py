@@ -0,0 +1,71 @@
+"""
+Tests des correspondances approchées: distance bornée, index par suppressions
+(mêmes résultats qu'un parcours complet) et benchmark.
+"""
+
+import random
+
+import pytest
+
+from track.near_match import NearMatchIndex, bounded_levenshtein
+from track.near_match_benchmark import (
+    STAGE_INDEX, STAGE_REFERENCE, STAGE_SCAN, reference_edit_distance, run_near_match_benchmark,
+)
+from track.track_db_service import is_similar_with_char_diff
+
+
+class TestBoundedLevenshtein:
+    def test_within_bound(self):
+        assert bounded_levenshtein("hello", "helo", 1) == 1
+        assert bounded_levenshtein("test", "tast", 1) == 1
+        assert bounded_levenshtein("same", "same", 1) == 0
+
+    def test_above_bound_returns_bound_plus_one(self):
+        assert bounded_levenshtein("kitten", "sitting", 1) == 2
+        assert bounded_levenshtein("a", "abcdef", 2) == 3
+
+    def test_same_as_reference_distance(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            s1 = ''.join(rng.choice("abc ") for _ in range(rng.randint(0, 8)))
+            s2 = ''.join(rng.choice("abc ") for _ in range(rng.randint(0, 8)))
+            for bound in (1, 2):
+                assert bounded_levenshtein(s1, s2, bound) == min(reference_edit_distance(s1, s2), bound + 1)
+
+    def test_is_similar_with_char_diff(self):
+        assert is_similar_with_char_diff("le café", "le  café")
+        assert is_similar_with_char_diff("Daft Punk", "daft punk ")
+        assert not is_similar_with_char_diff("Daft Punk", "Daft Pank!")
+
+
+class TestNearMatchIndex:
+    @pytest.mark.parametrize("max_distance", [1, 2])
+    def test_same_matches_as_full_scan(self, max_distance):
+        rng = random.Random(max_distance)
+        names = sorted({''.join(rng.choice("abcd") for _ in range(rng.randint(1, 6))) for _ in range(300)})
+        index = NearMatchIndex(max_distance).add_all((name, name) for name in names)
+        for _ in range(200):
+            query = ''.join(rng.choice("abcde") for _ in range(rng.randint(1, 7)))
+            expected = [name for name in names if reference_edit_distance(query, name) <= max_distance]
+            assert index.find(query) == expected
+
+    def test_case_and_surrounding_spaces_ignored(self):
+        index = NearMatchIndex().add_all([("Daft Punk", 1), (" Amy Winehouse ", 2)])
+        assert index.find_first("daft punc") == 1
+        assert index.find_first("AMY WINEHOUS") == 2
+        assert index.find_first("Deadmau5") is None
+
+    def test_first_added_wins(self):
+        index = NearMatchIndex().add_all([("Lalla", 'first'), ("Lallb", 'second'), ("Lalla", 'third')])
+        assert index.find("Lallx") == ['first', 'second', 'third']
+        assert index.find_first("Lalla") == 'first'
+
+
+class TestNearMatchBenchmark:
+    def test_report(self):
+        report = run_near_match_benchmark(sizes=[300], queries=12)
+        stages = report['300']
+        assert stages['index_build']['seconds'] >= 0
+        # Les trois méthodes trouvent les mêmes correspondances
+        assert stages[STAGE_REFERENCE]['matched'] == stages[STAGE_SCAN]['matched'] == stages[STAGE_INDEX]['matched']
+        assert stages[STAGE_INDEX]['matched'] > 0
@@ -0,0 +1,81 @@
+"""
+Tests du générateur d'exports Rekordbox synthétiques et du benchmark de la
+synchronisation.
+"""
+
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+from django.contrib.auth.models import User
+
+from track.collection.rekordbox import sync_benchmark
+from track.collection.rekordbox.synthetic_rekordbox import write_synthetic_rekordbox
+from track.models import Artist, RekordboxTrackMatch, Track
+
+
+@pytest.fixture
+def tracks(db):
+    artist = Artist.objects.create(name="Deadmau5")
+    for number in range(100):
+        Track.objects.create(
+            title=f"Track {number}", artist=artist, playtime=300, bpm=128,
+            file_path=f"C:/:Users/:dj/:Music/:track_{number}.mp3",
+        )
+    return list(Track.objects.select_related("artist").order_by("id"))
+
+
+@pytest.mark.django_db
+class TestSyntheticRekordbox:
+    def test_structure(self, tracks):
+        out = io.StringIO()
+        write_synthetic_rekordbox(
+            out, tracks, unmatched_ratio=0.1, typo_ratio=0.1, sampler_tracks=5,
+            marks_per_track=3, tempo_ratio=0.5, playlists=4, tracks_per_playlist=10,
+        )
+        root = ET.fromstring(out.getvalue())
+        assert root.tag == "DJ_PLAYLISTS"
+        collection = root.find("COLLECTION")
+        rekordbox_tracks = collection.findall("TRACK")
+        assert len(rekordbox_tracks) == int(collection.get("Entries")) == 115
+        assert len({t.get("TrackID") for t in rekordbox_tracks}) == 115
+        samplers = [t for t in rekordbox_tracks if "/rekordbox/Sampler/" in t.get("Location")]
+        assert len(samplers) == 5
+        first = rekordbox_tracks[0]
+        assert (first.get("Artist"), first.get("Location")) == (
+            "Deadmau5", "file://localhost/C:/Users/dj/Music/track_0.mp3",
+        )
+        assert len(first.findall("POSITION_MARK")) == 3
+        titles = {t.get("Name") for t in rekordbox_tracks[:100]}
+        assert 0 < len(titles - {t.title for t in tracks}) < 30  # fautes de frappe
+        assert 0 < sum(1 for t in rekordbox_tracks if t.find("TEMPO") is not None) < 115
+        playlists = root.findall("PLAYLISTS/NODE/NODE")
+        assert len(playlists) == 4
+        assert all(len(p.findall("TRACK")) == 10 for p in playlists)
+
+    def test_deterministic_for_a_seed(self, tracks):
+        first, second, other = io.StringIO(), io.StringIO(), io.StringIO()
+        write_synthetic_rekordbox(first, tracks, seed=1)
+        write_synthetic_rekordbox(second, tracks, seed=1)
+        write_synthetic_rekordbox(other, tracks, seed=2)
+        assert first.getvalue() == second.getvalue() != other.getvalue()
+
+
+@pytest.mark.django_db
+class TestSyncBenchmark:
+    def test_benchmark_report_and_rollback(self):
+        report = sync_benchmark.run_sync_benchmark(
+            [80], cues_per_track=2, rubitrack_playlists=3, tracks_per_playlist=5, playlists=2, typo_ratio=0.05,
+        )
+        stages = report["80"]
+        assert set(stages) == {"overwrite", "add_only", "playlists"}
+        for measures in stages.values():
+            assert measures["matched"] > 60
+            assert measures["peak_rss_mb"] > 0
+            assert set(measures["phases"]) == {"load", "lookup", "process", "playlists", "save"}
+        assert stages["overwrite"]["phases"]["playlists"] == 0
+        assert stages["playlists"]["phases"]["playlists"] > 0
+        # Tout est annulé
+        assert Track.objects.count() == 0
+        assert not RekordboxTrackMatch.objects.exists()
+        assert not User.objects.filter(username="benchmark_rekordbox_sync").exists()
@@ -5,18 +5,34 @@ fixture rekordbox_collection.xml et vérification du XML produit.
 """
 
 import logging
+import random
+import shutil
 import xml.etree.ElementTree as ET
+import zipfile
 from decimal import Decimal
 from pathlib import Path
 
 import pytest
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from rapidfuzz import fuzz, process as fuzz_process
 
-from track.collection.import_collection import handle_uploaded_file
+from track.collection.import_collection import ImportStageTimer, handle_uploaded_file
+from track.collection.rekordbox import synchronize_rekordbox_collection as sync_module
 from track.collection.rekordbox.synchronize_rekordbox_collection import (
+    FUZZY_MATCH_CANDIDATES,
+    FUZZY_MATCH_MIN_SCORE,
+    PLAYLIST_EXPORT_CHANGED,
+    PLAYLIST_EXPORT_FAVOURITES,
+    SYNC_STAGE_LOOKUP,
+    SYNC_STAGE_PLAYLISTS,
+    CuePositionIndex,
+    RekordboxCollectionSynchronizer,
+    rekordbox_target_name,
     synchronize_rekordbox_collection,
+    synchronize_rekordbox_targets,
 )
-from track.models import Artist, CuePoint, Track
+from track.models import Artist, Config, CuePoint, Playlist, RekordboxPlaylistExport, RekordboxTrackMatch, Track
 
 FIXTURES = Path(__file__).parent / "fixtures"
 TRAKTOR_NML = FIXTURES / "traktor_collection.nml"
@@ -265,6 +281,62 @@ class TestPlaylistExport:
         root_node = tree.getroot().find("PLAYLISTS/NODE")
         assert all(n.get("Name") != "Rubitrack" for n in root_node.findall("NODE"))
 
+    def exported_names(self, output):
+        return [p.get("Name") for p in self.get_rubitrack_folder(ET.parse(output)).findall("NODE")]
+
+    def add_playlist(self, name, titles):
+        playlist = Playlist.objects.create(name=name, collection=Playlist.objects.first().collection)
+        playlist.set_tracks([Track.objects.get(title__startswith=title) for title in titles])
+        return playlist
+
+    def test_playlist_queries_do_not_grow_with_playlists(self, populated_db, tmp_path):
+        def playlist_queries():
+            timer = ImportStageTimer()
+            with timer.count_queries():
+                RekordboxCollectionSynchronizer().synchronize_rekordbox_collection(
+                    str(REKORDBOX_XML), str(tmp_path / "out.xml"), timer=timer,
+                )
+            return timer.queries[SYNC_STAGE_PLAYLISTS]
+
+        baseline = playlist_queries()
+        for number in range(5):
+            self.add_playlist(f"Extra {number}", ["Opus", "Strobe"])
+        assert playlist_queries() == baseline
+        assert len(self.exported_names(tmp_path / "out.xml")) == 6
+
+    def test_export_only_favourite_playlists(self, populated_db, tmp_path):
+        favourite = self.add_playlist("Favourite Set", ["Opus"])
+        self.add_playlist("Other Set", ["Strobe"])
+        config = Config.get_config()
+        config.default_playlist_favourites = f"{favourite.pk}; invalide"
+        config.save()
+        output = tmp_path / "favourites.xml"
+        stats = synchronize_rekordbox_collection(
+            str(REKORDBOX_XML), str(output), playlist_filter=PLAYLIST_EXPORT_FAVOURITES
+        )
+        assert self.exported_names(output) == ["Favourite Set"]
+        assert stats["playlist_entries_exported"] == 1
+
+    def test_export_only_changed_playlists(self, populated_db, tmp_path):
+        other = self.add_playlist("Other Set", ["Strobe"])
+        synchronize_rekordbox_collection(str(REKORDBOX_XML), str(tmp_path / "first.xml"))
+        assert RekordboxPlaylistExport.objects.count() == 2
+
+        output = tmp_path / "unchanged.xml"
+        stats = synchronize_rekordbox_collection(
+            str(REKORDBOX_XML), str(output), playlist_filter=PLAYLIST_EXPORT_CHANGED
+        )
+        assert self.exported_names(output) == []
+        assert stats["playlists_unchanged_skipped"] == 2
+
+        other.set_tracks([Track.objects.get(title="Strobe"), Track.objects.get(title__startswith="Opus")])
+        output = tmp_path / "changed.xml"
+        stats = synchronize_rekordbox_collection(
+            str(REKORDBOX_XML), str(output), playlist_filter=PLAYLIST_EXPORT_CHANGED
+        )
+        assert self.exported_names(output) == ["Other Set"]
+        assert stats["playlists_unchanged_skipped"] == 1
+
 
 @pytest.mark.django_db
 class TestFuzzySuggestions:
@@ -296,3 +368,336 @@ class TestFuzzySuggestions:
         entry = self.get_unmatched(stats, "Not In Rubitrack")
         assert entry["suggested_match"] == ""
         assert entry["match_score"] == ""
+
+
+def canonical(element):
+    """Arbre comparable indépendamment de la mise en forme (blancs, ordre des attributs)."""
+    return (element.tag, sorted(element.attrib.items()), [canonical(child) for child in element])
+
+
+@pytest.mark.django_db
+class TestStreamingSync:
+    @pytest.mark.parametrize("mode", ["overwrite", "add_only"])
+    def test_streaming_output_matches_in_memory_sync(self, populated_db, tmp_path, mode):
+        streamed = tmp_path / "streamed.xml"
+        in_memory = tmp_path / "in_memory.xml"
+        stats_streamed = synchronize_rekordbox_collection(str(REKORDBOX_XML), str(streamed), mode=mode)
+        RekordboxTrackMatch.objects.all().delete()  # même point de départ pour les deux syncs
+        stats_in_memory = synchronize_rekordbox_collection(
+            str(REKORDBOX_XML), str(in_memory), mode=mode, streaming=False
+        )
+        assert stats_streamed == stats_in_memory
+        assert stats_streamed["total_tracks_in_rekordbox_file"] == 7
+        assert canonical(ET.parse(streamed).getroot()) == canonical(ET.parse(in_memory).getroot())
+        assert streamed.read_text(encoding="utf-8").startswith('<?xml version="1.0" encoding="UTF-8"?>')
+
+    def test_streaming_in_place_when_no_output_file(self, populated_db, tmp_path):
+        collection = tmp_path / "collection.xml"
+        collection.write_bytes(REKORDBOX_XML.read_bytes())
+        stats = synchronize_rekordbox_collection(str(collection), mode="overwrite")
+        assert stats["success"] is True
+        assert len(marks(get_track(ET.parse(collection), 1))) > 0
+        assert [p.name for p in tmp_path.iterdir()] == ["collection.xml"]
+
+    def test_streaming_escapes_attributes(self, populated_db, tmp_path):
+        source = tmp_path / "special.xml"
+        source.write_text(
+            REKORDBOX_XML.read_text(encoding="utf-8").replace(
+                'Name="Not In Rubitrack"', 'Name="Rock &amp; &quot;Roll&quot; &lt;3"'
+            ),
+            encoding="utf-8",
+        )
+        output = tmp_path / "out.xml"
+        synchronize_rekordbox_collection(str(source), str(output))
+        assert get_track(ET.parse(output), 4).get("Name") == 'Rock & "Roll" <3'
+
+    def test_invalid_root_rejected(self, populated_db, tmp_path):
+        source = tmp_path / "not_rekordbox.xml"
+        source.write_text('<?xml version="1.0"?><NML VERSION="19"><COLLECTION/></NML>', encoding="utf-8")
+        output = tmp_path / "out.xml"
+        stats = synchronize_rekordbox_collection(str(source), str(output))
+        assert stats["success"] is False
+        assert "DJ_PLAYLISTS" in stats["error"]
+        assert not output.exists()
+
+    def test_truncated_file_leaves_no_partial_output(self, populated_db, tmp_path):
+        content = REKORDBOX_XML.read_text(encoding="utf-8")
+        source = tmp_path / "truncated.xml"
+        source.write_text(content[: content.index("</COLLECTION>")], encoding="utf-8")
+        output = tmp_path / "out.xml"
+        stats = synchronize_rekordbox_collection(str(source), str(output))
+        assert stats == {"success": False, "error": "Impossible de charger le fichier Rekordbox"}
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["truncated.xml"]
+
+
+class TestFuzzyRanking:
+    QUERIES = ["deadmaus strobbe", "deadmau5 strobe", "", "aphex twin xtal", "deadmau5 strob"]
+    CHOICES = [
+        "deadmau5 strobe", "deadmau5 strobe", "deadmau5 strobe remix", "aphex twin xtal",
+        "aphex twin xtall", "deadmau5 ghosts n stuff", "deadmau5 strobes",
+    ]
+
+    def expected(self):
+        return [
+            [
+                (index, score) for _, score, index in fuzz_process.extract(
+                    query, self.CHOICES, scorer=fuzz.token_sort_ratio,
+                    score_cutoff=FUZZY_MATCH_MIN_SCORE, limit=FUZZY_MATCH_CANDIDATES,
+                )
+            ]
+            for query in self.QUERIES
+        ]
+
+    def rank(self):
+        ranked = RekordboxCollectionSynchronizer()._rank_fuzzy_candidates(self.QUERIES, self.CHOICES)
+        return [[(index, pytest.approx(score, abs=1e-3)) for index, score in row] for row in ranked]
+
+    def test_batched_ranking_matches_extract(self, monkeypatch):
+        """Même candidats, même ordre (égalités départagées par l'indice) que process.extract,
+        y compris quand les requêtes sont réparties sur plusieurs lots."""
+        assert self.rank() == self.expected()
+        monkeypatch.setattr(sync_module, "FUZZY_MATCH_BATCH_SIZE", 2)
+        assert self.rank() == self.expected()
+
+    def test_fallback_without_numpy(self, monkeypatch):
+        def cdist_without_numpy(*args, **kwargs):
+            raise ImportError("numpy")
+
+        monkeypatch.setattr(sync_module.fuzz_process, "cdist", cdist_without_numpy)
+        assert self.rank() == self.expected()
+
+
+@pytest.mark.django_db
+class TestMatchMap:
+    def test_successful_sync_persists_matches(self, populated_db, tmp_path):
+        stats, tree = run_sync(tmp_path, "overwrite")
+        assert stats["tracks_matched_via_map"] == 0
+        matches = {m.rekordbox_track_id: m.track.title for m in RekordboxTrackMatch.objects.all()}
+        assert matches == {
+            "1": "Strobe",
+            "2": "Opus - A#m - 6",
+            "3": "Manual Cues Track",
+        }
+
+    @pytest.mark.parametrize("streaming", [True, False])
+    def test_resync_uses_persisted_matches(self, populated_db, tmp_path, streaming):
+        first = tmp_path / "first.xml"
+        second = tmp_path / "second.xml"
+        stats_first = synchronize_rekordbox_collection(str(REKORDBOX_XML), str(first), streaming=streaming)
+        stats_second = synchronize_rekordbox_collection(str(REKORDBOX_XML), str(second), streaming=streaming)
+        assert stats_second["tracks_matched_via_map"] == 3
+        assert stats_second["tracks_found_and_matched"] == stats_first["tracks_found_and_matched"]
+        assert canonical(ET.parse(second).getroot()) == canonical(ET.parse(first).getroot())
+
+    def test_persisted_match_survives_rubitrack_rename(self, populated_db, tmp_path):
+        run_sync(tmp_path, "overwrite")
+        Track.objects.filter(title="Strobe").update(title="Strobe renamed in Rubitrack")
+        stats, tree = run_sync(tmp_path, "overwrite")
+        assert len(marks(get_track(tree, 1))) > 0
+        assert "Strobe" not in {t["title"] for t in stats["unmatched_rekordbox_tracks"]}
+
+    def test_changed_track_is_matched_again(self, populated_db, tmp_path):
+        run_sync(tmp_path, "overwrite")
+        old_signature = RekordboxTrackMatch.objects.get(rekordbox_track_id="1").signature
+        source = tmp_path / "changed.xml"
+        source.write_text(
+            REKORDBOX_XML.read_text(encoding="utf-8").replace('Name="Strobe"', 'Name="Strobe (Radio Edit)"'),
+            encoding="utf-8",
+        )
+        stats = synchronize_rekordbox_collection(str(source), str(tmp_path / "out.xml"))
+        assert stats["tracks_matched_via_map"] == 2
+        assert stats["tracks_found_and_matched"] == 3
+        assert RekordboxTrackMatch.objects.get(rekordbox_track_id="1").signature != old_signature
+
+    def test_failed_sync_persists_nothing(self, populated_db, tmp_path):
+        content = REKORDBOX_XML.read_text(encoding="utf-8")
+        source = tmp_path / "truncated.xml"
+        source.write_text(content[: content.index("</COLLECTION>")], encoding="utf-8")
+        stats = synchronize_rekordbox_collection(str(source), str(tmp_path / "out.xml"))
+        assert stats["success"] is False
+        assert not RekordboxTrackMatch.objects.exists()
+
+
+@pytest.mark.django_db
+class TestDeltaSync:
+    def sync(self, source, output, mode="overwrite"):
+        return synchronize_rekordbox_collection(str(source), str(output), mode=mode, delta=True)
+
+    def test_first_delta_sync_writes_all_matched_tracks(self, populated_db, tmp_path):
+        stats = self.sync(REKORDBOX_XML, tmp_path / "out.xml")
+        assert stats["tracks_unchanged_skipped"] == 0
+        assert [t["track_id"] for t in stats["changed_rekordbox_tracks"]] == ["1", "2", "3"]
+
+    def test_unchanged_tracks_are_not_rewritten(self, populated_db, tmp_path):
+        first = tmp_path / "first.xml"
+        second = tmp_path / "second.xml"
+        self.sync(REKORDBOX_XML, first)
+        stats = self.sync(first, second)
+        assert stats["tracks_found_and_matched"] == 3
+        assert stats["tracks_unchanged_skipped"] == 3
+        assert stats["changed_rekordbox_tracks"] == []
+        assert stats["tracks_updated_with_cue_points"] == 0
+        assert canonical(ET.parse(second).getroot()) == canonical(ET.parse(first).getroot())
+
+    def test_only_changed_track_is_rewritten(self, populated_db, tmp_path):
+        first = tmp_path / "first.xml"
+        second = tmp_path / "second.xml"
+        self.sync(REKORDBOX_XML, first)
+        CuePoint.objects.filter(track__title="Strobe", slot=2).update(time_ms=Decimal("31000"))
+        stats = self.sync(first, second)
+        assert [t["track_id"] for t in stats["changed_rekordbox_tracks"]] == ["1"]
+        assert stats["tracks_unchanged_skipped"] == 2
+        by_name = {m.get("Name"): m for m in marks(get_track(ET.parse(second), 1))}
+        assert by_name["RCue2"].get("Start") == "31.000"
+
+    def test_failed_track_write_is_retried(self, populated_db, tmp_path, monkeypatch):
+        first = tmp_path / "first.xml"
+        update_track = RekordboxCollectionSynchronizer._update_track
+
+        def failing_update(self, rekordbox_track, rubitrack_track, mode, stats):
+            if rekordbox_track.get("TrackID") == "2":
+                raise RuntimeError("écriture impossible")
+            return update_track(self, rekordbox_track, rubitrack_track, mode, stats)
+
+        monkeypatch.setattr(RekordboxCollectionSynchronizer, "_update_track", failing_update)
+        self.sync(REKORDBOX_XML, first)
+        assert RekordboxTrackMatch.objects.get(rekordbox_track_id="2").sync_fingerprint == ""
+        monkeypatch.setattr(RekordboxCollectionSynchronizer, "_update_track", update_track)
+        stats = self.sync(first, tmp_path / "second.xml")
+        assert [t["track_id"] for t in stats["changed_rekordbox_tracks"]] == ["2"]
+        assert stats["tracks_unchanged_skipped"] == 2
+        assert RekordboxTrackMatch.objects.get(rekordbox_track_id="2").sync_fingerprint != ""
+
+    def test_mode_change_rewrites_tracks(self, populated_db, tmp_path):
+        first = tmp_path / "first.xml"
+        self.sync(REKORDBOX_XML, first)
+        stats = self.sync(first, tmp_path / "second.xml", mode="add_only")
+        assert stats["tracks_unchanged_skipped"] == 0
+        assert len(stats["changed_rekordbox_tracks"]) == 3
+
+    def test_full_sync_reports_no_changed_list(self, populated_db, tmp_path):
+        stats, tree = run_sync(tmp_path, "overwrite")
+        assert stats["changed_rekordbox_tracks"] == []
+        assert stats["tracks_unchanged_skipped"] == 0
+
+
+@pytest.mark.django_db
+class TestMultiTargetSync:
+    def targets(self, tmp_path, names):
+        return [(name, str(REKORDBOX_XML), str(tmp_path / f"{name}_out.xml")) for name in names]
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_each_output_matches_single_file_sync(self, populated_db, tmp_path, workers):
+        synchronize_rekordbox_collection(str(REKORDBOX_XML), str(tmp_path / "single.xml"), target="single")
+        expected = canonical(ET.parse(tmp_path / "single.xml").getroot())
+
+        report = synchronize_rekordbox_targets(self.targets(tmp_path, ["laptop_a", "usb_prep"]), workers=workers)
+        assert list(report) == ["laptop_a", "usb_prep"]
+        for name in report:
+            assert report[name]["success"]
+            assert report[name]["tracks_found_and_matched"] == 3
+            assert canonical(ET.parse(tmp_path / f"{name}_out.xml").getroot()) == expected
+
+    def test_match_maps_are_kept_per_target(self, populated_db, tmp_path):
+        synchronize_rekordbox_targets(self.targets(tmp_path, ["laptop_a", "usb_prep"]), workers=1)
+        assert sorted(RekordboxTrackMatch.objects.values_list("target", "rekordbox_track_id")) == [
+            ("laptop_a", "1"), ("laptop_a", "2"), ("laptop_a", "3"),
+            ("usb_prep", "1"), ("usb_prep", "2"), ("usb_prep", "3"),
+        ]
+        report = synchronize_rekordbox_targets(self.targets(tmp_path, ["laptop_a", "laptop_b"]), workers=1)
+        assert report["laptop_a"]["tracks_matched_via_map"] == 3
+        assert report["laptop_b"]["tracks_matched_via_map"] == 0
+
+    def test_rubitrack_data_is_loaded_once(self, populated_db, tmp_path):
+        def lookup_queries(names):
+            timer = ImportStageTimer()
+            with timer.count_queries():
+                RekordboxCollectionSynchronizer().synchronize_targets(
+                    self.targets(tmp_path, names), workers=1, timer=timer,
+                )
+            return timer.queries[SYNC_STAGE_LOOKUP], timer.queries[SYNC_STAGE_PLAYLISTS]
+
+        assert lookup_queries(["a"]) == lookup_queries(["a", "b", "c"])
+
+    def test_failed_target_does_not_stop_the_others(self, populated_db, tmp_path):
+        broken = tmp_path / "broken.xml"
+        broken.write_text("<DJ_PLAYLISTS>")
+        targets = self.targets(tmp_path, ["laptop_a"]) + [("broken", str(broken), str(tmp_path / "broken_out.xml"))]
+        report = synchronize_rekordbox_targets(targets, workers=1)
+        assert report["laptop_a"]["success"]
+        assert report["broken"] == {"success": False, "error": "Impossible de charger le fichier Rekordbox"}
+        assert not (tmp_path / "broken_out.xml").exists()
+        assert set(RekordboxTrackMatch.objects.values_list("target", flat=True)) == {"laptop_a"}
+
+    def test_duplicate_target_names_rejected(self, populated_db, tmp_path):
+        with pytest.raises(ValueError):
+            synchronize_rekordbox_targets(self.targets(tmp_path, ["laptop", "laptop"]))
+
+    def test_command_writes_one_folder_per_target(self, populated_db, tmp_path):
+        files = [shutil.copy(REKORDBOX_XML, tmp_path / f"{name}.xml") for name in ("laptop_a", "laptop_b")]
+        archive = tmp_path / "sync.zip"
+        call_command("sync_rekordbox_targets", *map(str, files), "--output", str(archive), "--workers", "1")
+        folders = {name.split("/")[0] for name in zipfile.ZipFile(archive).namelist()}
+        assert folders == {"laptop_a", "laptop_b"}
+
+    def test_target_name_from_file_name(self):
+        assert rekordbox_target_name("/tmp/uploads/Laptop A.xml") == "Laptop A"
+
+
+class TestCuePositionIndex:
+    """L'index doit répondre comme un parcours complet des POSITION_MARK."""
+
+    @staticmethod
+    def scan_hot_cue(track, num):
+        return any(
+            pm.get("Type") in ("0", "4") and pm.get("Num") == str(num)
+            for pm in track.findall("POSITION_MARK")
+        )
+
+    @staticmethod
+    def scan_near(track, start_seconds, diff_ms):
+        target = Decimal(str(start_seconds))
+        return any(
+            abs(target - Decimal(pm.get("Start"))) <= Decimal(diff_ms) / 1000
+            for pm in track.findall("POSITION_MARK")
+            if pm.get("Start") and not pm.get("Name", "").startswith("RCue")
+        )
+
+    def random_track(self, rng):
+        track = ET.Element("TRACK")
+        for i in range(rng.randint(0, 12)):
+            ET.SubElement(track, "POSITION_MARK", {
+                "Name": rng.choice(["", "Drop", f"RCue{i}"]),
+                "Type": rng.choice(["0", "4", "1"]),
+                "Start": f"{rng.uniform(0, 30):.3f}",
+                "Num": str(rng.randint(-1, 7)),
+            })
+        return track
+
+    def test_matches_full_scan(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            track = self.random_track(rng)
+            index = CuePositionIndex(track)
+            for num in range(8):
+                assert index.hot_cue_exists(num) == self.scan_hot_cue(track, num)
+            for _ in range(10):
+                start = round(rng.uniform(0, 30), 3)
+                assert index.has_cue_near(start, 100) == self.scan_near(track, start, 100)
+
+    def test_boundaries_and_updates(self):
+        track = ET.Element("TRACK")
+        ET.SubElement(track, "POSITION_MARK", {"Name": "", "Type": "0", "Start": "10.000", "Num": "-1"})
+        index = CuePositionIndex(track)
+        assert index.has_cue_near(10.1, 100)
+        assert index.has_cue_near(9.9, 100)
+        assert not index.has_cue_near(10.101, 100)
+        assert not index.hot_cue_exists(-1)
+
+        index.add(ET.SubElement(track, "POSITION_MARK", {"Name": "RCue2", "Type": "4", "Start": "20.000", "Num": "1"}))
+        assert index.hot_cue_exists(1)
+        assert not index.has_cue_near(20.0, 100)  # les RCue ne bloquent pas
+        index.add(ET.SubElement(track, "POSITION_MARK", {"Name": "Drop", "Type": "0", "Start": "5.000", "Num": "3"}))
+        assert index.hot_cue_exists(3)
+        assert index.has_cue_near(5.05, 100)
+        assert index.starts == [Decimal("5.000"), Decimal("10.000")]
@@ -5,6 +5,7 @@ validations d'entrée (fichier manquant, extension, taille, root XML).
 
 import io
 import json
+import os
 import xml.etree.ElementTree as ET
 import zipfile
 from pathlib import Path
@@ -13,6 +14,8 @@ import pytest
 from django.contrib.auth.models import User
 from django.urls import reverse
 
+from track.collection.rekordbox import synchronize_rekordbox_collection as sync_module
+from track.collection.rekordbox import views as rekordbox_views
 from track.models import Config
 
 FIXTURES = Path(__file__).parent / "fixtures"
@@ -79,10 +82,12 @@ class TestSynchronizeApi:
         # le sampler est exclu du décompte des non-trouvées
         assert stats["total_tracks_in_rekordbox_file"] == 7
         assert stats["tracks_found_and_matched"] == 0
+        assert stats["tracks_matched_via_map"] == 0
         assert stats["unmatched_count"] == 6
 
         # Le ZIP contient le XML modifié (root DJ_PLAYLISTS) + le rapport CSV
-        zf = zipfile.ZipFile(io.BytesIO(response.content))
+        assert response.streaming
+        zf = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
         names = zf.namelist()
         assert len(names) == 2
         xml_name = next(n for n in names if n.endswith(".xml"))
@@ -94,12 +99,126 @@ class TestSynchronizeApi:
         assert "Not In Rubitrack" in not_found
         assert "no_match" in not_found
 
+    def test_delta_sync_adds_changed_report(self, admin_client_logged, sync_url):
+        with open(REKORDBOX_XML, "rb") as f:
+            response = admin_client_logged.post(
+                sync_url, {"rekordbox_file": f, "mode": "overwrite", "delta": "1"}
+            )
+        assert response.status_code == 200
+        stats = json.loads(response["X-Sync-Stats"])
+        assert stats["delta"] is True
+        assert stats["tracks_unchanged_skipped"] == 0
+        assert stats["changed_count"] == 0
+        zf = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        changed_csv = next(n for n in zf.namelist() if "changed" in n)
+        content = zf.read(changed_csv).decode("utf-8")
+        assert content == "track_id;artist;title;location\n"
+
+    def test_unknown_playlist_filter_falls_back_to_all(self, admin_client_logged, sync_url):
+        with open(REKORDBOX_XML, "rb") as f:
+            response = admin_client_logged.post(
+                sync_url, {"rekordbox_file": f, "mode": "overwrite", "playlists": "aucune"}
+            )
+        assert response.status_code == 200
+        stats = json.loads(response["X-Sync-Stats"])
+        assert stats["playlist_filter"] == "all"
+        assert stats["playlists_unchanged_skipped"] == 0
+
     def test_requires_staff(self, client, db, sync_url):
         response = client.post(sync_url, {})
         # Redirection vers la page de login admin
         assert response.status_code == 302
 
 
+class TestSyncArchiveStream:
+    def test_archive_is_streamed_in_blocks_and_output_removed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(rekordbox_views, "ZIP_STREAM_BLOCK_SIZE", 1024)
+        xml_path = tmp_path / "output.xml"
+        # Contenu peu compressible: zlib rend des octets à chaque bloc
+        xml_content = b"<DJ_PLAYLISTS>" + os.urandom(32 * 1024).hex().encode() + b"</DJ_PLAYLISTS>"
+        xml_path.write_bytes(xml_content)
+        unmatched = [{"artist": "A;B", "title": f"T{i}", "location": "", "reason": "no_match"} for i in range(3)]
+        archive = rekordbox_views.SyncArchiveStream(
+            [(str(xml_path), "collection.xml")],
+            [("not_found.csv", rekordbox_views.iter_not_found_csv(unmatched))],
+        )
+
+        chunks = list(archive)
+        assert len(chunks) > 3
+        zf = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        assert zf.read("collection.xml") == xml_content
+        csv_lines = zf.read("not_found.csv").decode("utf-8").splitlines()
+        assert csv_lines[0] == "artist;title;location;reason;suggested_match;match_score"
+        assert csv_lines[1] == '"A;B";T0;;no_match;;'
+        assert len(csv_lines) == 4
+
+        archive.close()
+        assert not xml_path.exists()
+
+    def test_close_without_iteration_removes_output(self, tmp_path):
+        xml_path = tmp_path / "output.xml"
+        xml_path.write_bytes(b"<DJ_PLAYLISTS/>")
+        rekordbox_views.SyncArchiveStream([(str(xml_path), "collection.xml")], []).close()
+        assert not xml_path.exists()
+
+
+@pytest.mark.django_db
+class TestSynchronizeTargetsApi:
+    def post(self, client, files, **data):
+        return client.post(reverse("rekordbox_api_synchronize_targets"), {"rekordbox_files": files, **data})
+
+    def named(self, name, content=None):
+        f = io.BytesIO(content if content is not None else REKORDBOX_XML.read_bytes())
+        f.name = name
+        return f
+
+    def test_one_output_and_report_per_target(self, admin_client_logged):
+        response = self.post(
+            admin_client_logged, [self.named("laptop_a.xml"), self.named("usb_prep.xml")], delta="1"
+        )
+        assert response.status_code == 200
+        stats = json.loads(response["X-Sync-Stats"])
+        assert set(stats["targets"]) == {"laptop_a", "usb_prep"}
+        assert stats["targets"]["laptop_a"]["total_tracks_in_rekordbox_file"] > 0
+        zf = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        names = sorted(n.split("_2")[0] for n in zf.namelist())
+        assert names == [
+            "laptop_a/rekordbox_collection_with_cues", "laptop_a/rekordbox_tracks_changed",
+            "laptop_a/rekordbox_tracks_not_found",
+            "usb_prep/rekordbox_collection_with_cues", "usb_prep/rekordbox_tracks_changed",
+            "usb_prep/rekordbox_tracks_not_found",
+        ]
+        xml_name = next(n for n in zf.namelist() if n.startswith("laptop_a/") and n.endswith(".xml"))
+        assert ET.fromstring(zf.read(xml_name)).tag == "DJ_PLAYLISTS"
+
+    def test_targets_processed_without_fork(self, admin_client_logged, monkeypatch):
+        monkeypatch.setattr(sync_module, "SYNC_TARGET_WORKERS", 4)
+        monkeypatch.setattr(sync_module, "ProcessPoolExecutor",
+                            lambda *args, **kwargs: pytest.fail("fork d'un worker web"))
+        response = self.post(admin_client_logged, [self.named("laptop_a.xml"), self.named("usb_prep.xml")])
+        assert response.status_code == 200
+
+    def test_failed_target_is_reported_without_files(self, admin_client_logged):
+        response = self.post(
+            admin_client_logged, [self.named("laptop_a.xml"), self.named("broken.xml", b"<DJ_PLAYLISTS>")]
+        )
+        assert response.status_code == 200
+        stats = json.loads(response["X-Sync-Stats"])
+        assert stats["targets"]["broken"] == {"success": False, "error": "Impossible de charger le fichier Rekordbox"}
+        zf = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        assert all(n.startswith("laptop_a/") for n in zf.namelist())
+
+    def test_all_targets_failed_returns_400(self, admin_client_logged):
+        response = self.post(admin_client_logged, [self.named("broken.xml", b"<COLLECTION/>")])
+        assert response.status_code == 400
+        assert "broken" in response.json()["error"]
+
+    def test_duplicate_target_names_rejected(self, admin_client_logged):
+        response = self.post(admin_client_logged, [self.named("laptop.xml"), self.named("laptop.xml")])
+        assert response.status_code == 400
+        assert "même nom" in response.json()["error"]
+
+
 @pytest.mark.django_db
 class TestStatsApi:
     def test_stats_endpoint(self, admin_client_logged):
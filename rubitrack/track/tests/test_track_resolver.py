@@ -0,0 +1,259 @@
+"""
+Tests de l'index de résolution en mémoire des lignes du log Icecast: mêmes
+résultats que la cascade en base, sans requête SQL une fois l'index chargé,
+et tenu à jour par les créations, modifications et suppressions. Résolutions
+mémorisées par chaîne du log (IcecastTrackResolution) et leur page de correction.
+"""
+
+import pytest
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+from django.utils import timezone
+
+from track.collection.import_collection import TrackBulkWriter, TrackImportIndex
+from track.currently_playing import track_resolver
+from track.currently_playing.currently_playing import save_track_played_to_db_from_log_line
+from track.currently_playing.track_resolver import get_track_resolver_index, resolve_track
+from track.duplicate.manual_merge_duplicate import merge_duplicate_tracks
+from track.models import Artist, CurrentlyPlaying, IcecastTrackResolution, Track
+from track.track_db_service import get_track_by_title_and_artist_name
+
+
+@pytest.fixture
+def collection(db):
+    amy = Artist.objects.create(name="Amy Winehouse")
+    daft = Artist.objects.create(name="Daft Punk")
+    Artist.objects.create(name="Lalla")
+    tracks = {
+        'black': Track.objects.create(title="Back To Black - Gm - 5", artist=amy),
+        'rehab': Track.objects.create(title="Rehab", artist=amy),
+        'cafe': Track.objects.create(title="le café", artist=amy),
+        'valerie': Track.objects.create(title="Valerie (Live At BBC)", artist=amy),
+        'around': Track.objects.create(title="Around The World", artist=daft),
+    }
+    return tracks
+
+
+# (titre, artiste) du log -> track attendue, chacune sur un palier différent de la cascade
+CASES = [
+    ("Rehab", "Amy Winehouse", 'rehab'),             # exact
+    ("Rehab ", "Amy Winehouse ", 'rehab'),           # espaces
+    ("Rehabx", "Amy Winehouse", 'rehab'),            # dernier caractère retiré
+    ("le  café", "Amy Winehouse", 'cafe'),            # 1 caractère d'écart
+    ("Valerie", "Amy Winehouse", 'valerie'),          # icontains
+    ("Back To Black - Am - 6", "Amy Winehouse", 'black'),  # titre-base
+    ("Rehab", "amy winehouse", 'rehab'),             # artiste insensible à la casse
+    ("Rehab", "Amy Winehous", 'rehab'),              # artiste à 1 caractère
+    ("Around The World", "Daft", 'around'),           # artiste icontains
+]
+
+
+@pytest.mark.django_db
+class TestResolveTrack:
+    @pytest.mark.parametrize("title, artist, expected", CASES)
+    def test_same_result_as_db_cascade(self, collection, title, artist, expected):
+        assert get_track_by_title_and_artist_name(title, artist).id == collection[expected].id
+        assert resolve_track(title, artist).id == collection[expected].id
+
+    def test_known_lines_resolve_without_query(self, collection, django_assert_num_queries):
+        get_track_resolver_index()
+        with django_assert_num_queries(0):
+            for title, artist, expected in CASES:
+                track = resolve_track(title, artist)
+                assert track.id == collection[expected].id
+                assert track.artist.id == collection[expected].artist_id
+
+    def test_unknown_track_created_once_then_indexed(self, collection, django_assert_num_queries):
+        created = resolve_track("Tears Dry On Their Own", "Amy Winehouse")
+        assert created.artist_id == collection['rehab'].artist_id
+        with django_assert_num_queries(0):
+            assert resolve_track("Tears Dry On Their Own", "Amy Winehouse").id == created.id
+
+    def test_unknown_artist_created_then_indexed(self, collection, django_assert_num_queries):
+        created = resolve_track("Strobe", "Deadmau5")
+        assert Artist.objects.filter(name="Deadmau5").count() == 1
+        with django_assert_num_queries(0):
+            assert resolve_track("Strobe", "Deadmau5").id == created.id
+
+    def test_deleted_track_is_not_resolved(self, collection):
+        get_track_resolver_index()
+        rehab_id = collection['rehab'].id
+        collection['rehab'].delete()
+        assert resolve_track("Rehab", "Amy Winehouse").id != rehab_id
+
+    def test_renamed_track_reloads_index(self, collection):
+        get_track_resolver_index()
+        collection['rehab'].title = "Rehab (Remix)"
+        collection['rehab'].save()
+        assert get_track_resolver_index().tracks_by_title.get((collection['rehab'].artist_id, "Rehab (Remix)"))
+
+    def test_writes_without_signals_detected_by_stamp(self, collection, monkeypatch):
+        index = get_track_resolver_index()
+        Track.objects.bulk_create([Track(title="Love Is A Losing Game", artist=collection['rehab'].artist)])
+        assert get_track_resolver_index() is index  # empreinte revérifiée au plus toutes les N secondes
+        monkeypatch.setattr(track_resolver, 'RESOLVER_STAMP_CHECK_SECONDS', 0)
+        assert get_track_resolver_index() is not index
+        assert resolve_track("Love Is A Losing Game", "Amy Winehouse").title == "Love Is A Losing Game"
+
+    def test_rename_by_other_process_detected_by_stamp(self, collection, monkeypatch):
+        index = get_track_resolver_index()
+        # Renommages sans signal (autre process): même nombre de lignes, même id max
+        Track.objects.filter(pk=collection['rehab'].pk).update(title="Rehab (Remix)", updated_at=timezone.now())
+        Artist.objects.filter(pk=collection['around'].artist_id).update(
+            name="Daft Punk Live", updated_at=timezone.now(),
+        )
+        monkeypatch.setattr(track_resolver, 'RESOLVER_STAMP_CHECK_SECONDS', 0)
+        reloaded = get_track_resolver_index()
+        assert reloaded is not index
+        assert reloaded.tracks_by_title.get((collection['rehab'].artist_id, "Rehab (Remix)"))
+        assert reloaded.artists_by_name.get("Daft Punk Live")
+
+    def test_import_bulk_update_changes_stamp(self, collection):
+        stamp = track_resolver.collection_stamp()
+        import_index = TrackImportIndex()
+        track = import_index.by_artist_title[(collection['rehab'].artist_id, "Rehab")]
+        track.title = "Rehab (Remix)"
+        writer = TrackBulkWriter(import_index)
+        writer.add(track, None)
+        writer.flush()
+        assert track_resolver.collection_stamp() != stamp
+
+
+def resolve_line(log_string):
+    artist, title = log_string.split(' - ', 1)
+    return resolve_track(title, artist, log_string=log_string)
+
+
+@pytest.mark.django_db
+class TestResolutionCache:
+    @pytest.mark.parametrize("log_string, tier", [
+        ("Amy Winehouse - Rehab", IcecastTrackResolution.TIER_EXACT),
+        ("Amy Winehous - Rehab", IcecastTrackResolution.TIER_NEAR),
+        ("Amy Winehouse - Back To Black - Am - 6", IcecastTrackResolution.TIER_TITLE_BASE),
+        ("Amy Winehouse - Tears Dry On Their Own", IcecastTrackResolution.TIER_CREATED),
+        ("Deadmau5 - Strobe", IcecastTrackResolution.TIER_CREATED),
+    ])
+    def test_resolution_recorded_with_tier(self, collection, log_string, tier):
+        track = resolve_line(log_string)
+        resolution = IcecastTrackResolution.objects.get(log_string=log_string)
+        assert (resolution.track_id, resolution.match_tier) == (track.id, tier)
+
+    def test_cached_resolution_wins_over_cascade(self, collection, django_assert_num_queries):
+        log_string = "Amy Winehouse - Back To Black - Cm - 3"
+        assert resolve_line(log_string).id == collection['black'].id
+        # Une track au titre exact apparaît: la chaîne déjà vue garde sa track
+        Track.objects.create(title="Back To Black - Cm - 3", artist=collection['black'].artist)
+        with django_assert_num_queries(0):
+            assert resolve_line(log_string).id == collection['black'].id
+        assert Track.objects.filter(title__startswith="Back To Black").count() == 2
+
+    def test_cache_loaded_from_db_in_new_process(self, collection, django_assert_num_queries):
+        IcecastTrackResolution.objects.create(
+            log_string="Amy W. - Rehab (Live)", track=collection['rehab'],
+            match_tier=IcecastTrackResolution.TIER_MANUAL,
+        )
+        get_track_resolver_index()
+        with django_assert_num_queries(0):
+            assert resolve_line("Amy W. - Rehab (Live)").id == collection['rehab'].id
+
+    def test_merge_repoints_resolutions_to_survivor(self, collection):
+        log_string = "Amy Winehouse - Valerie"
+        assert resolve_line(log_string).id == collection['valerie'].id
+        merge_duplicate_tracks(collection['rehab'].id, collection['valerie'].id)
+        resolution = IcecastTrackResolution.objects.get(log_string=log_string)
+        assert (resolution.track_id, resolution.match_tier) == (
+            collection['rehab'].id, IcecastTrackResolution.TIER_MERGED,
+        )
+        assert resolve_line(log_string).id == collection['rehab'].id
+
+    def test_deleted_track_drops_resolution(self, collection):
+        resolve_line("Amy Winehouse - Rehab")
+        collection['rehab'].delete()
+        assert not IcecastTrackResolution.objects.exists()
+        assert resolve_line("Amy Winehouse - Rehab").id != collection['rehab'].id
+
+    def test_track_deleted_by_other_process_not_saved_as_played(self, collection):
+        resolve_line("Amy Winehouse - Valerie")
+        # Fusion dans un autre process: aucun signal reçu ici, l'index garde l'ancien id
+        receivers = [
+            (post_save, track_resolver._update_index_on_save),
+            (post_delete, track_resolver._invalidate_index_on_delete),
+        ]
+        for signal, receiver in receivers:
+            for sender in (Artist, Track, IcecastTrackResolution):
+                signal.disconnect(receiver, sender=sender)
+        try:
+            merge_duplicate_tracks(collection['rehab'].id, collection['valerie'].id)
+        finally:
+            for signal, receiver in receivers:
+                for sender in (Artist, Track, IcecastTrackResolution):
+                    signal.connect(receiver, sender=sender)
+
+        assert save_track_played_to_db_from_log_line("08/Dec/2021:14:59:43 +0000|/|0|Amy Winehouse - Valerie\n")
+        assert CurrentlyPlaying.objects.get().track_id == collection['rehab'].id
+
+    def test_correction_from_other_process_detected_by_stamp(self, collection, monkeypatch):
+        resolve_line("Amy Winehouse - Valerie")
+        IcecastTrackResolution.objects.update(track=collection['rehab'], updated_at=timezone.now())
+        monkeypatch.setattr(track_resolver, 'RESOLVER_STAMP_CHECK_SECONDS', 0)
+        assert resolve_line("Amy Winehouse - Valerie").id == collection['rehab'].id
+
+
+@pytest.mark.django_db
+class TestIcecastResolutionsView:
+    @pytest.fixture
+    def admin_client(self, client, collection):
+        User.objects.create_superuser(username="admin", password="x", email="a@a.fr")
+        client.login(username="admin", password="x")
+        resolve_line("Amy Winehouse - Rehab")
+        resolve_line("Amy Winehouse - Back To Black - Am - 6")
+        return client
+
+    def test_lists_low_confidence_only(self, admin_client):
+        content = admin_client.get(reverse("icecast_resolutions")).content.decode()
+        assert "Amy Winehouse - Back To Black - Am - 6" in content
+        assert "Amy Winehouse - Rehab<" not in content
+        content = admin_client.get(reverse("icecast_resolutions") + "?show=all").content.decode()
+        assert "Amy Winehouse - Rehab<" in content
+
+    def test_correct_sets_track_and_manual_tier(self, admin_client, collection):
+        resolution = IcecastTrackResolution.objects.get(match_tier=IcecastTrackResolution.TIER_TITLE_BASE)
+        admin_client.post(reverse("icecast_resolutions"), {
+            'resolution_id': resolution.id, 'action': 'correct', 'track_id': collection['rehab'].id,
+        })
+        resolution.refresh_from_db()
+        assert (resolution.track_id, resolution.match_tier) == (
+            collection['rehab'].id, IcecastTrackResolution.TIER_MANUAL,
+        )
+        assert resolve_line(resolution.log_string).id == collection['rehab'].id
+
+    def test_unknown_track_id_keeps_resolution(self, admin_client, collection):
+        resolution = IcecastTrackResolution.objects.get(match_tier=IcecastTrackResolution.TIER_TITLE_BASE)
+        response = admin_client.post(reverse("icecast_resolutions"), {
+            'resolution_id': resolution.id, 'action': 'correct', 'track_id': 999999,
+        }, follow=True)
+        assert "Track introuvable" in response.content.decode()
+        resolution.refresh_from_db()
+        assert resolution.match_tier == IcecastTrackResolution.TIER_TITLE_BASE
+
+    @pytest.mark.parametrize("track_id", ["abc", "", "12x"])
+    def test_non_numeric_track_id_keeps_resolution(self, admin_client, track_id):
+        resolution = IcecastTrackResolution.objects.get(match_tier=IcecastTrackResolution.TIER_TITLE_BASE)
+        response = admin_client.post(reverse("icecast_resolutions"), {
+            'resolution_id': resolution.id, 'action': 'correct', 'track_id': track_id,
+        }, follow=True)
+        assert "Track introuvable" in response.content.decode()
+        resolution.refresh_from_db()
+        assert resolution.match_tier == IcecastTrackResolution.TIER_TITLE_BASE
+
+    def test_non_numeric_resolution_id(self, admin_client):
+        response = admin_client.post(reverse("icecast_resolutions"), {'resolution_id': 'x', 'action': 'forget'},
+                                     follow=True)
+        assert "Résolution introuvable" in response.content.decode()
+        assert IcecastTrackResolution.objects.count() == 2
+
+    def test_forget_deletes_resolution(self, admin_client):
+        resolution = IcecastTrackResolution.objects.get(match_tier=IcecastTrackResolution.TIER_TITLE_BASE)
+        admin_client.post(reverse("icecast_resolutions"), {'resolution_id': resolution.id, 'action': 'forget'})
+        assert not IcecastTrackResolution.objects.filter(pk=resolution.pk).exists()
@@ -1,5 +1,7 @@
-from .models import Track, Artist, Transition, CurrentlyPlaying
+from .models import Track, Artist, Transition, CurrentlyPlaying, IcecastTrackResolution
 from .duplicate.detection import normalize_title_base
+from .near_match import bounded_levenshtein, near_match_key
+from django.db.models.functions import Length, Trim
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,35 +17,8 @@ def is_similar_with_char_diff(str1: str, str2: str, max_diff: int = 1) -> bool:
     """
     if abs(len(str1) - len(str2)) > max_diff:
         return False
-
-    # Use dynamic programming to calculate edit distance
-    def edit_distance(s1, s2):
-        m, n = len(s1), len(s2)
-        dp = [[0] * (n + 1) for _ in range(m + 1)]
-
-        # Initialize first row and column
-        for i in range(m + 1):
-            dp[i][0] = i
-        for j in range(n + 1):
-            dp[0][j] = j
-
-        # Fill the dp table
-        for i in range(1, m + 1):
-            for j in range(1, n + 1):
-                if s1[i-1] == s2[j-1]:
-                    dp[i][j] = dp[i-1][j-1]
-                else:
-                    dp[i][j] = 1 + min(
-                        dp[i-1][j],    # deletion
-                        dp[i][j-1],    # insertion
-                        dp[i-1][j-1]   # substitution
-                    )
-
-        logger.info("Edit distance between '{}' and '{}' is {}".format(s1, s2, dp[m][n]))
-
-        return dp[m][n]
-
-    return edit_distance(str1.lower().strip(), str2.lower().strip()) <= max_diff
+    # Distance bornée: le calcul s'arrête dès que max_diff est dépassé
+    return bounded_levenshtein(near_match_key(str1), near_match_key(str2), max_diff) <= max_diff
 
 
 def are_track_related(track_source, track_destination):
@@ -60,14 +35,19 @@ def get_track_related_text(track_source, track_destination):
     return None
 
 
-def get_track_db_from_title_artist(track_title: str, artist_db: Artist):
+def find_track_db_from_title_artist(track_title: str, artist_db: Artist):
+    """Track de l'artiste par la cascade (exact, dernier caractère retiré, 1 caractère
+    d'écart, icontains, titre-base), sans création.
+
+    Returns: (track, palier IcecastTrackResolution.TIER_*) ou (None, None)
+    """
     track_list = Track.objects.filter(title=track_title, artist=artist_db)
     if len(track_list) == 1:
-        return track_list[0]
+        return track_list[0], IcecastTrackResolution.TIER_EXACT
 
     if len(track_list) > 1:
         logger.warning('WARNING DUPLICATE track : %s %s %s', track_title, "By artist :", artist_db.name)
-        return track_list[0]
+        return track_list[0], IcecastTrackResolution.TIER_EXACT
 
 
     # happens with weird formatting in log file
@@ -75,7 +55,7 @@ def get_track_db_from_title_artist(track_title: str, artist_db: Artist):
     track_list = Track.objects.filter(title=search_title, artist=artist_db)
     if len(track_list) > 0:
         logger.info('FOUND with 1 char removed : %s %s %s', search_title, " original:", track_title)
-        return track_list[0]
+        return track_list[0], IcecastTrackResolution.TIER_TRAILING_CHAR
 
     # check for close matches by same artists, when changing only 1 char is a match
     # like "le café" vs "le  café" (double space)
@@ -83,7 +63,7 @@ def get_track_db_from_title_artist(track_title: str, artist_db: Artist):
     for track in all_tracks:
         if is_similar_with_char_diff(track_title, track.title, max_diff=1):
             logger.info('FOUND with 1 char difference : %s %s %s', track.title, " original:", track_title)
-            return track
+            return track, IcecastTrackResolution.TIER_NEAR
 
     # no exact match found
     # check for close matches by same artists
@@ -91,7 +71,7 @@ def get_track_db_from_title_artist(track_title: str, artist_db: Artist):
     track_list = Track.objects.filter(title__icontains=search_title, artist=artist_db)
     if len(track_list) > 0:
         logger.info('FOUND with strip : %s %s %s', search_title, " original:", track_title)
-        return track_list[0]
+        return track_list[0], IcecastTrackResolution.TIER_CONTAINS
 
     # titre-base identique (suffixe " - Clé - Note" retiré): la clé/note a changé
     # dans Traktor mais c'est la même track (ex: "Back To Black - Gm - 5" ~ "- Am - 6").
@@ -101,8 +81,19 @@ def get_track_db_from_title_artist(track_title: str, artist_db: Artist):
         for track in all_tracks:
             if normalize_title_base(track.title) == title_base:
                 logger.info('FOUND by title base: %s ~ %s', track.title, track_title)
-                return track
+                return track, IcecastTrackResolution.TIER_TITLE_BASE
+
+    return None, None
 
+
+def get_track_db_from_title_artist(track_title: str, artist_db: Artist):
+    track_db, _ = find_track_db_from_title_artist(track_title, artist_db)
+    if track_db is not None:
+        return track_db
+    return create_track_db(track_title, artist_db)
+
+
+def create_track_db(track_title: str, artist_db: Artist):
     # create new track, should only happen if no import of collection
     logger.warning('WARNING Created new track, : %s', track_title)
     track_db = Track()
@@ -112,18 +103,17 @@ def get_track_db_from_title_artist(track_title: str, artist_db: Artist):
     return track_db
 
 
-def get_artist_db_from_artist_name(artist_name):
+def find_artist_db_from_artist_name(artist_name):
     """
-    Get artist from database by name, with fallback strategies:
+    Find artist in database by name, with fallback strategies:
     1. Exact match (after trimming spaces)
     2. Exact match original (legacy)
     3. Case-insensitive match on trimmed
     4. Similar match with character differences
     5. icontains match
-    6. Create new artist
+
+    Returns: (artist, palier IcecastTrackResolution.TIER_*) ou (None, None)
     """
-    if artist_name is None:
-        return None
     original_name = artist_name
     artist_name = artist_name.strip()
     if not artist_name:
@@ -132,44 +122,66 @@ def get_artist_db_from_artist_name(artist_name):
     # Exact match on trimmed name
     artist_list = Artist.objects.filter(name=artist_name)
     if artist_list:
-        return artist_list[0]
+        return artist_list[0], IcecastTrackResolution.TIER_EXACT
 
     # Exact match on original (just in case existing stored with trailing space)
     if original_name != artist_name:
         artist_list = Artist.objects.filter(name=original_name)
         if artist_list:
-            return artist_list[0]
+            return artist_list[0], IcecastTrackResolution.TIER_EXACT
 
     # Case-insensitive exact match (handles different cases / accidental spaces)
     artist_list = Artist.objects.filter(name__iexact=artist_name)
     if artist_list:
-        return artist_list[0]
-
-    # Similar artist with small diff
-    all_artists = Artist.objects.all()
+        return artist_list[0], IcecastTrackResolution.TIER_EXACT
+
+    # Similar artist with small diff: seuls les noms de longueur voisine peuvent l'être
+    name_length = len(artist_name)
+    all_artists = (
+        Artist.objects.annotate(name_length=Length(Trim('name')))
+        .filter(name_length__range=(name_length - 1, name_length + 1))
+        .order_by('pk')
+    )
     for artist in all_artists:
         if is_similar_with_char_diff(artist_name, artist.name.strip(), max_diff=1):
             logger.info('FOUND similar artist with 1 char difference: %s %s %s', artist.name, "original:", original_name)
-            return artist
+            return artist, IcecastTrackResolution.TIER_NEAR
 
     # icontains on trimmed
     artist_list = Artist.objects.filter(name__icontains=artist_name)
     if artist_list:
         logger.info('FOUND with icontains: %s %s %s', artist_list[0].name, " original:", original_name)
-        return artist_list[0]
+        return artist_list[0], IcecastTrackResolution.TIER_CONTAINS
 
     # icontains on original (rare case)
     if original_name != artist_name:
         artist_list = Artist.objects.filter(name__icontains=original_name)
         if artist_list:
             logger.info('FOUND with icontains original: %s %s %s', artist_list[0].name, " original:", original_name)
-            return artist_list[0]
+            return artist_list[0], IcecastTrackResolution.TIER_CONTAINS
 
+    return None, None
+
+
+def get_artist_db_from_artist_name(artist_name):
+    """
+    Get artist from database by name (find_artist_db_from_artist_name),
+    create it with the trimmed canonical name if not found.
+    """
+    if artist_name is None:
+        return None
+    artist_db, _ = find_artist_db_from_artist_name(artist_name)
+    if artist_db is not None:
+        return artist_db
+    return create_artist_db(artist_name)
+
+
+def create_artist_db(artist_name):
     # Create new artist with trimmed canonical name
     artist_db = Artist()
-    artist_db.name = artist_name
+    artist_db.name = artist_name.strip() or artist_name
     artist_db.save()
-    logger.warning("WARNING Created new artist (normalized from '{}'): {}".format(original_name, artist_name))
+    logger.warning("WARNING Created new artist (normalized from '{}'): {}".format(artist_name, artist_db.name))
     return artist_db
 
 
@@ -182,18 +194,11 @@ def get_track_by_title_and_artist_name(track_title, artist_name):
 
 
 def get_currently_playing_track_from_db():
-    current_playlist = CurrentlyPlaying.objects.order_by('date_played')
-    if len(current_playlist) > 0:
-        current_track = current_playlist[len(current_playlist) - 1].track
-        return current_track
-    else:
-        return None
+    # Dernière ligne seulement (l'historique complet était chargé à chaque rafraîchissement)
+    last_played = CurrentlyPlaying.objects.order_by('date_played').select_related('track').last()
+    return last_played.track if last_played is not None else None
 
 
 def get_currently_playing_track_time_from_db():
-    current_playlist = CurrentlyPlaying.objects.order_by('date_played')
-    if len(current_playlist) > 0:
-        current_track_time = current_playlist[len(current_playlist) - 1].date_played
-        return current_track_time
-    else:
-        return None
+    last_played = CurrentlyPlaying.objects.order_by('date_played').last()
+    return last_played.date_played if last_played is not None else None
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from .collection import import_collection
+from .collection.import_jobs import import_job_progress
 from .currently_playing.currently_playing import (
     display_currently_playing,
     display_history_editing,
@@ -42,6 +43,7 @@ from .config.tools_views import (
     cleanup_musical_keys,
     cue_points_overview,
     delete_all_cue_points,
+    icecast_resolutions,
     tools_index,
 )
 from .set_transitions.views import set_transitions_view, add_set_transition, recount_play_counts
@@ -54,6 +56,7 @@ from .musical_key.views_import_musical_keys import import_musical_keys_view
 from .collection.rekordbox.views import (
     rekordbox_sync_view,
     synchronize_rekordbox_collection_api,
+    synchronize_rekordbox_targets_api,
     cue_points_stats_api
 )
 
@@ -68,6 +71,7 @@ urlpatterns = [
     path('static/favicon.ico', RedirectView.as_view(url=staticfiles_storage.url('favicon.ico'))),
     path('', navigation_view, name='navigation'),
     path('import_collection/', import_collection.upload_file, name='import_collection_view'),
+    path('import_collection/jobs/<int:job_id>/', import_job_progress, name='import_job_progress'),
     path('currently_playing/', display_currently_playing, name='currently_playing_view'),
     path('history_editing/<int:track_id>', display_history_editing, name='history_editing_view'),
     # TRANSITIONS
@@ -170,9 +174,14 @@ urlpatterns = [
     path('tools/cleanup_musical_keys/', cleanup_musical_keys, name='cleanup_musical_keys'),
     path('tools/cue_points/', cue_points_overview, name='cue_points_overview'),
     path('tools/delete_all_cue_points/', delete_all_cue_points, name='delete_all_cue_points'),
+    path('tools/icecast_resolutions/', icecast_resolutions, name='icecast_resolutions'),
     # REKORDBOX SYNCHRONIZATION
     path('rekordbox/', rekordbox_sync_view, name='rekordbox_sync'),
     path('rekordbox/api/synchronize/', synchronize_rekordbox_collection_api, name='rekordbox_api_synchronize'),
+    path(
+        'rekordbox/api/synchronize-targets/', synchronize_rekordbox_targets_api,
+        name='rekordbox_api_synchronize_targets',
+    ),
     path('rekordbox/api/stats/', cue_points_stats_api, name='rekordbox_api_stats'),
     path('playlist_favourite/', playlist_favourite.playlist_favourite, name='playlist_favourite'),
     path('toggle_playlist_favourite/', toggle_playlist_favourite, name='toggle_playlist_favourite'),